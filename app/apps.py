@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        # シグナルハンドラを登録
+        from . import signals  # noqa: F401
+
+        # 翻訳モデルの推論の各処理の時間をメトリクスと処理中のリクエストに記録する
+        from translate_ja_to_mm import add_timing_observer
+        from .metrics import observe_span
+        from .middleware import observe_model_time
+        add_timing_observer(observe_span)
+        add_timing_observer(observe_model_time)
+
+        # 翻訳モデルのウォームアップは、サーバーのエントリーポイント（itadaku/wsgi.py・asgi.py）で開始する
+        # （管理コマンド・PDFのワーカープロセスなど、Djangoを初期化するだけのプロセスではモデルを読み込まない）
@@ -0,0 +1,151 @@
+import io
+import logging
+import os
+from typing import Any, Dict, List
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# 派生画像を保存するディレクトリ（MEDIA_ROOT からの相対パス）
+IMAGE_VARIANT_DIR = 'menu_images/variants'
+
+
+def get_image_variant_settings() -> Dict[str, Any]:
+    """
+    派生画像の設定を取得する関数
+
+    Returns:
+        settings.MENU_IMAGE_VARIANTS にデフォルト値を補った辞書
+    """
+    config = getattr(settings, 'MENU_IMAGE_VARIANTS', {})
+    return {
+        'WIDTHS': config.get('WIDTHS', [320, 640, 960]),
+        'PRINT_SIZE': config.get('PRINT_SIZE', 1200),
+        'JPEG_QUALITY': config.get('JPEG_QUALITY', 80),
+        'WEBP_QUALITY': config.get('WEBP_QUALITY', 75),
+        'PRINT_QUALITY': config.get('PRINT_QUALITY', 85),
+    }
+
+
+def _save_image(image: Image.Image, name: str, image_format: str, quality: int) -> str:
+    """画像をエンコードしてストレージに保存し、保存した名前を返す"""
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, image_format, quality=quality)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def create_image_variants(image_field) -> Dict[str, Any]:
+    """
+    アップロードされた画像から派生画像を作成する関数
+
+    Web表示用に幅ごとのJPEGとWebP、PDF用に長辺を PRINT_SIZE に縮小したJPEGを作成する。
+    元の画像より大きい幅の派生画像は作成しない
+
+    Args:
+        image_field: MenuItem.image
+
+    Returns:
+        元の画像の名前と大きさ、派生画像の名前の辞書
+        （例: {'source': ..., 'width': 4032, 'height': 3024,
+               'jpeg': {'320': ..., ...}, 'webp': {'320': ..., ...}, 'print': ...}）
+    """
+    config = get_image_variant_settings()
+    with image_field.open('rb') as f:
+        with Image.open(f) as original:
+            # スマートフォンの写真の向きを反映してからRGBに変換する
+            image = ImageOps.exif_transpose(original).convert('RGB')
+
+    width, height = image.size
+    stem = os.path.splitext(os.path.basename(image_field.name))[0]
+    base_name = f'{IMAGE_VARIANT_DIR}/{stem}'
+
+    variants: Dict[str, Any] = {
+        'source': image_field.name,
+        'width': width,
+        'height': height,
+        'jpeg': {},
+        'webp': {},
+    }
+    widths = sorted({min(w, width) for w in config['WIDTHS']})
+    for variant_width in widths:
+        variant_height = max(1, round(height * variant_width / width))
+        resized = image.resize((variant_width, variant_height), Image.LANCZOS)
+        variants['jpeg'][str(variant_width)] = _save_image(
+            resized, f'{base_name}_w{variant_width}.jpg', 'JPEG', config['JPEG_QUALITY']
+        )
+        variants['webp'][str(variant_width)] = _save_image(
+            resized, f'{base_name}_w{variant_width}.webp', 'WEBP', config['WEBP_QUALITY']
+        )
+
+    # PDF用の画像（長辺を PRINT_SIZE 以下に縮小）
+    printable = image.copy()
+    printable.thumbnail((config['PRINT_SIZE'], config['PRINT_SIZE']), Image.LANCZOS)
+    variants['print'] = _save_image(
+        printable, f'{base_name}_print.jpg', 'JPEG', config['PRINT_QUALITY']
+    )
+    return variants
+
+
+def _variant_names(variants: Dict[str, Any]) -> List[str]:
+    """派生画像の名前のリスト"""
+    names = list(variants.get('jpeg', {}).values()) + list(variants.get('webp', {}).values())
+    if variants.get('print'):
+        names.append(variants['print'])
+    return names
+
+
+def refresh_image_variants(menu_item, force: bool = False) -> bool:
+    """
+    メニュー項目の画像から派生画像を作成し直す関数
+
+    画像が変更されていない場合は何もしない。古い派生画像は削除する
+
+    Args:
+        menu_item: MenuItem
+        force: Trueの場合は画像が変更されていなくても作成し直す
+
+    Returns:
+        作成し直した場合はTrue
+    """
+    image_name = menu_item.image.name if menu_item.image else ''
+    if not force and menu_item.image_variants.get('source', '') == image_name:
+        return False
+
+    old_variants = menu_item.image_variants
+    try:
+        menu_item.image_variants = create_image_variants(menu_item.image) if image_name else {}
+    except Exception:
+        # 画像を読み込めない場合は元の画像をそのまま使う
+        logger.warning("派生画像の作成に失敗しました: id=%s, image=%s", menu_item.id, image_name, exc_info=True)
+        menu_item.image_variants = {'source': image_name}
+    # save() を呼ぶとシグナルが再度送られるため、update() で保存する
+    type(menu_item)._default_manager.filter(pk=menu_item.pk).update(image_variants=menu_item.image_variants)
+
+    # 新しい派生画像と同じ名前のものは削除しない
+    new_names = set(_variant_names(menu_item.image_variants))
+    for name in _variant_names(old_variants):
+        if name not in new_names:
+            default_storage.delete(name)
+    return True
+
+
+def build_srcset(names: Dict[str, str]) -> str:
+    """
+    幅ごとの派生画像の名前から srcset 属性の値を作成する関数
+
+    Args:
+        names: 幅（文字列）と派生画像の名前の辞書
+
+    Returns:
+        srcset 属性の値（例: '/media/..._w320.jpg 320w, /media/..._w640.jpg 640w'）
+    """
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w'
+        for width, name in sorted(names.items(), key=lambda entry: int(entry[0]))
+    )
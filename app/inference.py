@@ -0,0 +1,196 @@
+"""
+非同期のビューから翻訳モデルの推論を実行するためのスレッドプール
+
+推論は同時に実行する数（MAX_CONCURRENCY）と待ち行列の長さ（MAX_QUEUE）を制限したスレッドプールで実行し、
+いっぱいの場合は待たずに InferenceBusy を送出する（ビューは 429 と Retry-After を返す）。
+イベントループは推論を待たないため、キャッシュされた翻訳のリクエストは推論中も処理できる。
+
+翻訳モデルは共有されており、推論そのものは translate_ja_to_mm のロックで一度に1つずつ実行される。
+このスレッドプールを通らない推論（同期のビュー・PDFの生成など）も同じロックで順番を待つため、
+MAX_CONCURRENCY を2以上にしても推論は並列にならず、順番を待つ処理が増えるだけになる
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+from django.conf import settings
+from django.db import connections
+from .metrics import INFERENCE_REJECTIONS
+
+
+class InferenceBusy(Exception):
+    """推論の待ち行列がいっぱいの場合に送出される例外"""
+
+    def __init__(self, retry_after: int):
+        super().__init__('翻訳の推論の待ち行列がいっぱいです')
+        self.retry_after = retry_after
+
+
+def start_model_warmup_if_enabled() -> None:
+    """
+    TRANSLATION_MODEL_WARMUP が有効な場合に、翻訳モデルのウォームアップをバックグラウンドで開始する関数
+
+    リクエストを処理するプロセスだけで実行されるよう、サーバーのエントリーポイント（itadaku/wsgi.py・asgi.py）から呼び出す
+    """
+    if getattr(settings, 'TRANSLATION_MODEL_WARMUP', False):
+        from translate_ja_to_mm import start_model_warmup
+        start_model_warmup()
+
+
+def get_inference_settings() -> Dict[str, Any]:
+    """
+    推論のスレッドプールの設定を取得する関数
+
+    Returns:
+        settings.TRANSLATION_INFERENCE にデフォルト値を補った辞書
+    """
+    config = getattr(settings, 'TRANSLATION_INFERENCE', {})
+    return {
+        'MAX_CONCURRENCY': config.get('MAX_CONCURRENCY', 1),
+        'MAX_QUEUE': config.get('MAX_QUEUE', 8),
+        'RETRY_AFTER': config.get('RETRY_AFTER', 5),
+    }
+
+
+class InferenceExecutor:
+    """同時に実行する数と待ち行列の長さを制限したスレッドプール"""
+
+    def __init__(self, max_concurrency: int, max_queue: int, retry_after: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix='translation-inference'
+        )
+        self._capacity = max_concurrency + max_queue
+        self._retry_after = retry_after
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """実行中と待機中の処理の数"""
+        return self._pending
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    @staticmethod
+    def _call(func: Callable[..., Any], args, kwargs) -> Any:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # このスレッドで開いたデータベース接続を閉じる
+            connections.close_all()
+
+    def _submit(self, func: Callable[..., Any], args, kwargs) -> Future:
+        """
+        空きがあれば関数をスレッドプールに追加する
+
+        呼び出し元のコンテキスト変数（処理中のリクエストのプロファイルなど）を引き継いで実行する
+
+        Raises:
+            InferenceBusy: 実行中と待機中の処理の数が上限に達している場合
+        """
+        with self._lock:
+            if self._pending >= self._capacity:
+                INFERENCE_REJECTIONS.inc()
+                raise InferenceBusy(self._retry_after)
+            self._pending += 1
+        try:
+            context = contextvars.copy_context()
+            future = self._executor.submit(context.run, self._call, func, args, kwargs)
+        except BaseException:
+            self._release()
+            raise
+        # 待っているリクエストが切断された場合も、処理が終わる（または取り消される）まで数に含める
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        関数をスレッドプールで実行し、その結果を待つ
+
+        Args:
+            func: 実行する関数（データベースにアクセスしてもよい）
+            *args, **kwargs: 関数の引数
+
+        Returns:
+            関数の戻り値
+
+        Raises:
+            InferenceBusy: 実行中と待機中の処理の数が上限に達している場合
+        """
+        return await asyncio.wrap_future(self._submit(func, args, kwargs))
+
+    async def stream(self, func: Callable[..., Iterator[Any]], *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        ジェネレータ関数をスレッドプールで実行し、生成された値を順に返す
+
+        ジェネレータが終わるまで1つの枠を使う。受け取り側が途中で終了した場合は、次の値を生成した時点で止める
+
+        Args:
+            func: 実行するジェネレータ関数
+            *args, **kwargs: 関数の引数
+
+        Yields:
+            ジェネレータが生成した値
+
+        Raises:
+            InferenceBusy: 実行中と待機中の処理の数が上限に達している場合
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+        finished = object()
+
+        def put(item) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # イベントループが終了している場合
+                stopped.set()
+
+        def produce() -> None:
+            try:
+                for value in func(*args, **kwargs):
+                    if stopped.is_set():
+                        return
+                    put((value, None))
+            except BaseException as e:
+                put((finished, e))
+            else:
+                put((finished, None))
+
+        self._submit(produce, (), {})
+        try:
+            while True:
+                value, error = await queue.get()
+                if value is finished:
+                    if error is not None:
+                        raise error
+                    return
+                yield value
+        finally:
+            stopped.set()
+
+
+_inference_executor: Optional[InferenceExecutor] = None
+_inference_executor_lock = threading.Lock()
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """
+    推論のスレッドプールを取得する関数
+
+    Returns:
+        プロセス内で共有する InferenceExecutor
+    """
+    global _inference_executor
+    if _inference_executor is None:
+        with _inference_executor_lock:
+            if _inference_executor is None:
+                config = get_inference_settings()
+                _inference_executor = InferenceExecutor(
+                    config['MAX_CONCURRENCY'], config['MAX_QUEUE'], config['RETRY_AFTER']
+                )
+    return _inference_executor
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from app.images import refresh_image_variants
+from app.models import MenuItem
+from app.utils import bump_content_version
+
+class Command(BaseCommand):
+    help = 'メニュー項目の画像から、Web表示用とPDF用の派生画像を作成します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='作成済みの派生画像も作成し直します（設定を変更した場合など）',
+        )
+
+    def handle(self, *args, **options):
+        items = MenuItem.objects.exclude(image='').exclude(image__isnull=True).order_by('id')
+        created = 0
+        for item in items:
+            if refresh_image_variants(item, force=options['force']):
+                created += 1
+                self.stdout.write(f'  {item.name}: {item.image.name}')
+
+        # update() で保存しているため、メニューのバージョンはここでまとめて上げる
+        if created:
+            bump_content_version('menu')
+        self.stdout.write(self.style.SUCCESS(f'{created}件のメニュー項目の派生画像を作成しました'))
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from app.models import MenuItem
+from app.utils import (
+    TRANSLATABLE_FIELDS, get_supported_languages, translate_fields_to_languages_with_cache,
+)
+
+class Command(BaseCommand):
+    help = '提供可能なすべてのメニュー項目を事前に翻訳し、翻訳キャッシュを作成します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lang', action='append', dest='languages', metavar='LANG',
+            help='翻訳先の言語コード（複数指定可能。省略した場合は対応しているすべての言語）',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='まとめて翻訳・保存するメニュー項目の数（デフォルト: 50）',
+        )
+
+    def handle(self, *args, **options):
+        supported_languages = get_supported_languages()
+        languages = options['languages'] or [code for code in supported_languages if code != 'ja_XX']
+        unsupported = [code for code in languages if code not in supported_languages]
+        if unsupported:
+            raise CommandError(f'サポートされていない言語コードです: {", ".join(unsupported)}')
+
+        items = list(MenuItem.objects.filter(is_available=True).order_by('id'))
+        batch_size = options['batch_size']
+        self.stdout.write(f'{len(items)}件のメニュー項目を{len(languages)}言語に翻訳します')
+
+        # テキストごとに、キャッシュにないすべての言語へ1回のエンコードでまとめて翻訳する
+        # バッチごとに保存されるため、中断しても再実行すれば続きから処理される
+        # （元のテキストが変わっていない翻訳キャッシュは翻訳されない）
+        started_at = time.monotonic()
+        failed = 0
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            texts = {
+                (item.id, field_name): getattr(item, field_name)
+                for item in batch
+                for field_name in TRANSLATABLE_FIELDS
+                if getattr(item, field_name)
+            }
+            results = translate_fields_to_languages_with_cache(texts, languages)
+            failed += sum(len(texts) - len(results[lang]) for lang in languages)
+            done = min(start + batch_size, len(items))
+            self.stdout.write(f'  {done}/{len(items)}件', ending='\r')
+            self.stdout.flush()
+        self.stdout.write(f'  {len(items)}/{len(items)}件')
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f'{failed}件の翻訳に失敗しました（再実行すると翻訳し直します）'
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'事前翻訳が完了しました ({time.monotonic() - started_at:.1f}秒)'
+        ))
@@ -0,0 +1,75 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from app.utils import (
+    delete_finished_translation_jobs, process_translation_jobs, requeue_stale_translation_jobs,
+)
+from translate_ja_to_mm import warm_up_model
+
+class Command(BaseCommand):
+    help = '翻訳ジョブのキューを処理するワーカーを起動します'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=16,
+            help='一度に取り出して翻訳するジョブの最大数（デフォルト: 16）',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='キューが空のときの待機秒数（デフォルト: 1.0）',
+        )
+        parser.add_argument(
+            '--stale-timeout', type=int, default=600,
+            help='実行中のまま放置されたジョブを待機中に戻すまでの秒数（デフォルト: 600）',
+        )
+        parser.add_argument(
+            '--retention', type=int, default=86400,
+            help='完了・失敗したジョブを削除するまでの秒数（デフォルト: 86400）',
+        )
+        parser.add_argument(
+            '--maintenance-interval', type=float, default=60.0,
+            help='放置されたジョブの回収と古いジョブの削除を行う間隔の秒数（デフォルト: 60）',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='待機中のジョブをすべて処理したら終了します',
+        )
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        batch_size = options['batch_size']
+
+        # モデルはワーカーが起動時に一度だけロードし、推論を実行してコンパイルしておく
+        self.stdout.write('翻訳モデルをロードしています...')
+        warm_up_model()
+        self.stdout.write(self.style.SUCCESS(f'翻訳ワーカーを起動しました: {worker}'))
+
+        last_maintenance = None
+        try:
+            while True:
+                # 他のワーカーが停止した場合にも回収できるよう、起動時だけでなく定期的に実行する
+                now = time.monotonic()
+                if last_maintenance is None or now - last_maintenance >= options['maintenance_interval']:
+                    self.maintain(options['stale_timeout'], options['retention'])
+                    last_maintenance = now
+
+                processed = process_translation_jobs(worker, batch_size)
+                if processed:
+                    self.stdout.write(f'{processed}件のジョブを処理しました')
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('翻訳ワーカーを停止します')
+
+    def maintain(self, stale_timeout, retention):
+        """停止したワーカーが取り出したままのジョブを回収し、完了・失敗した古いジョブを削除する"""
+        requeued = requeue_stale_translation_jobs(stale_timeout)
+        if requeued:
+            self.stdout.write(f'{requeued}件の放置されたジョブを待機中に戻しました')
+        deleted = delete_finished_translation_jobs(retention)
+        if deleted:
+            self.stdout.write(f'{deleted}件の完了・失敗したジョブを削除しました')
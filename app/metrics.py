@@ -0,0 +1,222 @@
+"""
+翻訳・PDF出力の処理時間と件数を集計するメトリクス
+
+プロセスごとにメモリ上で集計し、/metrics から Prometheus のテキスト形式で出力する
+（複数のワーカープロセスで動かす場合は、プロセスごとの値になる）
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# 処理時間のヒストグラムのバケット（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape_label_value(value: str) -> str:
+    """ラベルの値のバックスラッシュ・ダブルクォート・改行をエスケープする"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], le: str = '') -> str:
+    """ラベルを Prometheus のテキスト形式に変換する（le はヒストグラムのバケットの上限）"""
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, values)]
+    if le:
+        pairs.append(f'le="{le}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """ラベルごとに値を加算するカウンター"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        カウンターを加算する
+
+        Args:
+            amount: 加算する値
+            **labels: ラベルの値
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        """Prometheus のテキスト形式の行"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """ラベルごとに値の分布（バケットごとの件数・合計・件数）を集計するヒストグラム"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # ラベルごとの [バケットごとの件数..., 合計]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        値を記録する
+
+        Args:
+            value: 記録する値（処理時間の場合は秒）
+            **labels: ラベルの値
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def collect(self) -> List[str]:
+        """Prometheus のテキスト形式の行"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            values = sorted((key, list(counts)) for key, counts in self._values.items())
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, str(bound))} {cumulative}')
+            total = cumulative + counts[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, "+Inf")} {total}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {counts[-1]}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {total}')
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+# 処理ごとの処理時間
+SPAN_SECONDS = Histogram(
+    'itadaku_span_seconds',
+    '処理ごとの処理時間（秒）',
+    ['span'],
+)
+# 処理ごとの失敗数
+SPAN_ERRORS = Counter(
+    'itadaku_span_errors_total',
+    '処理ごとの失敗数',
+    ['span'],
+)
+# 翻訳キャッシュの参照結果（tier: local / db / memory, result: hit / miss）
+TRANSLATION_CACHE_LOOKUPS = Counter(
+    'itadaku_translation_cache_lookups_total',
+    '翻訳キャッシュの参照結果の件数',
+    ['tier', 'result'],
+)
+# 翻訳モデルで翻訳したテキスト数
+MODEL_TRANSLATIONS = Counter(
+    'itadaku_model_translations_total',
+    '翻訳モデルで翻訳したテキスト数',
+    ['target_language'],
+)
+# メニューPDFのキャッシュの参照結果（result: hit / miss）
+PDF_CACHE_LOOKUPS = Counter(
+    'itadaku_pdf_cache_lookups_total',
+    'メニューPDFのキャッシュの参照結果の件数',
+    ['result'],
+)
+
+# 推論の待ち行列がいっぱいで断ったリクエスト数
+INFERENCE_REJECTIONS = Counter(
+    'itadaku_inference_rejected_total',
+    '推論の待ち行列がいっぱいで断ったリクエスト数',
+)
+
+REGISTRY = [
+    SPAN_SECONDS, SPAN_ERRORS, TRANSLATION_CACHE_LOOKUPS, MODEL_TRANSLATIONS, PDF_CACHE_LOOKUPS,
+    INFERENCE_REJECTIONS,
+]
+
+
+def observe_span(name: str, seconds: float) -> None:
+    """
+    処理時間を記録する関数（翻訳モジュールのタイミング通知の受け取りにも使う）
+
+    Args:
+        name: 処理の名前（例: 'cache_lookup', 'generate'）
+        seconds: 処理時間（秒）
+    """
+    SPAN_SECONDS.observe(seconds, span=name)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    with ブロックの処理時間を記録するコンテキストマネージャ
+
+    例外が発生した場合も処理時間を記録し、失敗数を加算する
+
+    Args:
+        name: 処理の名前
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        SPAN_ERRORS.inc(span=name)
+        raise
+    finally:
+        observe_span(name, time.perf_counter() - started)
+
+
+def count_cache_lookups(tier: str, hits: int, misses: int) -> None:
+    """
+    翻訳キャッシュの参照結果を記録する関数
+
+    Args:
+        tier: キャッシュの種類（'local' / 'db' / 'memory'）
+        hits: 見つかった件数
+        misses: 見つからなかった件数
+    """
+    if hits:
+        TRANSLATION_CACHE_LOOKUPS.inc(hits, tier=tier, result='hit')
+    if misses:
+        TRANSLATION_CACHE_LOOKUPS.inc(misses, tier=tier, result='miss')
+
+
+def render_metrics() -> str:
+    """
+    すべてのメトリクスを Prometheus のテキスト形式で出力する関数
+
+    Returns:
+        Prometheus のテキスト形式の文字列
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return '\n'.join(lines) + '\n'
+
+
+def clear_metrics() -> None:
+    """すべてのメトリクスを消去する関数（テスト用）"""
+    for metric in REGISTRY:
+        metric.clear()
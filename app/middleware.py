@@ -0,0 +1,244 @@
+"""
+リクエストごとの処理時間・クエリ数・翻訳モデルの処理時間を記録するミドルウェア
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils import timezone
+
+# プロファイルの結果に表示する関数の数
+PROFILE_STATS_LIMIT = 50
+
+
+def get_request_profiling_settings() -> Dict[str, Any]:
+    """
+    リクエストのプロファイリングの設定を取得する関数
+
+    Returns:
+        settings.REQUEST_PROFILING にデフォルト値を補った辞書
+    """
+    config = getattr(settings, 'REQUEST_PROFILING', {})
+    return {
+        'SERVER_TIMING': config.get('SERVER_TIMING', True),
+        'SLOW_REQUEST_THRESHOLD_MS': config.get('SLOW_REQUEST_THRESHOLD_MS', 500),
+        'SLOW_REQUEST_LOG_SIZE': config.get('SLOW_REQUEST_LOG_SIZE', 100),
+    }
+
+
+class RequestProfile:
+    """1つのリクエストのクエリ数・クエリ時間・翻訳モデルの処理時間"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.model_seconds = 0.0
+
+
+# 処理中のリクエストのプロファイル
+# 非同期のビューではクエリや推論が別のスレッドで実行されるため、スレッドではなくコンテキスト変数で紐付ける
+# （sync_to_async と推論のスレッドプールは呼び出し元のコンテキスト変数を引き継ぐ）
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar('request_profile', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    """すべてのデータベース接続に登録する、処理中のリクエストのクエリ数と時間を記録する関数"""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.query_count += 1
+        profile.query_seconds += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    データベース接続が作成されたときに、クエリを記録する関数を登録する
+
+    データベース接続はスレッドごとに作成されるため、リクエストごとに connection.execute_wrapper を
+    使うと別のスレッドで実行されたクエリを記録できない。
+    execute_wrapper で一時的に追加される関数の順序を崩さないよう、先頭に追加する
+    """
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def observe_model_time(name: str, seconds: float) -> None:
+    """
+    翻訳モデルの処理時間を処理中のリクエストに加算する関数（翻訳モジュールのタイミング通知の受け取りに使う）
+
+    Args:
+        name: 処理の名前（例: 'generate'）
+        seconds: 処理時間（秒）
+    """
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.model_seconds += seconds
+
+
+class SlowRequestLog:
+    """処理に時間がかかったリクエストを新しいものから一定件数だけ保持するリングバッファ"""
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._entries: deque = deque(maxlen=size)
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """リクエストを追加する（いっぱいの場合は最も古いものを削除する）"""
+        with self._lock:
+            self._entries.append(entry)
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        """保持しているリクエストを処理時間の長い順に返す"""
+        with self._lock:
+            entries = list(self._entries)
+        return sorted(entries, key=lambda entry: entry['duration_ms'], reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_slow_request_log: Optional[SlowRequestLog] = None
+_slow_request_log_lock = threading.Lock()
+
+
+def get_slow_request_log() -> SlowRequestLog:
+    """
+    処理に時間がかかったリクエストのログを取得する関数
+
+    Returns:
+        プロセス内で共有する SlowRequestLog
+    """
+    global _slow_request_log
+    if _slow_request_log is None:
+        with _slow_request_log_lock:
+            if _slow_request_log is None:
+                _slow_request_log = SlowRequestLog(get_request_profiling_settings()['SLOW_REQUEST_LOG_SIZE'])
+    return _slow_request_log
+
+
+def format_server_timing(duration: float, profile: RequestProfile) -> str:
+    """
+    Server-Timing ヘッダーの値を作成する関数
+
+    Args:
+        duration: リクエスト全体の処理時間（秒）
+        profile: リクエストのプロファイル
+
+    Returns:
+        Server-Timing ヘッダーの値（例: 'total;dur=12.3, db;dur=4.5;desc="3 queries", model;dur=0.0'）
+    """
+    return (
+        f'total;dur={duration * 1000:.1f}, '
+        f'db;dur={profile.query_seconds * 1000:.1f};desc="{profile.query_count} queries", '
+        f'model;dur={profile.model_seconds * 1000:.1f}'
+    )
+
+
+class RequestProfilingMiddleware:
+    """
+    リクエストごとの処理時間・クエリ数・クエリ時間・翻訳モデルの処理時間を記録するミドルウェア
+
+    結果は Server-Timing ヘッダーで返し、SLOW_REQUEST_THRESHOLD_MS 以上かかったリクエストは
+    管理画面から確認できるように SlowRequestLog に保存する。
+    スタッフが ?profile=1 を付けてアクセスした場合は、レスポンスの代わりに cProfile の結果を返す。
+    request.user を参照するため、AuthenticationMiddleware より後に置く。
+    非同期のビューをスレッドに切り替えずに実行できるよう、同期・非同期の両方に対応する
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if request.GET.get('profile') == '1' and request.user.is_staff:
+            return self.profile_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.record(request, response, time.perf_counter() - started, profile)
+
+    async def __acall__(self, request):
+        if request.GET.get('profile') == '1' and (await request.auser()).is_staff:
+            return await self.aprofile_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.record(request, response, time.perf_counter() - started, profile)
+
+    def record(self, request, response, duration: float, profile: RequestProfile):
+        """Server-Timing ヘッダーを付け、時間がかかったリクエストを記録する"""
+        config = get_request_profiling_settings()
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = format_server_timing(duration, profile)
+        if duration * 1000 >= config['SLOW_REQUEST_THRESHOLD_MS']:
+            get_slow_request_log().record({
+                'time': timezone.now(),
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'query_count': profile.query_count,
+                'query_ms': round(profile.query_seconds * 1000, 1),
+                'model_ms': round(profile.model_seconds * 1000, 1),
+            })
+        return response
+
+    def profile_response(self, request):
+        """ビューを cProfile で実行し、累積時間の長い順に並べた結果をテキストで返す"""
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+        return self.stats_response(profiler, response)
+
+    async def aprofile_response(self, request):
+        """
+        非同期のビューを cProfile で実行する
+
+        計測するのはイベントループのスレッドのみで、同時に処理している他のリクエストの処理も含まれる
+        """
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        return self.stats_response(profiler, response)
+
+    @staticmethod
+    def stats_response(profiler: cProfile.Profile, response) -> HttpResponse:
+        # ファイルを返すレスポンスなどは閉じておく
+        response.close()
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats('cumulative').print_stats(PROFILE_STATS_LIMIT)
+        return HttpResponse(output.getvalue(), content_type='text/plain; charset=utf-8')
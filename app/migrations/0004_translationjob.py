@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_menuitem_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(max_length=50, verbose_name='コンテンツタイプ')),
+                ('object_id', models.PositiveIntegerField(verbose_name='オブジェクトID')),
+                ('field_name', models.CharField(max_length=50, verbose_name='フィールド名')),
+                ('source_text', models.TextField(verbose_name='元のテキスト')),
+                ('target_language', models.CharField(max_length=10, verbose_name='翻訳先言語')),
+                ('status', models.CharField(choices=[('pending', '待機中'), ('running', '実行中'), ('done', '完了'), ('failed', '失敗')], default='pending', max_length=10, verbose_name='状態')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='ワーカー')),
+                ('translated_text', models.TextField(blank=True, verbose_name='翻訳されたテキスト')),
+                ('error', models.TextField(blank=True, verbose_name='エラー')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='作成日時')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+            ],
+            options={
+                'verbose_name': '翻訳ジョブ',
+                'verbose_name_plural': '翻訳ジョブ',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='app_transla_status_0d32b2_idx'), models.Index(fields=['content_type', 'object_id', 'field_name', 'target_language'], name='app_transla_content_0287f1_idx')],
+            },
+        ),
+    ]
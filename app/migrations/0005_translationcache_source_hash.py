@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:28
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_source_hash(apps, schema_editor):
+    """既存の翻訳キャッシュに元のテキストのハッシュ値を設定"""
+    TranslationCache = apps.get_model('app', 'TranslationCache')
+    caches = list(TranslationCache.objects.only('id', 'source_text'))
+    for cache in caches:
+        cache.source_hash = hashlib.sha256(cache.source_text.encode('utf-8')).hexdigest()
+    TranslationCache.objects.bulk_update(caches, ['source_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_translationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translationcache',
+            name='source_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='元のテキストのハッシュ'),
+        ),
+        migrations.RunPython(fill_source_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_translationcache_source_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(max_length=64, verbose_name='元のテキストのハッシュ')),
+                ('target_language', models.CharField(max_length=10, verbose_name='翻訳先言語')),
+                ('model_version', models.CharField(max_length=100, verbose_name='モデルバージョン')),
+                ('source_text', models.TextField(verbose_name='元のテキスト')),
+                ('translated_text', models.TextField(verbose_name='翻訳されたテキスト')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='作成日時')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+            ],
+            options={
+                'verbose_name': '翻訳メモリ',
+                'verbose_name_plural': '翻訳メモリ',
+                'unique_together': {('source_hash', 'target_language', 'model_version')},
+            },
+        ),
+    ]
@@ -1,6 +1,12 @@
+import hashlib
+import re
+import unicodedata
+
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.core.files.storage import default_storage
 from django.utils.translation import gettext_lazy as _
+from .images import build_srcset
 
 # アレルギー物質の選択肢
 ALLERGEN_CHOICES = [
@@ -18,6 +24,17 @@ ALLERGEN_CHOICES = [
     ('sesame', 'ごま'),
 ]
 
+
+def compute_source_hash(text):
+    """翻訳元テキストのハッシュ値（SHA-256の16進文字列）を計算"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def normalize_source_text(text):
+    """翻訳メモリ用に翻訳元テキストを正規化（NFKC正規化と空白の統一）"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text)).strip()
+
+
 class MenuItem(models.Model):
     """レストランメニュー項目モデル"""
     name = models.CharField('商品名', max_length=100)
@@ -26,6 +43,8 @@ class MenuItem(models.Model):
     
     # タイトル画像
     image = models.ImageField('商品画像', upload_to='menu_images/', blank=True, null=True)
+    # 画像から作成した派生画像（Web表示用の幅ごとのJPEG・WebP、PDF用のJPEG）の名前
+    image_variants = models.JSONField('派生画像', default=dict, blank=True, editable=False)
     
     # アレルギー情報（複数選択可能）
     allergens = models.JSONField('アレルギー物質', default=list, blank=True, help_text='含まれるアレルギー物質')
@@ -55,6 +74,36 @@ class MenuItem(models.Model):
     def has_allergen(self, allergen_code):
         """特定のアレルギー物質が含まれているかチェック"""
         return allergen_code in self.allergens
+    
+    def get_current_image_variants(self):
+        """現在の画像から作成された派生画像を取得（作成されていない場合は空の辞書）"""
+        if self.image and self.image_variants.get('source') == self.image.name:
+            return self.image_variants
+        return {}
+    
+    def get_image_src(self):
+        """img要素のsrcに使う画像のURL（幅640px以下で最大の派生画像、なければ元の画像）"""
+        jpeg = self.get_current_image_variants().get('jpeg')
+        if not jpeg:
+            return self.image.url if self.image else ''
+        widths = sorted(int(width) for width in jpeg)
+        width = max([w for w in widths if w <= 640] or widths[:1])
+        return default_storage.url(jpeg[str(width)])
+    
+    def get_image_srcset(self):
+        """Web表示用のJPEGのsrcset"""
+        return build_srcset(self.get_current_image_variants().get('jpeg', {}))
+    
+    def get_image_webp_srcset(self):
+        """Web表示用のWebPのsrcset"""
+        return build_srcset(self.get_current_image_variants().get('webp', {}))
+    
+    def get_print_image_path(self):
+        """PDFに埋め込む画像のファイルパス（PDF用の派生画像、なければ元の画像）"""
+        if not self.image:
+            return None
+        print_image = self.get_current_image_variants().get('print')
+        return default_storage.path(print_image) if print_image else self.image.path
 
 
 class MenuCategory(models.Model):
@@ -96,6 +145,8 @@ class TranslationCache(models.Model):
     field_name = models.CharField('フィールド名', max_length=50)
     # 翻訳元のテキスト
     source_text = models.TextField('元のテキスト')
+    # 翻訳元のテキストのハッシュ値（元のテキストが変更されたかの判定に使用）
+    source_hash = models.CharField('元のテキストのハッシュ', max_length=64, blank=True, db_index=True)
     # 翻訳先の言語コード
     target_language = models.CharField('翻訳先言語', max_length=10)
     # 翻訳されたテキスト
@@ -117,3 +168,109 @@ class TranslationCache(models.Model):
     
     def __str__(self):
         return f'{self.content_type}:{self.object_id}:{self.field_name} -> {self.target_language}'
+    
+    def save(self, *args, **kwargs):
+        # 元のテキストのハッシュ値を常に最新に保つ
+        self.source_hash = compute_source_hash(self.source_text)
+        super().save(*args, **kwargs)
+
+
+class TranslationJob(models.Model):
+    """翻訳ジョブのキューモデル"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '待機中'),
+        (STATUS_RUNNING, '実行中'),
+        (STATUS_DONE, '完了'),
+        (STATUS_FAILED, '失敗'),
+    ]
+    
+    # 翻訳対象（TranslationCacheと同じキー）
+    content_type = models.CharField('コンテンツタイプ', max_length=50)
+    object_id = models.PositiveIntegerField('オブジェクトID')
+    field_name = models.CharField('フィールド名', max_length=50)
+    source_text = models.TextField('元のテキスト')
+    target_language = models.CharField('翻訳先言語', max_length=10)
+    
+    # ジョブの状態
+    status = models.CharField('状態', max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # ジョブを処理しているワーカーの識別子
+    worker = models.CharField('ワーカー', max_length=100, blank=True)
+    # 翻訳結果とエラー内容
+    translated_text = models.TextField('翻訳されたテキスト', blank=True)
+    error = models.TextField('エラー', blank=True)
+    
+    created_at = models.DateTimeField('作成日時', auto_now_add=True)
+    updated_at = models.DateTimeField('更新日時', auto_now=True)
+    
+    class Meta:
+        verbose_name = '翻訳ジョブ'
+        verbose_name_plural = '翻訳ジョブ'
+        ordering = ['created_at']
+        # ワーカーが待機中のジョブを古い順に取り出すためのインデックス
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['content_type', 'object_id', 'field_name', 'target_language']),
+        ]
+    
+    def __str__(self):
+        return f'#{self.pk} {self.content_type}:{self.object_id}:{self.field_name} -> {self.target_language} ({self.status})'
+
+
+class TranslationMemory(models.Model):
+    """
+    翻訳メモリモデル
+    
+    正規化した翻訳元テキストのハッシュ値をキーに翻訳結果を保存し、
+    同じテキストであればメニュー項目やフィールドが異なっても翻訳結果を再利用する
+    """
+    # 正規化した翻訳元テキストのハッシュ値
+    source_hash = models.CharField('元のテキストのハッシュ', max_length=64)
+    # 翻訳先の言語コード
+    target_language = models.CharField('翻訳先言語', max_length=10)
+    # 翻訳に使用したモデルのバージョン
+    model_version = models.CharField('モデルバージョン', max_length=100)
+    # 正規化した翻訳元のテキスト
+    source_text = models.TextField('元のテキスト')
+    # 翻訳されたテキスト
+    translated_text = models.TextField('翻訳されたテキスト')
+    created_at = models.DateTimeField('作成日時', auto_now_add=True)
+    updated_at = models.DateTimeField('更新日時', auto_now=True)
+    
+    class Meta:
+        verbose_name = '翻訳メモリ'
+        verbose_name_plural = '翻訳メモリ'
+        # 同じテキストの同じ言語・同じモデルでの翻訳は一意
+        unique_together = ('source_hash', 'target_language', 'model_version')
+    
+    def __str__(self):
+        return f'{self.source_text[:20]} -> {self.target_language} ({self.model_version})'
+    
+    def save(self, *args, **kwargs):
+        # 元のテキストを正規化し、ハッシュ値を常に最新に保つ
+        self.source_text = normalize_source_text(self.source_text)
+        self.source_hash = compute_source_hash(self.source_text)
+        super().save(*args, **kwargs)
+
+
+class ContentVersion(models.Model):
+    """
+    コンテンツのバージョンモデル
+    
+    メニューや翻訳が変更されるたびにバージョンを上げ、ページやPDFのキャッシュの
+    キーに使う。name には 'menu'（メニュー項目・カテゴリ）や
+    'translation:<言語コード>'（その言語の翻訳キャッシュ）を指定する。
+    """
+    name = models.CharField('名前', max_length=50, unique=True)
+    version = models.PositiveIntegerField('バージョン', default=0)
+    updated_at = models.DateTimeField('更新日時', auto_now=True)
+    
+    class Meta:
+        verbose_name = 'コンテンツバージョン'
+        verbose_name_plural = 'コンテンツバージョン'
+    
+    def __str__(self):
+        return f'{self.name}: {self.version}'
@@ -0,0 +1,626 @@
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from django.conf import settings
+from django.db import connections
+from django.db.models import Prefetch
+from django.http import FileResponse, HttpResponse
+from django.template.loader import get_template
+from .metrics import PDF_CACHE_LOOKUPS, span
+from .models import MenuItem, MenuCategory, MenuItemCategory
+from .pdf_worker import init_pdf_worker, build_menu_pdf_in_worker
+from .utils import (
+    SingleFlight, TranslationFailed, get_menu_content_version, get_translation_caches, translate_items_with_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# アレルギー情報の英語マッピング
+ALLERGEN_MAP = {
+    'egg': 'Egg', 'milk': 'Milk', 'wheat': 'Wheat', 'shrimp': 'Shrimp',
+    'crab': 'Crab', 'peanut': 'Peanut', 'soba': 'Buckwheat', 'fish': 'Fish',
+    'nuts': 'Nuts', 'soy': 'Soy', 'fruit': 'Fruit', 'sesame': 'Sesame'
+}
+
+MENU_PDF_TEMPLATE = 'app/menu_pdf.html'
+
+# 同じ言語のPDFの生成が同時に要求された場合は、一度だけ生成して結果を共有する
+_pdf_flight = SingleFlight()
+
+
+class MenuPdfError(Exception):
+    """PDFの生成に失敗した場合の例外（生成元のHTMLを保持する）"""
+
+    def __init__(self, html: str):
+        super().__init__('PDFの生成に失敗しました')
+        self.html = html
+
+
+class MenuPdfTranslationError(Exception):
+    """
+    翻訳に失敗したテキストがあるため、メニューPDFをキャッシュしなかった場合の例外
+
+    翻訳できなかったテキストを元のテキストで補ったコンテキストを保持する
+    """
+
+    def __init__(self, context: Dict[str, Any]):
+        super().__init__('メニューの翻訳に失敗しました')
+        self.context = context
+
+
+def get_menu_pdf_settings() -> Dict[str, Any]:
+    """
+    PDFキャッシュの設定を取得する関数
+
+    Returns:
+        settings.MENU_PDF_CACHE にデフォルト値を補った辞書
+    """
+    config = getattr(settings, 'MENU_PDF_CACHE', {})
+    return {
+        'DIR': config.get('DIR', os.path.join(settings.MEDIA_ROOT, 'menu_pdfs')),
+        'REGENERATE_DELAY': config.get('REGENERATE_DELAY', 10),
+        'SENDFILE_HEADER': config.get('SENDFILE_HEADER'),
+        'SENDFILE_URL': config.get('SENDFILE_URL'),
+    }
+
+
+def build_menu_pdf_context(target_language: str, cached_only: bool = False) -> Dict[str, Any]:
+    """
+    メニューPDFのテンプレートに渡すコンテキストを作成する関数
+
+    カテゴリ数・メニュー項目数によらずクエリ数は一定で、未翻訳のテキストはまとめて翻訳する。
+    翻訳に失敗したテキストは元のテキストのまま載せ、その (オブジェクトID, フィールド名) を
+    コンテキストの untranslated に入れる
+
+    Args:
+        target_language: 言語コード
+        cached_only: Trueの場合は翻訳せず、翻訳キャッシュにある翻訳だけを使う（キャッシュにないものは untranslated に入れる）
+
+    Returns:
+        テンプレートのコンテキスト
+    """
+    # カテゴリごとに整理するために、カテゴリと提供可能なメニュー項目をまとめて取得
+    categories = MenuCategory.objects.prefetch_related(
+        Prefetch(
+            'menu_items',
+            queryset=MenuItemCategory.objects.filter(
+                menu_item__is_available=True
+            ).select_related('menu_item').order_by('menu_item__name'),
+            to_attr='available_links',
+        )
+    ).order_by('display_order')
+
+    # カテゴリごとのメニュー項目をメモリ上でまとめる
+    category_items = [
+        (category, [link.menu_item for link in category.available_links])
+        for category in categories
+    ]
+
+    # 名前と説明をまとめて翻訳
+    # 日本語の場合は翻訳しない（元のテキストを使用）
+    translations = {}
+    untranslated = set()
+    if target_language != 'ja_XX':
+        all_items = {item.id: item for category, items in category_items for item in items}
+        if cached_only:
+            texts = {
+                (item.id, field_name): getattr(item, field_name)
+                for item in all_items.values()
+                for field_name in ('name', 'description')
+                if getattr(item, field_name)
+            }
+            translations = get_translation_caches(texts, target_language)
+            untranslated = set(texts) - set(translations)
+        else:
+            try:
+                translations = translate_items_with_cache(
+                    list(all_items.values()), ['name', 'description'], target_language
+                )
+            except TranslationFailed as e:
+                translations = e.translations
+                untranslated = e.failed_keys
+
+    # カテゴリごとにメニュー項目をまとめる構造を作る
+    menu_data = []
+    for category, items in category_items:
+        translated_items = []
+        for item in items:
+            # 翻訳されたデータを持つ辞書を作成
+            translated_items.append({
+                'original': item,
+                'name': translations.get((item.id, 'name'), item.name),
+                'description': translations.get((item.id, 'description'), item.description),
+                'price': item.price,
+                # PDFには印刷用に縮小した派生画像を埋め込む
+                'image_path': item.get_print_image_path(),
+                'allergens': [ALLERGEN_MAP.get(a, a) for a in item.allergens],
+                'is_vegan': item.is_vegan,
+                'contains_pork': item.contains_pork,
+            })
+
+        if translated_items:
+            # 2列レイアウト用にアイテムをペアにする
+            item_rows = [translated_items[i:i+2] for i in range(0, len(translated_items), 2)]
+            menu_data.append({
+                'category': category,
+                'item_rows': item_rows
+            })
+
+    return {
+        'menu_data': menu_data,
+        'target_language': target_language,
+        'untranslated': untranslated,
+    }
+
+
+def open_pdf_spool():
+    """
+    描画したPDFの書き込み先となる一時ファイルを作成する関数
+
+    settings.PDF_RENDER_MAX_MEMORY バイトまではメモリに置き、超えた分はディスクに書き出す。
+    0の場合は最初からディスクに書き込み、Noneの場合はすべてメモリに置く
+
+    Returns:
+        一時ファイル
+    """
+    max_memory = getattr(settings, 'PDF_RENDER_MAX_MEMORY', 5 * 1024 * 1024)
+    if max_memory == 0:
+        return tempfile.TemporaryFile()
+    # max_size が0の場合はディスクに書き出さない
+    return tempfile.SpooledTemporaryFile(max_size=max_memory or 0)
+
+
+def render_pdf(template_src: str, context: Dict[str, Any], dest) -> Optional[str]:
+    """
+    HTMLテンプレートをPDFに変換してファイルオブジェクトに書き込む関数
+
+    HTMLはバイト列に変換せず、文字列のまま pisa に渡す
+
+    Args:
+        template_src: テンプレートのパス
+        context: テンプレートのコンテキスト
+        dest: 書き込み先のファイルオブジェクト
+
+    Returns:
+        変換に失敗した場合は元のHTML、成功した場合はNone
+    """
+    # xhtml2pdf は読み込みに時間がかかるため、最初の描画時に読み込む
+    from xhtml2pdf import pisa
+
+    with span('template_render'):
+        html = get_template(template_src).render(context)
+
+    # 日本語フォント対応のための設定が必要だが、まずはデフォルトで試す
+    with span('pdf_render'):
+        pisa_status = pisa.CreatePDF(html, dest=dest)
+    if pisa_status.err:
+        return html
+    return None
+
+
+def render_menu_pdf(context: Dict[str, Any], dest) -> None:
+    """
+    メニューPDFを描画してファイルオブジェクトに書き込む関数
+
+    Args:
+        context: build_menu_pdf_context で作成したコンテキスト
+        dest: 書き込み先のファイルオブジェクト
+    """
+    html = render_pdf(MENU_PDF_TEMPLATE, context, dest)
+    if html is not None:
+        raise MenuPdfError(html)
+
+
+def _menu_pdf_prefix(target_language: str) -> str:
+    return f'menu_{target_language}_'
+
+
+def get_menu_pdf_path(version: str) -> str:
+    """
+    メニューの内容のバージョンに対応するPDFのパスを取得する関数
+
+    Args:
+        version: get_menu_content_version で取得したバージョン文字列（例: 'en_XX:3-5'）
+
+    Returns:
+        PDFファイルのパス
+    """
+    target_language, _, number = version.partition(':')
+    return os.path.join(get_menu_pdf_settings()['DIR'], f'{_menu_pdf_prefix(target_language)}{number}.pdf')
+
+
+def _remove_old_menu_pdfs(target_language: str, keep: str) -> None:
+    """指定した言語の、keep 以外の古いバージョンのPDFを削除する"""
+    directory = os.path.dirname(keep)
+    prefix = _menu_pdf_prefix(target_language)
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        if filename.startswith(prefix) and filename.endswith('.pdf') and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                # 削除済み、または送信中で削除できない場合は次回に削除する
+                pass
+
+
+def open_uncached_menu_pdf(context: Dict[str, Any]):
+    """
+    キャッシュに保存しないメニューPDFを一時ファイルに描画する関数（翻訳に失敗したテキストがある場合に使う）
+
+    Args:
+        context: build_menu_pdf_context で作成したコンテキスト
+
+    Returns:
+        先頭に戻したPDFの一時ファイル
+    """
+    pdf = open_pdf_spool()
+    try:
+        render_menu_pdf(context, pdf)
+    except BaseException:
+        pdf.close()
+        raise
+    pdf.seek(0)
+    return pdf
+
+
+def _build_menu_pdf(target_language: str, cached_only: bool = False) -> str:
+    """
+    メニューPDFを生成してキャッシュに保存し、そのパスを返す
+
+    翻訳に失敗したテキストがある場合は、次のリクエストで翻訳し直せるようキャッシュに保存せず、
+    MenuPdfTranslationError を送出する
+    """
+    # 翻訳を行うとその言語の翻訳のバージョンが上がるため、翻訳後にバージョンを読み直す
+    # データはバージョンを読んだ後に取得するため、ファイルの内容がバージョンより古くなることはない
+    for _ in range(2):
+        version, _ = get_menu_content_version(target_language)
+        path = get_menu_pdf_path(version)
+        if os.path.exists(path):
+            return path
+        context = build_menu_pdf_context(target_language, cached_only)
+        if get_menu_content_version(target_language)[0] == version:
+            break
+
+    if context['untranslated']:
+        raise MenuPdfTranslationError(context)
+
+    # 途中で読まれないよう、キャッシュのディレクトリの一時ファイルに直接描画してから置き換える
+    # （描画に失敗した場合は一時ファイルを削除する）
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            render_menu_pdf(context, f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    _remove_old_menu_pdfs(target_language, path)
+    return path
+
+
+def get_menu_pdf(target_language: str, cached_only: bool = False) -> str:
+    """
+    メニューPDFのパスを取得する関数
+
+    メニューと翻訳が変更されていなければキャッシュされたPDFをそのまま返し、
+    変更されていれば生成し直す
+
+    Args:
+        target_language: 言語コード
+        cached_only: Trueの場合は翻訳モデルを使わず、翻訳キャッシュにある翻訳だけで生成する
+
+    Returns:
+        PDFファイルのパス
+
+    Raises:
+        MenuPdfTranslationError: 翻訳に失敗したテキストがあり、PDFをキャッシュしなかった場合
+        MenuPdfError: PDFの描画に失敗した場合
+    """
+    version, _ = get_menu_content_version(target_language)
+    path = get_menu_pdf_path(version)
+    if os.path.exists(path):
+        PDF_CACHE_LOOKUPS.inc(result='hit')
+        return path
+    PDF_CACHE_LOOKUPS.inc(result='miss')
+    return _pdf_flight.do(
+        (target_language, cached_only), lambda: _build_menu_pdf(target_language, cached_only)
+    )
+
+
+def get_cached_menu_pdf_languages() -> List[str]:
+    """
+    PDFがキャッシュされている言語のリストを取得する関数
+
+    Returns:
+        言語コードのリスト
+    """
+    directory = get_menu_pdf_settings()['DIR']
+    if not os.path.isdir(directory):
+        return []
+    languages = set()
+    for filename in os.listdir(directory):
+        if filename.startswith('menu_') and filename.endswith('.pdf'):
+            # menu_{言語コード}_{バージョン}.pdf
+            languages.add(filename[len('menu_'):].rpartition('_')[0])
+    return sorted(languages)
+
+
+def menu_pdf_response(path: str, target_language: str) -> HttpResponse:
+    """
+    キャッシュされたPDFを返すレスポンスを作成する関数
+
+    MENU_PDF_CACHE の SENDFILE_HEADER が設定されている場合は、ファイルの送信を
+    Webサーバー（X-Sendfile / X-Accel-Redirect）に任せる
+
+    Args:
+        path: PDFファイルのパス
+        target_language: 言語コード
+
+    Returns:
+        PDFのレスポンス
+    """
+    config = get_menu_pdf_settings()
+    filename = f'menu_{target_language}.pdf'
+    if config['SENDFILE_HEADER']:
+        response = HttpResponse(content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if config['SENDFILE_URL']:
+            # X-Accel-Redirect の場合は内部URLを渡す
+            response[config['SENDFILE_HEADER']] = config['SENDFILE_URL'].rstrip('/') + '/' + os.path.basename(path)
+        else:
+            response[config['SENDFILE_HEADER']] = os.path.abspath(path)
+        return response
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type='application/pdf')
+
+
+class MenuPdfRegenerator:
+    """
+    メニューの変更後に、キャッシュされているPDFをバックグラウンドで生成し直すクラス
+
+    変更が続けて行われた場合は、最後の変更から delay 秒後に一度だけ生成する
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._languages: Set[str] = set()
+        self._timer: Optional[threading.Timer] = None
+
+    def schedule(self, languages: List[str], delay: float) -> None:
+        """
+        指定した言語のPDFの生成を予約する
+
+        Args:
+            languages: 言語コードのリスト
+            delay: 生成を始めるまでの秒数
+        """
+        if not languages:
+            return
+        with self._lock:
+            self._languages.update(languages)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self) -> None:
+        with self._lock:
+            languages = sorted(self._languages)
+            self._languages.clear()
+            self._timer = None
+
+        try:
+            for target_language in languages:
+                try:
+                    path = get_menu_pdf(target_language)
+                    logger.info("メニューPDFを生成しました: %s", path)
+                except Exception:
+                    logger.exception("メニューPDFの生成に失敗しました: lang=%s", target_language)
+        finally:
+            # このスレッドで開いたデータベース接続を閉じる
+            connections.close_all()
+
+
+_pdf_regenerator = MenuPdfRegenerator()
+
+
+def schedule_menu_pdf_regeneration(target_language: Optional[str] = None) -> None:
+    """
+    キャッシュされているメニューPDFのバックグラウンドでの再生成を予約する関数
+
+    キャッシュされていない言語のPDFは生成しない。MENU_PDF_CACHE の REGENERATE_DELAY が
+    None の場合は何もしない（次のリクエスト時に生成される）。
+
+    Args:
+        target_language: 言語コード（Noneの場合はキャッシュされているすべての言語）
+    """
+    delay = get_menu_pdf_settings()['REGENERATE_DELAY']
+    if delay is None:
+        return
+    languages = get_cached_menu_pdf_languages()
+    if target_language is not None:
+        languages = [code for code in languages if code == target_language]
+    _pdf_regenerator.schedule(languages, delay)
+
+
+def get_pdf_export_workers(count: int) -> int:
+    """
+    PDFを並列に生成するワーカープロセスの数を取得する関数
+
+    settings.PDF_EXPORT_MAX_WORKERS が None の場合は、このプロセスが利用できるCPUコア数を上限にする
+
+    Args:
+        count: 生成するPDFの数
+
+    Returns:
+        ワーカープロセスの数
+    """
+    max_workers = getattr(settings, 'PDF_EXPORT_MAX_WORKERS', None)
+    if not max_workers:
+        if hasattr(os, 'sched_getaffinity'):
+            max_workers = len(os.sched_getaffinity(0))
+        else:
+            max_workers = os.cpu_count() or 1
+    return max(1, min(max_workers, count))
+
+
+def _translate_menu_for_pdfs(languages: List[str]) -> Dict[str, float]:
+    """
+    PDFに載せるメニュー項目を言語ごとにまとめて翻訳し、言語ごとの翻訳にかかった秒数を返す
+
+    Raises:
+        TranslationFailed: 翻訳に失敗した場合
+    """
+    items = list(
+        MenuItem.objects.filter(is_available=True, categories__isnull=False).distinct()
+    )
+    seconds = {}
+    for target_language in languages:
+        if target_language == 'ja_XX':
+            continue
+        started = time.perf_counter()
+        translate_items_with_cache(items, ['name', 'description'], target_language)
+        seconds[target_language] = time.perf_counter() - started
+    return seconds
+
+
+def export_menu_pdfs(languages: List[str]) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    複数の言語のメニューPDFをまとめて生成する関数
+
+    翻訳はこのプロセスで言語ごとにまとめて行い（翻訳キャッシュを通してワーカーと共有される）、
+    キャッシュされていない言語のPDFだけをプロセスプールで並列に描画する。
+    ワーカーは翻訳モデルを読み込まず、翻訳キャッシュにある翻訳だけで描画する
+
+    Args:
+        languages: 言語コードのリスト
+
+    Returns:
+        言語コードとPDFファイルのパスの辞書と、言語ごとの処理時間の辞書のタプル
+
+    Raises:
+        TranslationFailed: 翻訳に失敗した場合（PDFは生成しない）
+    """
+    started = time.perf_counter()
+    paths = {}
+    timings: Dict[str, Any] = {'languages': {}}
+
+    # キャッシュされているPDFはそのまま使う
+    pending = []
+    for target_language in languages:
+        path = get_menu_pdf_path(get_menu_content_version(target_language)[0])
+        if os.path.exists(path):
+            paths[target_language] = path
+            timings['languages'][target_language] = {'cached': True}
+        else:
+            pending.append(target_language)
+
+    # ワーカーでモデルを読み込まないよう、先に翻訳しておく
+    translate_seconds = _translate_menu_for_pdfs(pending)
+
+    workers = get_pdf_export_workers(len(pending))
+    if workers == 1:
+        results = [build_menu_pdf_in_worker(target_language) for target_language in pending]
+    else:
+        # 子プロセスにデータベース接続を引き継がないよう、先に閉じておく
+        connections.close_all()
+        # 翻訳モデルやOpenVINOのスレッドを持つプロセスを fork しないよう、spawn で起動する
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_pdf_worker
+        ) as executor:
+            results = list(executor.map(build_menu_pdf_in_worker, pending))
+
+    for target_language, path, render_seconds, error in results:
+        timing = {
+            'cached': False,
+            'translate_seconds': round(translate_seconds.get(target_language, 0.0), 3),
+            'render_seconds': round(render_seconds, 3),
+        }
+        if error is None:
+            paths[target_language] = path
+        else:
+            timing['error'] = error
+            logger.error("メニューPDFの生成に失敗しました: lang=%s, error=%s", target_language, error)
+        timings['languages'][target_language] = timing
+
+    timings['workers'] = workers
+    timings['total_seconds'] = round(time.perf_counter() - started, 3)
+    return paths, timings
+
+
+class _ZipStream:
+    """ZipFile の書き込み先として、書き込まれたデータを順に取り出せるようにするバッファ"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_menu_pdf_zip(files: Dict[str, Any], timings: Dict[str, Any], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    メニューPDFをまとめたZIPファイルを少しずつ生成するジェネレータ
+
+    PDFは圧縮済みのため、ZIPには無圧縮で格納する。処理時間は timings.json として格納する
+
+    Args:
+        files: 言語コードと開いたPDFファイルの辞書（読み終えたファイルは閉じる）
+        timings: export_menu_pdfs で取得した処理時間
+        chunk_size: 一度に読み込むバイト数
+
+    Yields:
+        ZIPファイルのデータ
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as archive:
+        for target_language, src in files.items():
+            with src, archive.open(f'menu_{target_language}.pdf', 'w') as dest:
+                for chunk in iter(lambda: src.read(chunk_size), b''):
+                    dest.write(chunk)
+                    yield stream.pop()
+            yield stream.pop()
+        archive.writestr('timings.json', json.dumps(timings, ensure_ascii=False, indent=2))
+    yield stream.pop()
+
+
+def open_menu_pdfs(paths: Dict[str, str]) -> Dict[str, Any]:
+    """
+    生成したメニューPDFを開く関数
+
+    開いた後に再生成で古いPDFが削除されても、開いたファイルは最後まで読める。
+    開く前に削除された場合は生成し直す
+
+    Args:
+        paths: 言語コードとPDFファイルのパスの辞書
+
+    Returns:
+        言語コードと開いたPDFファイルの辞書
+    """
+    files = {}
+    for target_language, path in paths.items():
+        try:
+            files[target_language] = open(path, 'rb')
+        except FileNotFoundError:
+            files[target_language] = open(get_menu_pdf(target_language), 'rb')
+    return files
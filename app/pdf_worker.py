@@ -0,0 +1,41 @@
+"""
+メニューPDFを並列に生成するプロセスプールのワーカーで実行する関数
+
+ワーカーを spawn で起動した場合は Django の初期化前にこのモジュールが読み込まれるため、
+モデルなどは関数の中で読み込む
+"""
+import os
+import time
+
+
+def init_pdf_worker() -> None:
+    """ワーカープロセスの初期化（Djangoが初期化されていなければ初期化する）"""
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'itadaku.settings')
+        django.setup()
+
+
+def build_menu_pdf_in_worker(target_language: str):
+    """
+    ワーカープロセスで指定した言語のメニューPDFを生成する
+
+    翻訳は呼び出し元のプロセスで済ませておき、ワーカーでは翻訳モデルを読み込まずに翻訳キャッシュの翻訳だけを使う。
+    翻訳キャッシュにない翻訳がある場合は失敗する
+
+    Args:
+        target_language: 言語コード
+
+    Returns:
+        言語コード、PDFファイルのパス（失敗した場合はNone）、生成にかかった秒数、
+        エラーメッセージ（成功した場合はNone）のタプル
+    """
+    from .pdf import get_menu_pdf
+
+    started = time.perf_counter()
+    try:
+        path = get_menu_pdf(target_language, cached_only=True)
+    except Exception as e:
+        return target_language, None, time.perf_counter() - started, str(e)
+    return target_language, path, time.perf_counter() - started, None
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import utils
+from .images import refresh_image_variants
+from .pdf import schedule_menu_pdf_regeneration
+from .models import MenuItem, MenuCategory, MenuItemCategory, TranslationCache
+from .utils import (
+    TRANSLATABLE_FIELDS, enqueue_translation_job, get_stale_translation_languages,
+    get_local_translation_cache, bump_content_version,
+)
+
+
+@receiver(post_save, sender=MenuItem)
+def update_image_variants(sender, instance, **kwargs):
+    """
+    メニュー項目の画像が変更された場合に、派生画像を作成し直す
+    
+    メニューのバージョンを上げる前に実行されるよう、bump_menu_version より先に登録する
+    """
+    refresh_image_variants(instance)
+
+
+@receiver(post_save, sender=MenuItem)
+def retranslate_changed_fields(sender, instance, created, **kwargs):
+    """
+    メニュー項目の保存時に、変更されたフィールドの翻訳ジョブを追加する
+    
+    翻訳キャッシュの元のテキストのハッシュ値が現在のテキストと異なる言語だけを
+    再翻訳する。翻訳ワーカーを利用しない場合は、次の翻訳リクエストで再翻訳される。
+    """
+    if created or not getattr(settings, 'TRANSLATION_WORKER_ENABLED', False):
+        return
+    
+    for field_name in TRANSLATABLE_FIELDS:
+        text = getattr(instance, field_name)
+        if not text:
+            continue
+        for target_language in get_stale_translation_languages('menu_item', instance.id, field_name, text):
+            enqueue_translation_job(text, 'menu_item', instance.id, field_name, target_language)
+
+
+@receiver(post_save, sender=TranslationCache)
+@receiver(post_delete, sender=TranslationCache)
+def invalidate_local_translation_cache(sender, instance, **kwargs):
+    """翻訳キャッシュの保存・削除時に、プロセス内のキャッシュから該当エントリを削除する"""
+    get_local_translation_cache().delete(
+        (instance.content_type, instance.object_id, instance.field_name, instance.target_language)
+    )
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=MenuCategory)
+@receiver(post_delete, sender=MenuCategory)
+@receiver(post_save, sender=MenuItemCategory)
+@receiver(post_delete, sender=MenuItemCategory)
+def bump_menu_version(sender, **kwargs):
+    """メニュー項目・カテゴリの変更時に、メニューのバージョンを上げ、キャッシュされたPDFを生成し直す"""
+    bump_content_version('menu')
+    transaction.on_commit(schedule_menu_pdf_regeneration)
+
+
+@receiver(post_save, sender=TranslationCache)
+@receiver(post_delete, sender=TranslationCache)
+def bump_translation_version(sender, instance, **kwargs):
+    """翻訳キャッシュの変更時に、その言語の翻訳のバージョンを上げ、キャッシュされたPDFを生成し直す"""
+    bump_content_version(f'translation:{instance.target_language}')
+    transaction.on_commit(lambda: schedule_menu_pdf_regeneration(instance.target_language))
+
+
+@receiver(setting_changed)
+def reset_local_translation_cache(sender, setting, **kwargs):
+    """TRANSLATION_LOCAL_CACHE の設定が変更された場合、プロセス内のキャッシュを作り直す"""
+    if setting == 'TRANSLATION_LOCAL_CACHE':
+        utils._local_translation_cache = None
@@ -1,3 +1,762 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+import torch
+from PIL import Image
+from xhtml2pdf import pisa
+
+from translate_ja_to_mm import translate_batch, translate_to_languages
+
+from .inference import InferenceBusy, InferenceExecutor, start_model_warmup_if_enabled
+from .metrics import clear_metrics
+from .middleware import get_slow_request_log
+from .models import MenuItem, MenuCategory, MenuItemCategory, TranslationCache, TranslationJob
+from .pdf import MenuPdfError, get_menu_pdf, open_pdf_spool
+from .pdf_worker import build_menu_pdf_in_worker
+from .utils import (
+    LocalTranslationCache, SingleFlight, claim_translation_jobs, delete_finished_translation_jobs, enqueue_translation_job,
+    get_local_translation_cache, get_stale_translation_languages, get_translation_cache, get_translation_caches,
+    process_translation_jobs, requeue_stale_translation_jobs, save_translation_cache, translate_text_with_cache,
+)
+from .views import render_to_pdf
+
+
+def fake_translate_batch(texts, target_lang, batch_size=16):
+    """翻訳モデルの代わりに使う翻訳関数"""
+    return [f'[{target_lang}] {text}' for text in texts]
+
+
+class StubTokenizer:
+    """翻訳モデルのテストで使うトークナイザー（1文字を1トークンとし、言語コードは 1000 以上のIDにする）"""
+
+    def __init__(self, languages):
+        self.lang_code_to_id = {lang: 1000 + index for index, lang in enumerate(languages)}
+        self.id_to_lang = {token_id: lang for lang, token_id in self.lang_code_to_id.items()}
+        self.encoded_texts = []
+        self.padded_batches = []
+
+    def __call__(self, texts, return_tensors=None):
+        if return_tensors == 'pt':
+            # translate_to_languages は1つのテキストをテンソルにしてトークン化する
+            self.encoded_texts.append([texts])
+            input_ids = torch.tensor([[ord(char) for char in texts]])
+            return {'input_ids': input_ids, 'attention_mask': torch.ones_like(input_ids)}
+        self.encoded_texts.append(list(texts))
+        input_ids = [[ord(char) for char in text] for text in texts]
+        return {'input_ids': input_ids, 'attention_mask': [[1] * len(ids) for ids in input_ids]}
+
+    def pad(self, encoded, return_tensors=None):
+        self.padded_batches.append(encoded['input_ids'])
+        width = max(len(ids) for ids in encoded['input_ids'])
+        return {
+            'input_ids': [ids + [0] * (width - len(ids)) for ids in encoded['input_ids']],
+            'attention_mask': [mask + [0] * (width - len(mask)) for mask in encoded['attention_mask']],
+        }
+
+    def batch_decode(self, generated_tokens, skip_special_tokens=False):
+        # 先頭の言語コードと、パディング（0）を除いて元のテキストに戻す
+        return [
+            f'[{self.id_to_lang[ids[0]]}] ' + ''.join(chr(token_id) for token_id in ids[1:] if token_id)
+            for ids in generated_tokens
+        ]
+
+
+class StubBatchModel:
+    """translate_batch のテストで使うモデル（入力の先頭に forced_bos_token_id を付けて返す）"""
+
+    def __init__(self):
+        self.generate_calls = []
+
+    def generate(self, input_ids, attention_mask, forced_bos_token_id, max_new_tokens):
+        self.generate_calls.append(input_ids)
+        return [[forced_bos_token_id] + ids for ids in input_ids]
+
+
+class StubFanOutModel:
+    """translate_to_languages のテストで使うモデル（各行の言語コードの後にエンコードした入力を付けて返す）"""
+
+    def __init__(self, decoder_start_token_id=2):
+        self.config = mock.Mock(decoder_start_token_id=decoder_start_token_id)
+        self.encoder = mock.Mock(side_effect=self.encode)
+        self.encoded_input_ids = None
+        self.generate_calls = []
+
+    def encode(self, input_ids, attention_mask):
+        self.encoded_input_ids = input_ids[0].tolist()
+        return mock.Mock(last_hidden_state=torch.zeros(1, input_ids.shape[1], 4))
+
+    def get_encoder(self):
+        return self.encoder
+
+    def generate(self, encoder_outputs, attention_mask, decoder_input_ids, max_new_tokens):
+        self.generate_calls.append({
+            'hidden_rows': encoder_outputs.last_hidden_state.shape[0],
+            'mask_rows': attention_mask.shape[0],
+            'decoder_input_ids': decoder_input_ids.tolist(),
+        })
+        return [[lang_code] + self.encoded_input_ids for _, lang_code in decoder_input_ids.tolist()]
+
+
+class TranslationModelTests(TestCase):
+    """翻訳モデルを呼び出す関数のテスト（モデルとトークナイザーは置き換える）"""
+
+    def use_model(self, model, tokenizer):
+        patcher = mock.patch('translate_ja_to_mm.get_model_and_tokenizer', return_value=(model, tokenizer))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_translate_batch_buckets_by_length_and_keeps_input_order(self):
+        model, tokenizer = StubBatchModel(), StubTokenizer(['en_XX'])
+        self.use_model(model, tokenizer)
+        texts = ['鶏もも肉の唐揚げ定食', '枝豆', '唐揚げ', '枝豆', 'ポテトフライ']
+
+        translations = translate_batch(texts, 'en_XX', batch_size=2)
+
+        self.assertEqual(translations, [f'[en_XX] {text}' for text in texts])
+        # 重複したテキストは一度だけトークン化・生成する
+        self.assertEqual(tokenizer.encoded_texts, [['鶏もも肉の唐揚げ定食', '枝豆', '唐揚げ', 'ポテトフライ']])
+        self.assertEqual(sum(len(input_ids) for input_ids in model.generate_calls), 4)
+        # トークン長の短い順に batch_size ずつまとめる
+        self.assertEqual(
+            [[len(ids) for ids in batch] for batch in tokenizer.padded_batches], [[2, 3], [6, 10]]
+        )
+
+    def test_translate_to_languages_encodes_once_for_all_languages(self):
+        model, tokenizer = StubFanOutModel(), StubTokenizer(['en_XX', 'fr_XX', 'de_DE'])
+        self.use_model(model, tokenizer)
+
+        translations = translate_to_languages('唐揚げ', ['en_XX', 'fr_XX', 'en_XX', 'de_DE'])
+
+        self.assertEqual(translations, {lang: f'[{lang}] 唐揚げ' for lang in ['en_XX', 'fr_XX', 'de_DE']})
+        # エンコードは一度だけ行い、その出力を重複を除いた言語の数だけ複製してまとめて生成する
+        model.encoder.assert_called_once()
+        self.assertEqual(len(model.generate_calls), 1)
+        call = model.generate_calls[0]
+        self.assertEqual((call['hidden_rows'], call['mask_rows']), (3, 3))
+        # 各行のデコーダーの入力は [開始トークン, 翻訳先の言語コード]
+        self.assertEqual(
+            call['decoder_input_ids'],
+            [[2, tokenizer.lang_code_to_id[lang]] for lang in ['en_XX', 'fr_XX', 'de_DE']],
+        )
+
+    def test_translate_to_languages_splits_languages_by_batch_size(self):
+        model, tokenizer = StubFanOutModel(), StubTokenizer(['en_XX', 'fr_XX', 'de_DE'])
+        self.use_model(model, tokenizer)
+
+        translations = translate_to_languages('枝豆', ['en_XX', 'fr_XX', 'de_DE'], batch_size=2)
+
+        self.assertEqual(list(translations), ['en_XX', 'fr_XX', 'de_DE'])
+        model.encoder.assert_called_once()
+        self.assertEqual([call['hidden_rows'] for call in model.generate_calls], [2, 1])
+
+    def test_translate_batch_rejects_unsupported_language(self):
+        with self.assertRaises(ValueError):
+            translate_batch(['唐揚げ'], 'xx_XX')
+
+
+class MenuTestCase(TestCase):
+    """メニュー項目を作成し、生成したPDFを一時ディレクトリに保存するテストの基底クラス"""
+
+    def setUp(self):
+        cache.clear()
+        # 生成したPDFは一時ディレクトリに保存する
+        pdf_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(pdf_dir.cleanup)
+        self.pdf_dir = pdf_dir.name
+        pdf_settings = override_settings(MENU_PDF_CACHE={'DIR': self.pdf_dir, 'REGENERATE_DELAY': None})
+        pdf_settings.enable()
+        self.addCleanup(pdf_settings.disable)
+        get_local_translation_cache().clear()
+        self.categories = [
+            MenuCategory.objects.create(name=f'カテゴリ{i}', display_order=i)
+            for i in range(3)
+        ]
+        self.item_count = 0
+
+    def create_items(self, count):
+        """2つのカテゴリに属するメニュー項目を作成"""
+        for _ in range(count):
+            self.item_count += 1
+            item = MenuItem.objects.create(
+                name=f'商品{self.item_count}',
+                price=100 * self.item_count,
+                description=f'商品{self.item_count}の説明です。',
+                allergens=['egg'],
+            )
+            for category in self.categories[:2]:
+                MenuItemCategory.objects.create(menu_item=item, category=category)
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as context:
+            response = func()
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+
+class QueryCountTests(MenuTestCase):
+    """メニュー項目の件数によってクエリ数が増えないことを確認するテスト"""
+
+    def test_menu_list_query_count_is_constant(self):
+        url = reverse('app:menu_list')
+        self.create_items(2)
+        small_menu_queries = self.count_queries(lambda: self.client.get(url))
+        self.create_items(20)
+        large_menu_queries = self.count_queries(lambda: self.client.get(url))
+        self.assertEqual(small_menu_queries, large_menu_queries)
+
+    def test_menu_list_category_filter_has_no_duplicates(self):
+        self.create_items(3)
+        response = self.client.get(reverse('app:menu_list'), {'category': self.categories[0].id})
+        ids = [item.id for item in response.context['menu_items']]
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_pdf_export_query_count_is_constant(self):
+        url = reverse('app:pdf_export')
+        self.create_items(2)
+        small_menu_queries = self.count_queries(lambda: self.client.post(url, {'lang': 'ja_XX'}))
+        self.create_items(20)
+        large_menu_queries = self.count_queries(lambda: self.client.post(url, {'lang': 'ja_XX'}))
+        self.assertEqual(small_menu_queries, large_menu_queries)
+
+    @mock.patch('app.utils.translate_batch', side_effect=fake_translate_batch)
+    def test_pdf_export_translation_query_count_is_constant(self, translate_batch):
+        url = reverse('app:pdf_export')
+        self.create_items(2)
+        cold_small_menu_queries = self.count_queries(lambda: self.client.post(url, {'lang': 'en_XX'}))
+        warm_small_menu_queries = self.count_queries(lambda: self.client.post(url, {'lang': 'en_XX'}))
+        self.create_items(20)
+        cold_large_menu_queries = self.count_queries(lambda: self.client.post(url, {'lang': 'en_XX'}))
+        warm_large_menu_queries = self.count_queries(lambda: self.client.post(url, {'lang': 'en_XX'}))
+        self.assertEqual(cold_small_menu_queries, cold_large_menu_queries)
+        self.assertEqual(warm_small_menu_queries, warm_large_menu_queries)
+        # 翻訳は未翻訳のテキストがある場合にのみ、まとめて実行される
+        self.assertEqual(translate_batch.call_count, 2)
+
+
+class MenuPdfExportTests(MenuTestCase):
+    """メニューPDFの出力・キャッシュ・描画と、複数の言語のPDFの一括出力のテスト"""
+
+    @mock.patch('app.utils.translate_batch', side_effect=fake_translate_batch)
+    def test_pdf_export_reuses_cached_pdf_until_menu_changes(self, translate_batch):
+        url = reverse('app:pdf_export')
+        self.create_items(2)
+        with mock.patch('xhtml2pdf.pisa.CreatePDF', wraps=pisa.CreatePDF) as create_pdf:
+            first = self.client.post(url, {'lang': 'en_XX'})
+            second = self.client.post(url, {'lang': 'en_XX'})
+            self.assertEqual(b''.join(first.streaming_content), b''.join(second.streaming_content))
+            self.assertEqual(create_pdf.call_count, 1)
+
+            # メニューが変更された場合は生成し直し、古いPDFは削除する
+            self.create_items(1)
+            self.client.post(url, {'lang': 'en_XX'})
+            self.assertEqual(create_pdf.call_count, 2)
+        self.assertEqual(len(os.listdir(self.pdf_dir)), 1)
+
+    def test_pdf_export_does_not_cache_untranslated_pdf(self):
+        url = reverse('app:pdf_export')
+        self.create_items(2)
+        with mock.patch('app.utils.translate_batch', side_effect=RuntimeError('model failed')):
+            response = self.client.post(url, {'lang': 'en_XX'})
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(os.listdir(self.pdf_dir), [])
+
+        # モデルが使えるようになれば翻訳し直してキャッシュする
+        with mock.patch('app.utils.translate_batch', side_effect=fake_translate_batch) as translate_batch:
+            self.client.post(url, {'lang': 'en_XX'})
+        self.assertEqual(translate_batch.call_count, 1)
+        self.assertEqual(len(os.listdir(self.pdf_dir)), 1)
+
+    @override_settings(PDF_EXPORT_MAX_WORKERS=1)
+    @mock.patch('app.utils.translate_batch', side_effect=fake_translate_batch)
+    def test_pdf_export_all_returns_zip_with_timings(self, translate_batch):
+        self.create_items(2)
+        self.client.post(reverse('app:pdf_export'), {'lang': 'ja_XX'})
+        response = self.client.post(reverse('app:pdf_export_all'), {'lang': ['ja_XX', 'en_XX', 'fr_XX']})
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            sorted(archive.namelist()),
+            ['menu_en_XX.pdf', 'menu_fr_XX.pdf', 'menu_ja_XX.pdf', 'timings.json'],
+        )
+        timings = json.loads(archive.read('timings.json'))
+        self.assertTrue(timings['languages']['ja_XX']['cached'])
+        self.assertFalse(timings['languages']['en_XX']['cached'])
+        # 翻訳は言語ごとに一度だけまとめて実行される
+        self.assertEqual(translate_batch.call_count, 2)
+
+    @override_settings(PDF_EXPORT_MAX_WORKERS=1)
+    def test_pdf_export_all_fails_without_translations(self):
+        self.create_items(2)
+        with mock.patch('app.utils.translate_batch', side_effect=RuntimeError('model failed')) as translate_batch:
+            response = self.client.post(reverse('app:pdf_export_all'), {'lang': ['en_XX']})
+            self.assertEqual(response.status_code, 503)
+            # ワーカーは翻訳モデルを使わず、翻訳キャッシュにない場合は失敗する
+            self.assertEqual(build_menu_pdf_in_worker('en_XX')[3], 'メニューの翻訳に失敗しました')
+        self.assertEqual(translate_batch.call_count, 1)
+        self.assertEqual(os.listdir(self.pdf_dir), [])
+
+    @override_settings(PDF_RENDER_MAX_MEMORY=1)
+    def test_render_to_pdf_streams_from_temporary_file(self):
+        response = render_to_pdf('app/menu_pdf.html', {'menu_data': [], 'target_language': 'ja_XX'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertEqual(int(response['Content-Length']), len(content))
+
+    @override_settings(PDF_RENDER_MAX_MEMORY=1)
+    def test_cached_menu_pdf_is_rendered_into_cache_directory(self):
+        self.create_items(1)
+        with mock.patch('app.pdf.open_pdf_spool', wraps=open_pdf_spool) as spool:
+            response = self.client.post(reverse('app:pdf_export'), {'lang': 'ja_XX'})
+        spool.assert_not_called()
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(len(os.listdir(self.pdf_dir)), 1)
+
+    def test_failed_menu_pdf_render_leaves_no_temporary_file(self):
+        self.create_items(1)
+        with mock.patch('app.pdf.render_pdf', return_value='<html></html>'):
+            with self.assertRaises(MenuPdfError):
+                get_menu_pdf('ja_XX')
+        self.assertEqual(os.listdir(self.pdf_dir), [])
+
+
+class MenuListCacheTests(TestCase):
+    """メニュー一覧ページのETag・キャッシュのテスト"""
+
+    def setUp(self):
+        cache.clear()
+        get_local_translation_cache().clear()
+        self.item = MenuItem.objects.create(name='唐揚げ', price=500, description='')
+        self.url = reverse('app:menu_list') + '?lang=en_XX'
+
+    def test_matching_etag_returns_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        # CSRFトークンはページではなくクッキーから読む
+        self.assertIn('csrftoken', response.cookies)
+
+        response = self.client.get(self.url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_saving_translation_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        save_translation_cache('menu_item', self.item.id, 'name', '唐揚げ', 'en_XX', 'Fried chicken')
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Fried chicken')
+
+
+class ImageVariantTests(TestCase):
+    """メニュー項目の画像の派生画像のテスト"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def upload_image(self, width, height):
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, height), 'red').save(buffer, 'JPEG')
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_variants_are_created_on_save(self):
+        item = MenuItem.objects.create(name='商品', price=100, image=self.upload_image(2400, 1800))
+        item.refresh_from_db()
+        self.assertEqual(sorted(item.image_variants['jpeg'], key=int), ['320', '640', '960'])
+        self.assertEqual(sorted(item.image_variants['webp'], key=int), ['320', '640', '960'])
+        with Image.open(item.get_print_image_path()) as printable:
+            self.assertEqual(printable.size, (1200, 900))
+
+        response = self.client.get(reverse('app:menu_list'))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, item.get_image_srcset())
+
+    def test_variants_are_replaced_when_image_changes(self):
+        item = MenuItem.objects.create(name='商品', price=100, image=self.upload_image(800, 600))
+        old_print_path = item.get_print_image_path()
+        # 元の画像より大きい幅の派生画像は作成しない
+        self.assertEqual(sorted(item.image_variants['jpeg'], key=int), ['320', '640', '800'])
+
+        item.image = self.upload_image(400, 300)
+        item.save()
+        self.assertFalse(os.path.exists(old_print_path))
+        self.assertEqual(item.image_variants['source'], item.image.name)
+
+
+class ReadinessCheckTests(TestCase):
+    """準備状態確認エンドポイントのテスト"""
+
+    @override_settings(TRANSLATION_MODEL_WARMUP=True)
+    def test_not_ready_until_model_is_warmed_up(self):
+        url = reverse('app:readiness_check')
+        with mock.patch('app.views.get_model_state', return_value={'status': 'loading'}):
+            self.assertEqual(self.client.get(url).status_code, 503)
+        with mock.patch('app.views.get_model_state', return_value={'status': 'ready'}):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_warmup_starts_only_when_enabled(self):
+        with mock.patch('translate_ja_to_mm.start_model_warmup') as start_model_warmup:
+            start_model_warmup_if_enabled()
+            start_model_warmup.assert_not_called()
+            with override_settings(TRANSLATION_MODEL_WARMUP=True):
+                start_model_warmup_if_enabled()
+            start_model_warmup.assert_called_once_with()
+
+    def test_ready_without_warmup_unless_model_failed(self):
+        url = reverse('app:readiness_check')
+        with mock.patch('app.views.get_model_state', return_value={'status': 'not_loaded'}):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with mock.patch('app.views.get_model_state', return_value={'status': 'failed'}):
+            self.assertEqual(self.client.get(url).status_code, 503)
+
+
+class MetricsTests(TestCase):
+    """メトリクスのエンドポイントのテスト"""
+
+    def setUp(self):
+        clear_metrics()
+        get_local_translation_cache().clear()
+
+    @mock.patch('app.utils.translate_batch', side_effect=fake_translate_batch)
+    def test_translation_spans_and_cache_lookups_are_exposed(self, translate_batch):
+        item = MenuItem.objects.create(name='唐揚げ', price=500, description='')
+        url = reverse('app:translate_menu_items_batch')
+        payload = json.dumps({'lang': 'en_XX', 'items': [{'id': item.id, 'field': 'name'}]})
+        for _ in range(2):
+            self.client.post(url, payload, content_type='application/json')
+
+        response = self.client.get(reverse('app:metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('itadaku_span_seconds_count{span="cache_lookup"} 3', body)
+        self.assertIn('itadaku_span_seconds_count{span="db_write"} 2', body)
+        self.assertIn('itadaku_translation_cache_lookups_total{tier="db",result="hit"} 1', body)
+        self.assertIn('itadaku_translation_cache_lookups_total{tier="db",result="miss"} 1', body)
+        self.assertIn('itadaku_model_translations_total{target_language="en_XX"} 1', body)
+
+
+class AsyncTranslationTests(TestCase):
+    """非同期の翻訳APIと推論のスレッドプールのテスト"""
+
+    def setUp(self):
+        get_local_translation_cache().clear()
+        self.item = MenuItem.objects.create(name='唐揚げ', price=500, description='')
+        self.url = reverse('app:translate_menu_item', args=[self.item.id]) + '?field=name&lang=en_XX'
+
+    def test_cached_translation_does_not_use_inference_slot(self):
+        save_translation_cache('menu_item', self.item.id, 'name', '唐揚げ', 'en_XX', 'Fried chicken')
+        with mock.patch('app.views.get_inference_executor') as get_executor:
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()['translated'], 'Fried chicken')
+        get_executor.assert_not_called()
+
+    @override_settings(TRANSLATION_WORKER_ENABLED=True)
+    def test_rejects_unsupported_language_without_enqueueing_job(self):
+        url = reverse('app:translate_menu_item', args=[self.item.id]) + '?field=name&lang=xx_XX'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TranslationJob.objects.exists())
+
+    def test_returns_429_when_inference_queue_is_full(self):
+        executor = mock.Mock(run=mock.AsyncMock(side_effect=InferenceBusy(3)))
+        with mock.patch('app.views.get_inference_executor', return_value=executor):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3')
+
+    async def test_executor_rejects_beyond_concurrency_and_queue(self):
+        executor = InferenceExecutor(max_concurrency=1, max_queue=1, retry_after=5)
+        release = threading.Event()
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with self.assertRaises(InferenceBusy):
+            await executor.run(release.wait)
+        release.set()
+        self.assertEqual(await asyncio.gather(*running), [True, True])
+        self.assertEqual(executor.pending, 0)
+
+    async def test_stream_sends_cached_translations_then_busy(self):
+        await sync_to_async(save_translation_cache)('menu_item', self.item.id, 'name', '唐揚げ', 'en_XX', 'Fried chicken')
+        await MenuItem.objects.filter(pk=self.item.pk).aupdate(description='鶏もも肉の唐揚げ')
+        executor = mock.Mock(run=mock.AsyncMock(side_effect=InferenceBusy(3)))
+        url = reverse('app:translate_menu_items_stream') + f'?lang=en_XX&ids={self.item.id}'
+        with mock.patch('app.views.get_inference_executor', return_value=executor):
+            response = await self.async_client.get(url)
+            body = b''.join([chunk async for chunk in response.streaming_content]).decode('utf-8')
+        self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+        self.assertIn('event: translation\ndata: {"id": %d, "field": "name", "translated": "Fried chicken", "cached": true}' % self.item.id, body)
+        self.assertTrue(body.endswith('retry: 3000\nevent: busy\ndata: {"retry_after": 3}\n\n'))
+
+    @override_settings(TRANSLATION_WORKER_ENABLED=True)
+    async def test_stream_waits_for_worker_jobs_in_worker_mode(self):
+        async def run_worker(seconds):
+            # ジョブの状態を確認する間に、ワーカーがジョブを処理する
+            with mock.patch('app.utils.translate_batch', side_effect=fake_translate_batch):
+                await sync_to_async(process_translation_jobs)('worker-1')
+
+        url = reverse('app:translate_menu_items_stream') + f'?lang=en_XX&ids={self.item.id}'
+        with mock.patch('app.views.get_inference_executor') as get_executor, \
+                mock.patch('app.views.asyncio.sleep', side_effect=run_worker):
+            response = await self.async_client.get(url)
+            body = b''.join([chunk async for chunk in response.streaming_content]).decode('utf-8')
+        get_executor.assert_not_called()
+        self.assertIn('event: translation\ndata: {"id": %d, "field": "name", "translated": "[en_XX] 唐揚げ"}' % self.item.id, body)
+        self.assertTrue(body.endswith('event: done\ndata: {}\n\n'))
+
+    async def test_stream_limits_texts_when_ids_are_omitted(self):
+        await MenuItem.objects.acreate(name='枝豆', price=300, description='塩ゆで')
+        url = reverse('app:translate_menu_items_stream') + '?lang=en_XX'
+        with mock.patch('app.views.MAX_BATCH_TRANSLATION_PAIRS', 2):
+            response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 400)
+
+
+class RequestProfilingTests(TestCase):
+    """リクエストのプロファイリングのミドルウェアのテスト"""
+
+    def setUp(self):
+        get_slow_request_log().clear()
+        self.addCleanup(get_slow_request_log().clear)
+
+    @override_settings(REQUEST_PROFILING={'SLOW_REQUEST_THRESHOLD_MS': 0})
+    def test_server_timing_and_slow_request_log(self):
+        response = self.client.get(reverse('app:menu_list'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", model;dur=')
+
+        staff = get_user_model().objects.create_user('staff', password='password', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('slow_requests'))
+        self.assertContains(response, reverse('app:menu_list'))
+
+    def test_profile_is_only_returned_to_staff(self):
+        url = reverse('app:menu_list') + '?profile=1'
+        response = self.client.get(url)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+        staff = get_user_model().objects.create_user('staff', password='password', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertContains(response, 'function calls')
+
+
+class TranslationCacheTests(TestCase):
+    """翻訳キャッシュ・翻訳メモリのテスト"""
+
+    def setUp(self):
+        get_local_translation_cache().clear()
+
+    def test_single_flight_shares_result_of_concurrent_calls(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def translate():
+            calls.append(threading.current_thread().name)
+            started.set()
+            release.wait()
+            return 'Fried chicken'
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            leader = executor.submit(flight.do, 'key', translate)
+            started.wait()
+            followers = [executor.submit(flight.do, 'key', translate) for _ in range(2)]
+            # 後から呼び出した側が実行中の処理を待ち始めるまで待つ
+            time.sleep(0.1)
+            release.set()
+            results = [future.result() for future in [leader, *followers]]
+        self.assertEqual(results, ['Fried chicken'] * 3)
+        self.assertEqual(len(calls), 1)
+        # 完了した後の呼び出しは新しく実行する
+        self.assertEqual(flight.do('key', lambda: 'again'), 'again')
+
+    @mock.patch('app.utils.translate_batch', side_effect=fake_translate_batch)
+    def test_changed_source_text_invalidates_cached_translation(self, translate_batch):
+        item = MenuItem.objects.create(name='唐揚げ', price=500, description='')
+        self.assertEqual(translate_text_with_cache('唐揚げ', 'menu_item', item.id, 'name'), '[en_XX] 唐揚げ')
+        self.assertEqual(translate_text_with_cache('唐揚げ', 'menu_item', item.id, 'name'), '[en_XX] 唐揚げ')
+        self.assertEqual(translate_batch.call_count, 1)
+
+        # 元のテキストが変わった場合は古い翻訳を使わない
+        self.assertIsNone(get_translation_cache('menu_item', item.id, 'name', 'en_XX', '塩唐揚げ'))
+        self.assertEqual(get_stale_translation_languages('menu_item', item.id, 'name', '塩唐揚げ'), ['en_XX'])
+        self.assertEqual(translate_text_with_cache('塩唐揚げ', 'menu_item', item.id, 'name'), '[en_XX] 塩唐揚げ')
+        self.assertEqual(translate_batch.call_count, 2)
+
+    @override_settings(TRANSLATION_WORKER_ENABLED=True)
+    def test_editing_menu_item_enqueues_stale_translations(self):
+        item = MenuItem.objects.create(name='唐揚げ', price=500, description='')
+        save_translation_cache('menu_item', item.id, 'name', '唐揚げ', 'en_XX', 'Fried chicken')
+        item.price = 600
+        item.save()
+        self.assertFalse(TranslationJob.objects.exists())
+
+        item.name = '塩唐揚げ'
+        item.save()
+        job = TranslationJob.objects.get()
+        self.assertEqual((job.field_name, job.source_text, job.target_language), ('name', '塩唐揚げ', 'en_XX'))
+
+    @mock.patch('app.utils.translate_batch', side_effect=fake_translate_batch)
+    def test_translation_memory_is_shared_by_normalized_source_text(self, translate_batch):
+        first = MenuItem.objects.create(name='唐揚げ 定食', price=800, description='')
+        second = MenuItem.objects.create(name='唐揚げ　 定食 ', price=800, description='')
+        translate_text_with_cache(first.name, 'menu_item', first.id, 'name')
+        # 空白だけが異なるテキストは、別のメニュー項目でも翻訳メモリの翻訳を使う
+        self.assertEqual(translate_text_with_cache(second.name, 'menu_item', second.id, 'name'), '[en_XX] 唐揚げ 定食')
+        self.assertEqual(translate_batch.call_count, 1)
+
+        # モデルのバージョンが変わった場合は翻訳し直す
+        third = MenuItem.objects.create(name='唐揚げ 定食', price=800, description='')
+        with override_settings(TRANSLATION_MODEL_VERSION='int8'):
+            translate_text_with_cache(third.name, 'menu_item', third.id, 'name')
+        self.assertEqual(translate_batch.call_count, 2)
+
+    def test_local_cache_evicts_least_recently_used_and_expired_entries(self):
+        local_cache = LocalTranslationCache(max_entries=2, ttl=60)
+        local_cache.set('a', 1)
+        local_cache.set('b', 2)
+        local_cache.get('a')
+        local_cache.set('c', 3)
+        self.assertIsNone(local_cache.get('b'))
+        self.assertEqual((local_cache.get('a'), local_cache.get('c')), (1, 3))
+        self.assertEqual(local_cache.stats()['evictions'], 1)
+
+        with mock.patch('app.utils.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(local_cache.get('a'))
+        self.assertEqual(local_cache.stats()['expirations'], 1)
+
+    def test_saving_translation_cache_invalidates_local_entry(self):
+        save_translation_cache('menu_item', 1, 'name', '唐揚げ', 'en_XX', 'Fried chicken')
+        self.assertEqual(get_translation_cache('menu_item', 1, 'name', 'en_XX'), 'Fried chicken')
+        save_translation_cache('menu_item', 1, 'name', '唐揚げ', 'en_XX', 'Karaage')
+        with self.assertNumQueries(1):
+            self.assertEqual(get_translation_cache('menu_item', 1, 'name', 'en_XX'), 'Karaage')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_translation_cache('menu_item', 1, 'name', 'en_XX'), 'Karaage')
+
+
+class TranslationJobTests(TestCase):
+    """翻訳ジョブのキューのテスト"""
+
+    def setUp(self):
+        get_local_translation_cache().clear()
+        self.item = MenuItem.objects.create(name='唐揚げ', price=500, description='')
+
+    def enqueue(self, text='唐揚げ', lang='en_XX'):
+        return enqueue_translation_job(text, 'menu_item', self.item.id, 'name', lang)
+
+    @mock.patch('app.utils.translate_batch', side_effect=fake_translate_batch)
+    def test_enqueue_claim_and_process(self, translate_batch):
+        job = self.enqueue()
+        # 同じ内容の待機中のジョブがあれば、そのジョブを返す
+        self.assertEqual(self.enqueue().id, job.id)
+        other = self.enqueue(lang='fr_XX')
+
+        self.assertEqual(process_translation_jobs('worker-1'), 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, TranslationJob.STATUS_DONE)
+        self.assertEqual(job.translated_text, '[en_XX] 唐揚げ')
+        self.assertEqual(get_translation_cache('menu_item', self.item.id, 'name', 'fr_XX', '唐揚げ'), '[fr_XX] 唐揚げ')
+        self.assertEqual(TranslationJob.objects.get(pk=other.pk).worker, 'worker-1')
+        # 取り出されたジョブは他のワーカーに取り出されない
+        self.assertEqual(claim_translation_jobs('worker-2'), [])
+
+    def test_requeue_stale_and_delete_finished_jobs(self):
+        job = self.enqueue()
+        claim_translation_jobs('worker-1')
+        self.assertEqual(requeue_stale_translation_jobs(60), 0)
+        TranslationJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(requeue_stale_translation_jobs(60), 1)
+        self.assertEqual([claimed.id for claimed in claim_translation_jobs('worker-2')], [job.id])
+
+        TranslationJob.objects.filter(pk=job.pk).update(status=TranslationJob.STATUS_DONE)
+        self.assertEqual(delete_finished_translation_jobs(60), 0)
+        TranslationJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(delete_finished_translation_jobs(60), 1)
+        self.assertFalse(TranslationJob.objects.exists())
+
+
+class PrewarmTranslationsTests(TestCase):
+    """事前翻訳の管理コマンドのテスト"""
+
+    def setUp(self):
+        get_local_translation_cache().clear()
+
+    @mock.patch('app.utils.translate_to_languages')
+    def test_translates_each_text_to_all_languages_at_once(self, translate_to_languages):
+        translate_to_languages.side_effect = lambda text, langs: {lang: f'[{lang}] {text}' for lang in langs}
+        item = MenuItem.objects.create(name='唐揚げ', price=500, description='')
+        call_command('prewarm_translations', '--lang', 'en_XX', '--lang', 'fr_XX', stdout=io.StringIO())
+        translate_to_languages.assert_called_once_with('唐揚げ', ['en_XX', 'fr_XX'])
+        self.assertEqual(
+            get_translation_caches({(item.id, 'name'): '唐揚げ'}, 'fr_XX'), {(item.id, 'name'): '[fr_XX] 唐揚げ'}
+        )
+
+        # キャッシュにある翻訳は翻訳し直さない
+        call_command('prewarm_translations', '--lang', 'en_XX', '--lang', 'fr_XX', stdout=io.StringIO())
+        self.assertEqual(translate_to_languages.call_count, 1)
+
+    @mock.patch('app.utils.translate_to_languages')
+    def test_query_count_does_not_depend_on_item_count(self, translate_to_languages):
+        translate_to_languages.side_effect = lambda text, langs: {lang: f'[{lang}] {text}' for lang in langs}
+
+        def prewarm_queries(item_count):
+            TranslationCache.objects.all().delete()
+            get_local_translation_cache().clear()
+            for index in range(item_count):
+                MenuItem.objects.create(name=f'商品{index}', price=500, description=f'商品{index}の説明です。')
+            with CaptureQueriesContext(connection) as context:
+                call_command('prewarm_translations', '--lang', 'en_XX', '--lang', 'fr_XX', stdout=io.StringIO())
+            return len(context.captured_queries)
+
+        small_menu_queries = prewarm_queries(2)
+        self.assertEqual(small_menu_queries, prewarm_queries(10))
+        self.assertEqual(TranslationCache.objects.filter(target_language='fr_XX').count(), 24)
+
+
+class StartupImportTests(TestCase):
+    """Djangoの起動時に、読み込みに時間がかかるライブラリを読み込まないことを確認するテスト"""
+
+    def test_startup_does_not_import_heavy_modules(self):
+        script = (
+            'import json, sys, django; django.setup();'
+            'from django.urls import get_resolver; get_resolver().url_patterns;'
+            'print(json.dumps(sorted(sys.modules)))'
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='itadaku.settings')
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        modules = {name.split('.')[0] for name in json.loads(result.stdout)}
+        for name in ('torch', 'transformers', 'optimum', 'openvino', 'xhtml2pdf'):
+            self.assertNotIn(name, modules)
@@ -7,5 +7,12 @@ urlpatterns = [
     path('', views.MenuListView.as_view(), name='menu_list'),
     path('menu/<int:pk>/', views.MenuItemDetailView.as_view(), name='menu_item_detail'),
     path('menu/<int:pk>/translate/', views.translate_menu_item, name='translate_menu_item'),
+    path('menu/translate/batch/', views.translate_menu_items_batch, name='translate_menu_items_batch'),
+    path('menu/translate/stream/', views.translate_menu_items_stream, name='translate_menu_items_stream'),
+    path('translate/jobs/<int:job_id>/', views.translation_job_status, name='translation_job_status'),
+    path('translate/cache_stats/', views.translation_cache_stats, name='translation_cache_stats'),
     path('pdf_export/', views.pdf_export_view, name='pdf_export'),
+    path('pdf_export/all/', views.pdf_export_all_view, name='pdf_export_all'),
+    path('healthz/ready', views.readiness_check, name='readiness_check'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
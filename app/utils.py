@@ -1,17 +1,369 @@
+import logging
 import os
-from typing import Dict, Optional, Tuple, List, Any
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Iterator, Optional, Set, Tuple, List, Any
 from django.conf import settings
-from .models import TranslationCache
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+from .models import (
+    ContentVersion, TranslationCache, TranslationJob, TranslationMemory,
+    compute_source_hash, normalize_source_text,
+)
+from .metrics import MODEL_TRANSLATIONS, count_cache_lookups, span
 
 # translate_ja_to_mm.pyからの関数をインポート
+# （optimum・transformers は最初の翻訳時に読み込まれる）
 from translate_ja_to_mm import (
-    translate_text as translate_text_base,
+    translate_batch,
+    translate_text_stream,
+    translate_to_languages,
+)
+from translate_languages import (
     get_supported_languages,
     get_language_name
 )
 
+logger = logging.getLogger(__name__)
+
+# 翻訳対象のメニュー項目のフィールド
+TRANSLATABLE_FIELDS = ('name', 'description')
+
+
+class TranslationFailed(Exception):
+    """
+    翻訳モデルでの翻訳に失敗した場合に送出される例外
+    
+    translations には、翻訳できなかったテキストを元のテキストで補った結果を保持する
+    """
+    
+    def __init__(self, translations: Dict[Any, str], failed_keys: Set[Any]):
+        super().__init__('翻訳に失敗しました')
+        self.translations = translations
+        self.failed_keys = failed_keys
+
+
+class SingleFlight:
+    """
+    同じキーの処理が同時に呼び出された場合に、一度だけ実行して結果を共有するクラス
+    
+    最初の呼び出し元だけが処理を実行し、実行中に同じキーで呼び出した他の呼び出し元は
+    その完了を待って同じ結果（または同じ例外）を受け取る
+    """
+    
+    class _Call:
+        def __init__(self):
+            self.event = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, 'SingleFlight._Call'] = {}
+    
+    def do(self, key: Any, func) -> Any:
+        """
+        キーごとに一度だけ func を実行し、その結果を返す
+        
+        Args:
+            key: 重複を判定するキー
+            func: 引数なしで呼び出す処理
+            
+        Returns:
+            func の戻り値
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._Call()
+                self._calls[key] = call
+        
+        # 実行中の処理があれば、その完了を待って結果を共有する
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+# 翻訳キャッシュのキーごとに実行中の翻訳をまとめる
+_translation_flight = SingleFlight()
+
+
+class LocalTranslationCache:
+    """
+    翻訳キャッシュ（TranslationCache）の前段に置くプロセス内のキャッシュ
+    
+    件数の上限を超えた場合は最も古く使われたエントリから削除し（LRU）、
+    有効期限（TTL）を過ぎたエントリは使わない。backend にDjangoのキャッシュの
+    エイリアスを指定すると、プロセス内にないエントリをそのキャッシュから探す。
+    """
+    
+    def __init__(self, max_entries: int = 2048, ttl: float = 300, backend: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._entries: 'OrderedDict[Tuple, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.backend_hits = 0
+    
+    @staticmethod
+    def _backend_key(key: Tuple) -> str:
+        return 'translation:' + ':'.join(str(part) for part in key)
+    
+    def get(self, key: Tuple) -> Any:
+        """キーに対応する値を取得する（ない場合はNone）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+        
+        if self.backend:
+            value = caches[self.backend].get(self._backend_key(key))
+            if value is not None:
+                with self._lock:
+                    self.backend_hits += 1
+                self._store(key, value)
+                return value
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def set(self, key: Tuple, value: Any) -> None:
+        """キーに値を保存する"""
+        self._store(key, value)
+        if self.backend:
+            caches[self.backend].set(self._backend_key(key), value, self.ttl)
+    
+    def _store(self, key: Tuple, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, key: Tuple) -> None:
+        """キーに対応する値を削除する"""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend:
+            caches[self.backend].delete(self._backend_key(key))
+    
+    def clear(self) -> None:
+        """すべてのエントリと統計情報を削除する"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.backend_hits = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """ヒット数・ミス数・削除数などの統計情報を取得する"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'backend': self.backend,
+                'hits': self.hits,
+                'backend_hits': self.backend_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
 
-def get_translation_cache(content_type: str, object_id: int, field_name: str, target_language: str) -> Optional[str]:
+_local_translation_cache: Optional[LocalTranslationCache] = None
+_local_translation_cache_lock = threading.Lock()
+
+
+def get_local_translation_cache() -> LocalTranslationCache:
+    """
+    プロセス内の翻訳キャッシュを取得する関数
+    
+    設定は settings.TRANSLATION_LOCAL_CACHE（MAX_ENTRIES, TTL, BACKEND）から読み込む
+    
+    Returns:
+        プロセス内の翻訳キャッシュ
+    """
+    global _local_translation_cache
+    
+    if _local_translation_cache is None:
+        with _local_translation_cache_lock:
+            if _local_translation_cache is None:
+                options = getattr(settings, 'TRANSLATION_LOCAL_CACHE', {})
+                _local_translation_cache = LocalTranslationCache(
+                    max_entries=options.get('MAX_ENTRIES', 2048),
+                    ttl=options.get('TTL', 300),
+                    backend=options.get('BACKEND'),
+                )
+    return _local_translation_cache
+
+
+def get_translation_cache_stats() -> Dict[str, Any]:
+    """
+    プロセス内の翻訳キャッシュの統計情報を取得する関数
+    
+    Returns:
+        ヒット数・ミス数・削除数などの統計情報
+    """
+    return get_local_translation_cache().stats()
+
+# 翻訳メモリのキーに使うモデルのバージョン（settings.TRANSLATION_MODEL_VERSION で変更可能）
+DEFAULT_TRANSLATION_MODEL_VERSION = 'facebook/mbart-large-50-many-to-many-mmt'
+
+
+def get_translation_model_version() -> str:
+    """
+    翻訳メモリのキーに使うモデルのバージョンを取得する関数
+    
+    Returns:
+        モデルのバージョン文字列
+    """
+    return getattr(settings, 'TRANSLATION_MODEL_VERSION', DEFAULT_TRANSLATION_MODEL_VERSION)
+
+
+def get_translation_memory(texts: List[str], target_language: str) -> Dict[str, str]:
+    """
+    翻訳メモリから複数のテキストの翻訳をまとめて取得する関数
+    
+    Args:
+        texts: 翻訳元のテキストのリスト
+        target_language: 翻訳先言語コード
+        
+    Returns:
+        翻訳メモリにあったテキストと翻訳されたテキストのマッピング
+    """
+    texts_by_hash: Dict[str, List[str]] = {}
+    for text in texts:
+        source_hash = compute_source_hash(normalize_source_text(text))
+        texts_by_hash.setdefault(source_hash, []).append(text)
+    
+    with span('cache_lookup'):
+        memory = list(TranslationMemory.objects.filter(
+            source_hash__in=list(texts_by_hash),
+            target_language=target_language,
+            model_version=get_translation_model_version(),
+        ).values_list('source_hash', 'translated_text'))
+    count_cache_lookups('memory', len(memory), len(texts_by_hash) - len(memory))
+    
+    translations: Dict[str, str] = {}
+    for source_hash, translated_text in memory:
+        for text in texts_by_hash[source_hash]:
+            translations[text] = translated_text
+    return translations
+
+
+def save_translation_memory(source_text: str, target_language: str, translated_text: str) -> None:
+    """
+    翻訳結果を翻訳メモリに保存する関数
+    
+    Args:
+        source_text: 元のテキスト
+        target_language: 翻訳先言語コード
+        translated_text: 翻訳されたテキスト
+    """
+    normalized_text = normalize_source_text(source_text)
+    with span('db_write'):
+        TranslationMemory.objects.update_or_create(
+            source_hash=compute_source_hash(normalized_text),
+            target_language=target_language,
+            model_version=get_translation_model_version(),
+            defaults={
+                'source_text': normalized_text,
+                'translated_text': translated_text
+            }
+        )
+
+
+def save_translation_memory_bulk(translations: Dict[str, str], target_language: str) -> None:
+    """
+    複数の翻訳結果を1回のクエリで翻訳メモリに保存する関数
+    
+    Args:
+        translations: 元のテキストと翻訳されたテキストのマッピング
+        target_language: 翻訳先言語コード
+    """
+    model_version = get_translation_model_version()
+    memories = {}
+    for source_text, translated_text in translations.items():
+        normalized_text = normalize_source_text(source_text)
+        source_hash = compute_source_hash(normalized_text)
+        memories[source_hash] = TranslationMemory(
+            source_hash=source_hash,
+            target_language=target_language,
+            model_version=model_version,
+            source_text=normalized_text,
+            translated_text=translated_text,
+        )
+    if not memories:
+        return
+    
+    with span('db_write'):
+        TranslationMemory.objects.bulk_create(
+            memories.values(),
+            update_conflicts=True,
+            unique_fields=['source_hash', 'target_language', 'model_version'],
+            update_fields=['source_text', 'translated_text', 'updated_at'],
+        )
+
+
+def translate_with_memory(texts: List[str], target_language: str) -> List[str]:
+    """
+    翻訳メモリを利用して複数のテキストを翻訳する関数
+    
+    翻訳メモリにないテキストだけを正規化して translate_batch で一括翻訳し、
+    結果を翻訳メモリに保存する
+    
+    Args:
+        texts: 翻訳するテキストのリスト
+        target_language: 翻訳先言語コード
+        
+    Returns:
+        texts と同じ順序の翻訳されたテキストのリスト
+    """
+    translations = get_translation_memory(texts, target_language)
+    
+    missing_texts = [text for text in dict.fromkeys(texts) if text not in translations]
+    if missing_texts:
+        translated_texts = translate_batch(
+            [normalize_source_text(text) for text in missing_texts], target_language
+        )
+        MODEL_TRANSLATIONS.inc(len(missing_texts), target_language=target_language)
+        new_translations = dict(zip(missing_texts, translated_texts))
+        save_translation_memory_bulk(new_translations, target_language)
+        translations.update(new_translations)
+    
+    return [translations[text] for text in texts]
+
+
+def get_translation_cache(content_type: str, object_id: int, field_name: str, target_language: str,
+                          source_text: Optional[str] = None) -> Optional[str]:
     """
     翻訳キャッシュを取得する関数
     
@@ -20,20 +372,39 @@ def get_translation_cache(content_type: str, object_id: int, field_name: str, ta
         object_id: オブジェクトID
         field_name: フィールド名（例: 'name', 'description'）
         target_language: 翻訳先言語コード（例: 'en_XX'）
+        source_text: 現在の元のテキスト。指定した場合、キャッシュの元のテキストと
+                     異なればキャッシュがないものとして扱う
         
     Returns:
         キャッシュがある場合は翻訳されたテキスト、ない場合はNone
     """
-    try:
-        cache = TranslationCache.objects.get(
-            content_type=content_type,
-            object_id=object_id,
-            field_name=field_name,
-            target_language=target_language
-        )
-        return cache.translated_text
-    except TranslationCache.DoesNotExist:
+    key = (content_type, object_id, field_name, target_language)
+    local_cache = get_local_translation_cache()
+    
+    # プロセス内のキャッシュを確認
+    entry = local_cache.get(key)
+    count_cache_lookups('local', entry is not None, entry is None)
+    if entry is None:
+        try:
+            with span('cache_lookup'):
+                cache = TranslationCache.objects.get(
+                    content_type=content_type,
+                    object_id=object_id,
+                    field_name=field_name,
+                    target_language=target_language
+                )
+        except TranslationCache.DoesNotExist:
+            count_cache_lookups('db', 0, 1)
+            return None
+        count_cache_lookups('db', 1, 0)
+        entry = (cache.source_hash, cache.translated_text)
+        local_cache.set(key, entry)
+    
+    source_hash, translated_text = entry
+    # 元のテキストが変更されていれば古い翻訳は使わない
+    if source_text is not None and source_hash != compute_source_hash(source_text):
         return None
+    return translated_text
 
 
 def save_translation_cache(content_type: str, object_id: int, field_name: str, 
@@ -50,16 +421,18 @@ def save_translation_cache(content_type: str, object_id: int, field_name: str,
         translated_text: 翻訳されたテキスト
     """
     # 既存のキャッシュがあれば更新、なければ作成
-    TranslationCache.objects.update_or_create(
-        content_type=content_type,
-        object_id=object_id,
-        field_name=field_name,
-        target_language=target_language,
-        defaults={
-            'source_text': source_text,
-            'translated_text': translated_text
-        }
-    )
+    with span('db_write'):
+        TranslationCache.objects.update_or_create(
+            content_type=content_type,
+            object_id=object_id,
+            field_name=field_name,
+            target_language=target_language,
+            defaults={
+                'source_text': source_text,
+                'source_hash': compute_source_hash(source_text),
+                'translated_text': translated_text
+            }
+        )
 
 
 def translate_text_with_cache(text: str, content_type: str, object_id: int, 
@@ -77,43 +450,537 @@ def translate_text_with_cache(text: str, content_type: str, object_id: int,
     Returns:
         翻訳されたテキスト
     """
-    print(f"translate_text_with_cache が呼び出されました: text={text}, content_type={content_type}, object_id={object_id}, field_name={field_name}, target_language={target_language}")
+    logger.debug(
+        "translate_text_with_cache が呼び出されました: text=%s, content_type=%s, object_id=%s, field_name=%s, target_language=%s",
+        text, content_type, object_id, field_name, target_language,
+    )
     
     # 空のテキストは翻訳しない
     if not text:
-        print("空のテキストが渡されました。空文字列を返します。")
         return ""
         
     # キャッシュを確認
-    print("キャッシュを確認します...")
     cached_translation = get_translation_cache(
-        content_type, object_id, field_name, target_language
+        content_type, object_id, field_name, target_language, text
     )
     
     # キャッシュがあればそれを返す
     if cached_translation is not None:
-        print(f"キャッシュが見つかりました: {cached_translation}")
         return cached_translation
     
-    print("キャッシュが見つかりませんでした。翻訳を実行します...")
+    logger.debug("キャッシュが見つかりませんでした。翻訳を実行します: object_id=%s, field_name=%s", object_id, field_name)
     
-    # キャッシュがなければ翻訳して保存
-    try:
-        print(f"translate_text_base を呼び出します: text={text}, target_language={target_language}")
-        translated_text = translate_text_base(text, target_language)
-        print(f"翻訳結果: {translated_text}")
+    def translate_and_save() -> str:
+        # 待っている間に他の呼び出し元が翻訳を保存している場合がある
+        cached_translation = get_translation_cache(
+            content_type, object_id, field_name, target_language, text
+        )
+        if cached_translation is not None:
+            return cached_translation
+        
+        # キャッシュがなければ翻訳して保存
+        try:
+            translated_text = translate_with_memory([text], target_language)[0]
+            logger.debug("翻訳結果: %s -> %s", text, translated_text)
+            
+            save_translation_cache(
+                content_type, object_id, field_name, text, target_language, translated_text
+            )
+            return translated_text
+        except Exception:
+            # 翻訳に失敗した場合はエラーをログに記録し、元のテキストを返す
+            logger.exception("翻訳エラー: object_id=%s, field_name=%s, target_language=%s", object_id, field_name, target_language)
+            return text
+    
+    # 同じキーの翻訳が実行中であれば、その結果を待って共有する
+    return _translation_flight.do(
+        (content_type, object_id, field_name, target_language), translate_and_save
+    )
+
+
+def stream_translation_with_cache(text: str, content_type: str, object_id: int,
+                                  field_name: str, target_language: str) -> Iterator[Tuple[str, bool]]:
+    """
+    キャッシュを利用して翻訳し、生成途中の翻訳も順に返すジェネレータ
+    
+    キャッシュ・翻訳メモリにない場合は translate_text_stream で翻訳し、完成した翻訳を
+    翻訳メモリとキャッシュに保存する
+    
+    Args:
+        text: 翻訳するテキスト
+        content_type: コンテンツタイプ
+        object_id: オブジェクトID
+        field_name: フィールド名
+        target_language: 翻訳先言語コード
+        
+    Yields:
+        (翻訳されたテキスト, 完成した翻訳かどうか) のタプル。最後は完成した翻訳
+        （翻訳に失敗した場合は元のテキスト）
+    """
+    cached_translation = get_translation_cache(content_type, object_id, field_name, target_language, text)
+    if cached_translation is not None:
+        yield cached_translation, True
+        return
+    
+    translated_text = get_translation_memory([text], target_language).get(text)
+    if translated_text is None:
+        try:
+            for translated_text in translate_text_stream(normalize_source_text(text), target_language):
+                yield translated_text, False
+        except Exception:
+            # 翻訳に失敗した場合はエラーをログに記録し、元のテキストを返す
+            logger.exception("翻訳エラー: object_id=%s, field_name=%s, target_language=%s", object_id, field_name, target_language)
+            yield text, True
+            return
+        MODEL_TRANSLATIONS.inc(target_language=target_language)
+        save_translation_memory(text, target_language, translated_text)
+    
+    save_translation_cache(content_type, object_id, field_name, text, target_language, translated_text)
+    yield translated_text, True
+
+
+def get_translation_caches(texts: Dict[Tuple[int, str], str], target_language: str,
+                           content_type: str = 'menu_item') -> Dict[Tuple[int, str], str]:
+    """
+    複数のオブジェクト・フィールドの翻訳キャッシュを1回のクエリでまとめて取得する関数
+    
+    Args:
+        texts: (オブジェクトID, フィールド名) と現在の元のテキストのマッピング
+        target_language: 翻訳先言語コード
+        content_type: コンテンツタイプ（デフォルト: 'menu_item'）
         
-        print("翻訳結果をキャッシュに保存します...")
-        save_translation_cache(
-            content_type, object_id, field_name, text, target_language, translated_text
+    Returns:
+        キャッシュがあり、元のテキストが変更されていないものの
+        (オブジェクトID, フィールド名) と翻訳されたテキストのマッピング
+    """
+    if not texts:
+        return {}
+    
+    local_cache = get_local_translation_cache()
+    with span('cache_lookup'):
+        cached_rows = list(TranslationCache.objects.filter(
+            content_type=content_type,
+            object_id__in={object_id for object_id, _ in texts},
+            field_name__in={field_name for _, field_name in texts},
+            target_language=target_language,
+        ).values_list('object_id', 'field_name', 'source_hash', 'translated_text'))
+    
+    results: Dict[Tuple[int, str], str] = {}
+    for object_id, field_name, source_hash, translated_text in cached_rows:
+        key = (object_id, field_name)
+        local_cache.set((content_type, object_id, field_name, target_language), (source_hash, translated_text))
+        text = texts.get(key)
+        if text is not None and source_hash == compute_source_hash(text):
+            results[key] = translated_text
+    count_cache_lookups('db', len(results), len(texts) - len(results))
+    return results
+
+
+def save_translation_caches(texts: Dict[Tuple[int, str], str], translations: Dict[Tuple[int, str], str],
+                            target_language: str, content_type: str = 'menu_item') -> None:
+    """
+    複数のオブジェクト・フィールドの翻訳結果を1回の bulk_create でキャッシュに保存する関数
+    
+    bulk_create ではシグナルが送られないため、プロセス内のキャッシュを直接更新し、
+    翻訳のバージョンを1回だけ上げる
+    
+    Args:
+        texts: (オブジェクトID, フィールド名) と元のテキストのマッピング
+        translations: (オブジェクトID, フィールド名) と翻訳されたテキストのマッピング
+        target_language: 翻訳先言語コード
+        content_type: コンテンツタイプ（デフォルト: 'menu_item'）
+    """
+    if not translations:
+        return
+    
+    local_cache = get_local_translation_cache()
+    caches_to_save = []
+    for (object_id, field_name), translated_text in translations.items():
+        text = texts[(object_id, field_name)]
+        source_hash = compute_source_hash(text)
+        caches_to_save.append(TranslationCache(
+            content_type=content_type,
+            object_id=object_id,
+            field_name=field_name,
+            source_text=text,
+            source_hash=source_hash,
+            target_language=target_language,
+            translated_text=translated_text,
+        ))
+        local_cache.set((content_type, object_id, field_name, target_language), (source_hash, translated_text))
+    
+    with span('db_write'):
+        TranslationCache.objects.bulk_create(
+            caches_to_save,
+            update_conflicts=True,
+            unique_fields=['content_type', 'object_id', 'field_name', 'target_language'],
+            update_fields=['source_text', 'source_hash', 'translated_text', 'updated_at'],
         )
-        return translated_text
+    bump_content_version(f'translation:{target_language}')
+
+
+def translate_fields_with_cache(texts: Dict[Tuple[int, str], str], target_language: str,
+                                content_type: str = 'menu_item') -> Dict[Tuple[int, str], str]:
+    """
+    キャッシュを利用して複数のオブジェクト・フィールドのテキストをまとめて翻訳する関数
+    
+    キャッシュは1回のクエリでまとめて取得し、キャッシュにない（または元のテキストが
+    変更された）ものだけを translate_with_memory で一括翻訳して、1回の bulk_create で保存する
+    
+    Args:
+        texts: (オブジェクトID, フィールド名) と元のテキストのマッピング
+        target_language: 翻訳先言語コード
+        content_type: コンテンツタイプ（デフォルト: 'menu_item'）
+        
+    Returns:
+        (オブジェクトID, フィールド名) と翻訳されたテキストのマッピング
+        
+    Raises:
+        TranslationFailed: 翻訳モデルでの翻訳に失敗した場合（翻訳できなかったテキストはキャッシュしない）
+    """
+    # 空のテキストは翻訳しない
+    results: Dict[Tuple[int, str], str] = {key: "" for key, text in texts.items() if not text}
+    texts = {key: text for key, text in texts.items() if text}
+    
+    # キャッシュを1回のクエリで取得
+    results.update(get_translation_caches(texts, target_language, content_type))
+    
+    missing_keys = [key for key in texts if key not in results]
+    if not missing_keys:
+        return results
+    
+    logger.debug("%d件のテキストをまとめて翻訳します: target_language=%s", len(missing_keys), target_language)
+    
+    try:
+        translated_texts = translate_with_memory([texts[key] for key in missing_keys], target_language)
     except Exception as e:
-        # 翻訳に失敗した場合はエラーをログに記録し、元のテキストを返す
-        print(f"翻訳エラー: {e}")
-        import traceback
-        print(f"スタックトレース: {traceback.format_exc()}")
-        return text
+        # 翻訳に失敗した場合はエラーをログに記録し、元のテキストで補った結果とともに送出する
+        logger.exception("翻訳エラー: target_language=%s", target_language)
+        for key in missing_keys:
+            results[key] = texts[key]
+        raise TranslationFailed(results, set(missing_keys)) from e
+    
+    # 翻訳結果を1回のクエリでキャッシュに保存
+    translations = dict(zip(missing_keys, translated_texts))
+    save_translation_caches(texts, translations, target_language, content_type)
+    results.update(translations)
+    
+    return results
+
+
+def translate_items_with_cache(items: List[Any], fields: List[str], target_language: str,
+                               content_type: str = 'menu_item') -> Dict[Tuple[int, str], str]:
+    """
+    キャッシュを利用して複数のオブジェクトの複数のフィールドをまとめて翻訳する関数
+    
+    Args:
+        items: 翻訳するオブジェクト（例: MenuItem）のリスト
+        fields: 翻訳するフィールド名のリスト（例: ['name', 'description']）
+        target_language: 翻訳先言語コード
+        content_type: コンテンツタイプ（デフォルト: 'menu_item'）
+        
+    Returns:
+        (オブジェクトID, フィールド名) と翻訳されたテキストのマッピング
+        
+    Raises:
+        TranslationFailed: 翻訳モデルでの翻訳に失敗した場合
+    """
+    texts = {
+        (item.id, field_name): getattr(item, field_name)
+        for item in items
+        for field_name in fields
+    }
+    return translate_fields_with_cache(texts, target_language, content_type)
+
+
+def translate_fields_to_languages_with_cache(texts: Dict[Tuple[int, str], str], target_languages: List[str],
+                                             content_type: str = 'menu_item') -> Dict[str, Dict[Tuple[int, str], str]]:
+    """
+    キャッシュを利用して複数のオブジェクト・フィールドのテキストを複数の言語にまとめて翻訳する関数
+    
+    キャッシュと翻訳メモリは言語ごとに1回のクエリでまとめて取得し、どちらにもないテキストだけを
+    translate_to_languages で1回のエンコードで必要な言語すべてに翻訳する。
+    結果は言語ごとに1回の bulk_create で翻訳メモリとキャッシュに保存する
+    
+    Args:
+        texts: (オブジェクトID, フィールド名) と元のテキストのマッピング
+        target_languages: 翻訳先言語コードのリスト
+        content_type: コンテンツタイプ（デフォルト: 'menu_item'）
+        
+    Returns:
+        言語コードと、(オブジェクトID, フィールド名) と翻訳されたテキストのマッピングのマッピング
+        （翻訳に失敗したテキストは含まれず、保存もされない）
+    """
+    # 空のテキストは翻訳しない
+    texts = {key: text for key, text in texts.items() if text}
+    
+    # キャッシュにない（または元のテキストが変更された）テキストを、言語ごとに翻訳メモリから取得
+    results = {lang: get_translation_caches(texts, lang, content_type) for lang in target_languages}
+    missing_texts: Dict[str, Set[str]] = {}
+    translations: Dict[str, Dict[str, str]] = {}
+    for lang in target_languages:
+        missing_texts[lang] = {text for key, text in texts.items() if key not in results[lang]}
+        translations[lang] = get_translation_memory(list(missing_texts[lang]), lang) if missing_texts[lang] else {}
+    
+    # 翻訳メモリにもないテキストは、テキストごとに必要な言語へまとめて翻訳
+    new_memory: Dict[str, Dict[str, str]] = {lang: {} for lang in target_languages}
+    for text in dict.fromkeys(texts.values()):
+        languages = [
+            lang for lang in target_languages
+            if text in missing_texts[lang] and text not in translations[lang]
+        ]
+        if not languages:
+            continue
+        
+        logger.debug("%d言語にまとめて翻訳します: text=%s", len(languages), text)
+        try:
+            model_translations = translate_to_languages(normalize_source_text(text), languages)
+        except Exception:
+            # 翻訳に失敗したテキストは保存せず、次回の翻訳で翻訳し直す
+            logger.exception("翻訳エラー: target_languages=%s", ",".join(languages))
+            continue
+        for lang, translated_text in model_translations.items():
+            MODEL_TRANSLATIONS.inc(target_language=lang)
+            new_memory[lang][text] = translated_text
+            translations[lang][text] = translated_text
+    
+    # 言語ごとに、翻訳メモリと翻訳キャッシュをそれぞれ1回のクエリで保存
+    for lang in target_languages:
+        save_translation_memory_bulk(new_memory[lang], lang)
+        new_caches = {
+            key: translations[lang][text]
+            for key, text in texts.items()
+            if key not in results[lang] and text in translations[lang]
+        }
+        save_translation_caches(texts, new_caches, lang, content_type)
+        results[lang].update(new_caches)
+    
+    return results
+
+
+def enqueue_translation_job(text: str, content_type: str, object_id: int,
+                            field_name: str, target_language: str) -> TranslationJob:
+    """
+    翻訳ジョブをキューに追加する関数
+    
+    同じ内容の待機中・実行中のジョブがあれば、新しく作らずにそのジョブを返す
+    
+    Args:
+        text: 翻訳するテキスト
+        content_type: コンテンツタイプ
+        object_id: オブジェクトID
+        field_name: フィールド名
+        target_language: 翻訳先言語コード
+        
+    Returns:
+        追加された（または既存の）翻訳ジョブ
+    """
+    active_job = TranslationJob.objects.filter(
+        content_type=content_type,
+        object_id=object_id,
+        field_name=field_name,
+        target_language=target_language,
+        source_text=text,
+        status__in=[TranslationJob.STATUS_PENDING, TranslationJob.STATUS_RUNNING],
+    ).first()
+    if active_job is not None:
+        return active_job
+    
+    # 元のテキストが変更される前の待機中のジョブは不要なので削除
+    TranslationJob.objects.filter(
+        content_type=content_type,
+        object_id=object_id,
+        field_name=field_name,
+        target_language=target_language,
+        status=TranslationJob.STATUS_PENDING,
+    ).delete()
+    
+    return TranslationJob.objects.create(
+        content_type=content_type,
+        object_id=object_id,
+        field_name=field_name,
+        source_text=text,
+        target_language=target_language,
+    )
+
+
+def claim_translation_jobs(worker: str, batch_size: int = 16) -> List[TranslationJob]:
+    """
+    待機中の翻訳ジョブを古い順に取り出し、実行中にする関数
+    
+    状態が待機中のままのジョブだけを更新するため、複数のワーカーが
+    同時に実行しても同じジョブを二重に処理することはない
+    
+    Args:
+        worker: ワーカーの識別子
+        batch_size: 一度に取り出すジョブの最大数
+        
+    Returns:
+        このワーカーが取り出したジョブのリスト
+    """
+    pending_ids = list(
+        TranslationJob.objects.filter(status=TranslationJob.STATUS_PENDING)
+        .order_by('created_at')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not pending_ids:
+        return []
+    
+    TranslationJob.objects.filter(
+        id__in=pending_ids, status=TranslationJob.STATUS_PENDING
+    ).update(status=TranslationJob.STATUS_RUNNING, worker=worker, updated_at=timezone.now())
+    
+    return list(TranslationJob.objects.filter(
+        id__in=pending_ids, status=TranslationJob.STATUS_RUNNING, worker=worker
+    ))
+
+
+def process_translation_jobs(worker: str, batch_size: int = 16) -> int:
+    """
+    待機中の翻訳ジョブを取り出してまとめて翻訳する関数
+    
+    取り出したジョブを翻訳先言語ごとにまとめて translate_with_memory で翻訳し、
+    結果を翻訳キャッシュとジョブの両方に保存する
+    
+    Args:
+        worker: ワーカーの識別子
+        batch_size: 一度に取り出すジョブの最大数
+        
+    Returns:
+        処理したジョブの数
+    """
+    jobs = claim_translation_jobs(worker, batch_size)
+    
+    # 翻訳先言語ごとにジョブをまとめる
+    jobs_by_language: Dict[str, List[TranslationJob]] = {}
+    for job in jobs:
+        jobs_by_language.setdefault(job.target_language, []).append(job)
+    
+    for target_language, language_jobs in jobs_by_language.items():
+        try:
+            translated_texts = translate_with_memory(
+                [job.source_text for job in language_jobs], target_language
+            )
+        except Exception as e:
+            logger.exception("翻訳ジョブの処理に失敗しました: target_language=%s", target_language)
+            TranslationJob.objects.filter(
+                id__in=[job.id for job in language_jobs]
+            ).update(status=TranslationJob.STATUS_FAILED, error=str(e), updated_at=timezone.now())
+            continue
+        
+        for job, translated_text in zip(language_jobs, translated_texts):
+            save_translation_cache(
+                job.content_type, job.object_id, job.field_name,
+                job.source_text, job.target_language, translated_text
+            )
+            job.translated_text = translated_text
+            job.status = TranslationJob.STATUS_DONE
+            job.save(update_fields=['translated_text', 'status', 'updated_at'])
+    
+    return len(jobs)
+
+
+def requeue_stale_translation_jobs(timeout_seconds: int) -> int:
+    """
+    一定時間以上実行中のままのジョブを待機中に戻す関数
+    
+    ワーカーが途中で停止した場合に、取り出されたままのジョブを回収するために使う
+    
+    Args:
+        timeout_seconds: 実行中のまま放置されたとみなすまでの秒数
+        
+    Returns:
+        待機中に戻したジョブの数
+    """
+    threshold = timezone.now() - timedelta(seconds=timeout_seconds)
+    return TranslationJob.objects.filter(
+        status=TranslationJob.STATUS_RUNNING, updated_at__lt=threshold
+    ).update(status=TranslationJob.STATUS_PENDING, worker='', updated_at=timezone.now())
+
+
+def delete_finished_translation_jobs(retention_seconds: int) -> int:
+    """
+    完了・失敗してから一定時間が経過したジョブを削除する関数
+    
+    完了したジョブの翻訳は翻訳キャッシュに保存されているため、ジョブの状態を確認し終えた後は不要になる
+    
+    Args:
+        retention_seconds: 完了・失敗したジョブを残しておく秒数
+        
+    Returns:
+        削除したジョブの数
+    """
+    threshold = timezone.now() - timedelta(seconds=retention_seconds)
+    deleted, _ = TranslationJob.objects.filter(
+        status__in=[TranslationJob.STATUS_DONE, TranslationJob.STATUS_FAILED], updated_at__lt=threshold
+    ).delete()
+    return deleted
+
+
+def get_stale_translation_languages(content_type: str, object_id: int,
+                                    field_name: str, text: str) -> List[str]:
+    """
+    元のテキストが変更されて古くなった翻訳キャッシュの言語を取得する関数
+    
+    Args:
+        content_type: コンテンツタイプ
+        object_id: オブジェクトID
+        field_name: フィールド名
+        text: 現在の元のテキスト
+        
+    Returns:
+        翻訳キャッシュが古くなっている言語コードのリスト
+    """
+    return list(
+        TranslationCache.objects.filter(
+            content_type=content_type,
+            object_id=object_id,
+            field_name=field_name,
+        )
+        .exclude(source_hash=compute_source_hash(text))
+        .values_list('target_language', flat=True)
+    )
+
+
+def bump_content_version(name: str) -> None:
+    """
+    コンテンツのバージョンを上げる関数
+    
+    Args:
+        name: コンテンツの名前（例: 'menu', 'translation:en_XX'）
+    """
+    # 行がなければ作成してから、バージョンをアトミックに上げる
+    ContentVersion.objects.bulk_create([ContentVersion(name=name)], ignore_conflicts=True)
+    ContentVersion.objects.filter(name=name).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+
+
+def get_menu_content_version(target_language: str) -> Tuple[str, Optional[Any]]:
+    """
+    指定した言語のメニューの内容のバージョンを取得する関数
+    
+    メニュー項目・カテゴリのバージョンと、その言語の翻訳のバージョンを1回のクエリで取得する
+    
+    Args:
+        target_language: 言語コード
+        
+    Returns:
+        バージョン文字列と最終更新日時（更新されたことがない場合はNone）のタプル
+    """
+    names = ['menu']
+    if target_language != 'ja_XX':
+        names.append(f'translation:{target_language}')
+    
+    rows = {
+        name: (version, updated_at)
+        for name, version, updated_at in ContentVersion.objects.filter(
+            name__in=names
+        ).values_list('name', 'version', 'updated_at')
+    }
+    version = '-'.join(str(rows.get(name, (0, None))[0]) for name in names)
+    updated_at = [updated_at for _, updated_at in rows.values()]
+    return f'{target_language}:{version}', max(updated_at) if updated_at else None
 
 
 def get_available_languages() -> List[Tuple[str, str]]:
@@ -1,23 +1,158 @@
-import io
-from django.http import HttpResponse
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from functools import wraps
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import condition
 from django.views.generic import ListView, DetailView
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.template.loader import get_template
-from xhtml2pdf import pisa
-from .models import MenuItem, MenuCategory, TranslationCache
-from .utils import translate_text_with_cache, get_available_languages
+from translate_ja_to_mm import MODEL_FAILED, MODEL_READY, get_model_state
+from .inference import InferenceBusy, get_inference_executor
+from .metrics import render_metrics
+from .middleware import get_request_profiling_settings, get_slow_request_log
+from .models import MenuItem, MenuCategory, TranslationCache, TranslationJob
+from .pdf import (
+    MenuPdfError, MenuPdfTranslationError, get_menu_pdf, menu_pdf_response, open_pdf_spool,
+    open_uncached_menu_pdf, render_pdf,
+    export_menu_pdfs, open_menu_pdfs, iter_menu_pdf_zip,
+)
+from .utils import (
+    TRANSLATABLE_FIELDS, TranslationFailed,
+    translate_text_with_cache, translate_fields_with_cache, stream_translation_with_cache,
+    get_available_languages, get_supported_languages,
+    get_translation_cache, get_translation_caches, enqueue_translation_job, get_translation_cache_stats,
+    get_menu_content_version,
+)
 
+logger = logging.getLogger(__name__)
+
+# 一括翻訳APIで一度に受け付ける（メニュー項目, フィールド）の組の最大数
+MAX_BATCH_TRANSLATION_PAIRS = 1000
+# 翻訳のストリーミングで、キャッシュにないテキストを一度に翻訳する数
+STREAM_TRANSLATION_BATCH_SIZE = 8
+# 翻訳のストリーミングで、生成途中の翻訳も送るテキストの最小の文字数（これより短いものはまとめて翻訳する）
+STREAM_PARTIAL_MIN_LENGTH = 40
+# 翻訳ワーカーを利用する場合に、翻訳のストリーミングで翻訳ジョブの状態を確認する間隔（秒）
+STREAM_JOB_POLL_INTERVAL = 1
+# 翻訳ワーカーを利用する場合に、翻訳のストリーミングで翻訳ジョブの完了を待つ最大の秒数
+# （超えた場合は busy イベントを送り、STREAM_JOB_RETRY_AFTER 秒後にブラウザに再接続させる）
+STREAM_JOB_WAIT = 30
+STREAM_JOB_RETRY_AFTER = 5
+
+
+def get_menu_page_version(request):
+    """メニュー一覧ページのバージョンを取得（1リクエストにつき1回だけ取得する）"""
+    if not hasattr(request, '_menu_page_version'):
+        request._menu_page_version = get_menu_content_version(request.GET.get('lang', 'ja_XX'))
+    return request._menu_page_version
+
+def menu_list_etag(request, *args, **kwargs):
+    """メニュー一覧ページのETag（メニュー・翻訳のバージョンとクエリパラメータから計算）"""
+    version, _ = get_menu_page_version(request)
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    return hashlib.sha1(f'{version}?{query}'.encode('utf-8')).hexdigest()
+
+def menu_list_last_modified(request, *args, **kwargs):
+    """メニュー一覧ページの最終更新日時"""
+    return get_menu_page_version(request)[1]
+
+def load_menu_page_version(view):
+    """
+    非同期のビューで、ETagの計算より前にメニュー一覧ページのバージョンをスレッドで取得しておくデコレータ
+    
+    condition デコレータは ETag の関数を同期的に呼び出すため、イベントループ上でクエリを発行しないようにする
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        await sync_to_async(get_menu_page_version)(request)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+class TranslatedMenuItems:
+    """
+    テンプレートで参照された時点でメニュー項目を取得し、翻訳キャッシュにある翻訳を
+    translated_name / translated_description として付与するリスト
+    
+    描画結果のキャッシュがある場合は参照されないため、クエリも発行されない
+    """
+    
+    def __init__(self, queryset, target_language):
+        self.queryset = queryset
+        self.target_language = target_language
+        self._items = None
+    
+    def _load(self):
+        if self._items is None:
+            items = list(self.queryset)
+            translations = {}
+            if self.target_language != 'ja_XX':
+                translations = get_translation_caches(
+                    {
+                        (item.id, field_name): getattr(item, field_name)
+                        for item in items
+                        for field_name in TRANSLATABLE_FIELDS
+                        if getattr(item, field_name)
+                    },
+                    self.target_language,
+                )
+            for item in items:
+                item.translated_name = translations.get((item.id, 'name'))
+                item.translated_description = translations.get((item.id, 'description'))
+            self._items = items
+        return self._items
+    
+    def __iter__(self):
+        return iter(self._load())
+    
+    def __len__(self):
+        return len(self._load())
+
+@method_decorator(cache_control(private=True, no_cache=True), name='dispatch')
+@method_decorator(ensure_csrf_cookie, name='dispatch')
+@method_decorator(load_menu_page_version, name='dispatch')
+@method_decorator(condition(etag_func=menu_list_etag, last_modified_func=menu_list_last_modified), name='dispatch')
 class MenuListView(ListView):
+    """
+    メニュー一覧ページ（非同期のビュー）
+    
+    メニュー項目と翻訳は描画時に取得され、Djangoが描画をスレッドで実行するため、
+    イベントループ上ではクエリを発行しない
+    """
     model = MenuItem
     template_name = 'app/menu_list.html'
     context_object_name = 'menu_items'
     
+    async def dispatch(self, request, *args, **kwargs):
+        return await super().dispatch(request, *args, **kwargs)
+    
+    async def get(self, request, *args, **kwargs):
+        # クエリセットと翻訳は遅延評価のため、ここではクエリを発行しない
+        return super().get(request, *args, **kwargs)
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['categories'] = MenuCategory.objects.all().order_by('display_order')
         
+        # 選択された言語の翻訳はサーバー側で翻訳キャッシュから描画する
+        selected_language = self.request.GET.get('lang', 'ja_XX')
+        context['menu_items'] = TranslatedMenuItems(context['menu_items'], selected_language)
+        
+        # 描画結果のキャッシュのキー（言語・絞り込み条件・メニューと翻訳のバージョン）
+        context['menu_cache_key'] = menu_list_etag(self.request)
+        context['menu_page_cache_timeout'] = getattr(settings, 'MENU_PAGE_CACHE_TIMEOUT', 600)
+        
         # 利用可能な言語のリストに国コードを追加
         available_languages = get_available_languages()
         languages_with_flags = []
@@ -32,16 +167,16 @@ class MenuListView(ListView):
             languages_with_flags.append((code, name, country_code))
         
         context['available_languages'] = languages_with_flags
-        context['selected_language'] = self.request.GET.get('lang', 'ja_XX')
+        context['selected_language'] = selected_language
         return context
     
     def get_queryset(self):
         queryset = super().get_queryset()
         
-        # カテゴリでフィルタリング
+        # カテゴリでフィルタリング（結合による重複を除く）
         category_id = self.request.GET.get('category')
         if category_id:
-            queryset = queryset.filter(categories__category_id=category_id)
+            queryset = queryset.filter(categories__category_id=category_id).distinct()
         
         # アレルギーでフィルタリング
         allergen_filter = self.request.GET.getlist('allergen')
@@ -76,10 +211,15 @@ class MenuItemDetailView(DetailView):
         return context
 
 @require_http_methods(["GET"])
-def translate_menu_item(request, pk):
-    """メニュー項目の翻訳APIエンドポイント"""
+async def translate_menu_item(request, pk):
+    """
+    メニュー項目の翻訳APIエンドポイント（非同期のビュー）
+    
+    キャッシュにある翻訳はそのまま返し、キャッシュにない場合だけ推論のスレッドプールで翻訳する。
+    推論の待ち行列がいっぱいの場合は、429 と Retry-After を返す
+    """
     # デバッグ情報を出力
-    print(f"翻訳APIが呼び出されました: pk={pk}, GET={request.GET}")
+    logger.debug("翻訳APIが呼び出されました: pk=%s, GET=%s", pk, request.GET)
     
     # パラメータの取得
     field_name = request.GET.get('field', '')
@@ -87,15 +227,16 @@ def translate_menu_item(request, pk):
     
     # パラメータのバリデーション
     if not field_name or not target_language:
-        print(f"バリデーションエラー: field_name={field_name}, target_language={target_language}")
+        logger.debug("バリデーションエラー: field_name=%s, target_language=%s", field_name, target_language)
         return JsonResponse({'error': '必須パラメータが不足しています'}, status=400)
+    if target_language not in get_supported_languages():
+        logger.debug("サポートされていない言語コード: %s", target_language)
+        return JsonResponse({'error': 'サポートされていない言語コードです'}, status=400)
     
     # メニュー項目の取得
-    try:
-        menu_item = get_object_or_404(MenuItem, pk=pk)
-        print(f"メニュー項目を取得しました: id={menu_item.id}, name={menu_item.name}")
-    except Exception as e:
-        print(f"メニュー項目の取得に失敗しました: pk={pk}, error={e}")
+    menu_item = await MenuItem.objects.filter(pk=pk).afirst()
+    if menu_item is None:
+        logger.debug("メニュー項目の取得に失敗しました: pk=%s", pk)
         return JsonResponse({'error': 'メニュー項目が見つかりません'}, status=404)
     
     # 翻訳対象のフィールドの値を取得
@@ -104,123 +245,394 @@ def translate_menu_item(request, pk):
     elif field_name == 'description':
         text = menu_item.description
     else:
-        print(f"無効なフィールド名: {field_name}")
+        logger.debug("無効なフィールド名: %s", field_name)
         return JsonResponse({'error': '無効なフィールド名です'}, status=400)
     
-    print(f"翻訳を実行します: text={text}, target_language={target_language}")
-    
-    # 翻訳の実行（キャッシュを利用）
-    try:
-        translated_text = translate_text_with_cache(
-            text, 'menu_item', menu_item.id, field_name, target_language
+    # 空のテキストとキャッシュにある翻訳は、推論のスレッドプールを使わずに返す
+    translated_text = ""
+    if text:
+        translated_text = await sync_to_async(get_translation_cache)(
+            'menu_item', menu_item.id, field_name, target_language, text
         )
-        print(f"翻訳結果: {translated_text}")
-    except Exception as e:
-        print(f"翻訳エラー: {e}")
-        return JsonResponse({'error': f'翻訳処理中にエラーが発生しました: {str(e)}'}, status=500)
+    
+    # 翻訳ワーカーを利用する場合は、キャッシュがなければジョブを追加して待機中を返す
+    if getattr(settings, 'TRANSLATION_WORKER_ENABLED', False) and text:
+        if translated_text is None:
+            job = await sync_to_async(enqueue_translation_job)(
+                text, 'menu_item', menu_item.id, field_name, target_language
+            )
+            logger.debug("翻訳ジョブを追加しました: job_id=%s", job.id)
+            return JsonResponse({
+                'status': job.status,
+                'job_id': job.id,
+                'original': text,
+                'language': target_language
+            }, status=202)
+    elif translated_text is None:
+        # 翻訳の実行（キャッシュを利用）
+        try:
+            translated_text = await get_inference_executor().run(
+                translate_text_with_cache, text, 'menu_item', menu_item.id, field_name, target_language
+            )
+        except InferenceBusy as e:
+            response = JsonResponse({'error': '翻訳の処理が混み合っています。しばらくしてから再度お試しください'}, status=429)
+            response['Retry-After'] = str(e.retry_after)
+            return response
+        except Exception as e:
+            logger.exception("翻訳エラー: pk=%s, field_name=%s, target_language=%s", pk, field_name, target_language)
+            return JsonResponse({'error': f'翻訳処理中にエラーが発生しました: {str(e)}'}, status=500)
     
     # 結果を返す
     response_data = {
+        'status': TranslationJob.STATUS_DONE,
         'original': text,
         'translated': translated_text,
         'language': target_language
     }
-    print(f"レスポンス: {response_data}")
+    logger.debug("レスポンス: %s", response_data)
+    return JsonResponse(response_data)
+
+@require_http_methods(["POST"])
+def translate_menu_items_batch(request):
+    """
+    メニュー項目の一括翻訳APIエンドポイント
+    
+    リクエスト本文（JSON）: {"lang": "en_XX", "items": [{"id": 1, "field": "name"}, ...]}
+    キャッシュは1回のクエリでまとめて取得し、キャッシュにないものだけをまとめて翻訳する
+    """
+    # パラメータの取得
+    try:
+        payload = json.loads(request.body)
+        target_language = payload.get('lang', 'en_XX')
+        pairs = [(int(entry['id']), entry['field']) for entry in payload.get('items', [])]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'error': 'リクエストの形式が正しくありません'}, status=400)
+    
+    # パラメータのバリデーション
+    if target_language not in get_supported_languages():
+        return JsonResponse({'error': 'サポートされていない言語コードです'}, status=400)
+    if any(field_name not in TRANSLATABLE_FIELDS for _, field_name in pairs):
+        return JsonResponse({'error': '無効なフィールド名です'}, status=400)
+    if len(pairs) > MAX_BATCH_TRANSLATION_PAIRS:
+        return JsonResponse({'error': f'一度に翻訳できるのは{MAX_BATCH_TRANSLATION_PAIRS}件までです'}, status=400)
+    
+    # メニュー項目をまとめて取得
+    menu_items = MenuItem.objects.in_bulk({object_id for object_id, _ in pairs})
+    texts = {
+        (object_id, field_name): getattr(menu_items[object_id], field_name)
+        for object_id, field_name in pairs
+        if object_id in menu_items
+    }
+    
+    jobs = {}
+    if target_language == 'ja_XX':
+        # 日本語の場合は翻訳しない（元のテキストを使用）
+        translations = dict(texts)
+    elif getattr(settings, 'TRANSLATION_WORKER_ENABLED', False):
+        # 翻訳ワーカーを利用する場合は、キャッシュにないものをジョブとして追加する
+        translations = {key: "" for key, text in texts.items() if not text}
+        translations.update(get_translation_caches(texts, target_language))
+        for key, text in texts.items():
+            if key not in translations:
+                object_id, field_name = key
+                jobs[key] = enqueue_translation_job(text, 'menu_item', object_id, field_name, target_language)
+    else:
+        try:
+            translations = translate_fields_with_cache(texts, target_language)
+        except TranslationFailed as e:
+            # 翻訳できなかったテキストは元のテキストを返す
+            translations = e.translations
+        except Exception as e:
+            logger.exception("翻訳エラー: target_language=%s", target_language)
+            return JsonResponse({'error': f'翻訳処理中にエラーが発生しました: {str(e)}'}, status=500)
+    
+    # 結果を返す
+    results = []
+    for object_id, field_name in pairs:
+        key = (object_id, field_name)
+        result = {'id': object_id, 'field': field_name}
+        if key not in texts:
+            result.update({'status': TranslationJob.STATUS_FAILED, 'error': 'メニュー項目が見つかりません'})
+        elif key in jobs:
+            result.update({'status': jobs[key].status, 'job_id': jobs[key].id, 'original': texts[key]})
+        else:
+            result.update({'status': TranslationJob.STATUS_DONE, 'original': texts[key], 'translated': translations[key]})
+        results.append(result)
+    
+    return JsonResponse({'language': target_language, 'translations': results})
+
+def format_sse(event, data, retry=None):
+    """Server-Sent Events の1つのイベントを作成する（retry はブラウザが再接続するまでのミリ秒）"""
+    lines = [f'retry: {retry}'] if retry is not None else []
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+def format_translation_event(event, key, translated_text, **extra):
+    """(オブジェクトID, フィールド名) の翻訳の Server-Sent Events のイベントを作成する"""
+    object_id, field_name = key
+    return format_sse(event, {'id': object_id, 'field': field_name, 'translated': translated_text, **extra})
+
+async def iter_translation_job_events(texts, keys, target_language):
+    """
+    翻訳ワーカーを利用する場合に、翻訳ジョブを追加して完了したものから順にイベントとして返す非同期ジェネレータ
+    
+    推論はワーカーで実行されるため、このプロセスではジョブの状態を STREAM_JOB_POLL_INTERVAL 秒ごとに確認するだけにする。
+    STREAM_JOB_WAIT 秒以内に完了しなかった場合は busy イベントを送って接続を閉じる
+    （再接続時には、完了した翻訳はキャッシュから送られ、待機中・実行中のジョブは追加し直されない）
+    
+    Args:
+        texts: (オブジェクトID, フィールド名) と元のテキストのマッピング
+        keys: 翻訳ジョブを追加する (オブジェクトID, フィールド名) のリスト
+        target_language: 翻訳先言語コード
+    """
+    def enqueue_jobs():
+        jobs = {}
+        for object_id, field_name in keys:
+            job = enqueue_translation_job(texts[(object_id, field_name)], 'menu_item', object_id, field_name, target_language)
+            jobs[job.id] = (object_id, field_name)
+        return jobs
+    
+    def get_finished_jobs(job_ids):
+        return list(TranslationJob.objects.filter(
+            id__in=job_ids, status__in=[TranslationJob.STATUS_DONE, TranslationJob.STATUS_FAILED],
+        ).values_list('id', 'status', 'translated_text'))
+    
+    jobs = await sync_to_async(enqueue_jobs)()
+    deadline = time.monotonic() + STREAM_JOB_WAIT
+    while jobs:
+        for job_id, status, translated_text in await sync_to_async(get_finished_jobs)(list(jobs)):
+            key = jobs.pop(job_id)
+            # 翻訳に失敗したジョブは元のテキストを送る
+            if status != TranslationJob.STATUS_DONE:
+                translated_text = texts[key]
+            yield format_translation_event('translation', key, translated_text)
+        if not jobs:
+            break
+        if time.monotonic() >= deadline:
+            yield format_sse('busy', {'retry_after': STREAM_JOB_RETRY_AFTER}, retry=STREAM_JOB_RETRY_AFTER * 1000)
+            return
+        await asyncio.sleep(STREAM_JOB_POLL_INTERVAL)
+    
+    yield format_sse('done', {})
+
+async def iter_translation_events(texts, target_language):
+    """
+    翻訳をイベントとして順に返す非同期ジェネレータ
+    
+    キャッシュにある翻訳をまとめて送った後、短いテキストは STREAM_TRANSLATION_BATCH_SIZE 件ずつ翻訳して送り、
+    長いテキストは生成途中の翻訳（partial）を送りながら1件ずつ翻訳する。商品名は説明より先に翻訳する。
+    翻訳ワーカーを利用する場合は、このプロセスでは翻訳せずにジョブを追加し、完了したものから順に送る
+    
+    Args:
+        texts: (オブジェクトID, フィールド名) と元のテキストのマッピング
+        target_language: 翻訳先言語コード
+    """
+    if target_language != 'ja_XX':
+        cached = await sync_to_async(get_translation_caches)(texts, target_language)
+        for key, translated_text in cached.items():
+            yield format_translation_event('translation', key, translated_text, cached=True)
+        
+        missing_keys = sorted(
+            (key for key in texts if key not in cached),
+            key=lambda key: (TRANSLATABLE_FIELDS.index(key[1]), len(texts[key])),
+        )
+        if getattr(settings, 'TRANSLATION_WORKER_ENABLED', False):
+            async for event in iter_translation_job_events(texts, missing_keys, target_language):
+                yield event
+            return
+        
+        short_keys = [key for key in missing_keys if len(texts[key]) < STREAM_PARTIAL_MIN_LENGTH]
+        long_keys = [key for key in missing_keys if len(texts[key]) >= STREAM_PARTIAL_MIN_LENGTH]
+        executor = get_inference_executor()
+        try:
+            for start in range(0, len(short_keys), STREAM_TRANSLATION_BATCH_SIZE):
+                chunk = {key: texts[key] for key in short_keys[start:start + STREAM_TRANSLATION_BATCH_SIZE]}
+                try:
+                    translations = await executor.run(translate_fields_with_cache, chunk, target_language)
+                except TranslationFailed as e:
+                    # 翻訳できなかったテキストは元のテキストを送る
+                    translations = e.translations
+                for key, translated_text in translations.items():
+                    yield format_translation_event('translation', key, translated_text)
+            
+            for key in long_keys:
+                object_id, field_name = key
+                async for translated_text, done in executor.stream(
+                    stream_translation_with_cache, texts[key], 'menu_item', object_id, field_name, target_language
+                ):
+                    yield format_translation_event('translation' if done else 'partial', key, translated_text)
+        except InferenceBusy as e:
+            # 接続を閉じ、Retry-After と同じ時間の後にブラウザの EventSource に再接続させる
+            # （再接続時には、それまでに翻訳したものはキャッシュから送られる）
+            yield format_sse('busy', {'retry_after': e.retry_after}, retry=e.retry_after * 1000)
+            return
+    
+    yield format_sse('done', {})
+
+@require_http_methods(["GET"])
+async def translate_menu_items_stream(request):
+    """
+    メニュー項目の翻訳を Server-Sent Events で返すエンドポイント（非同期のビュー）
+    
+    クエリパラメータ: lang=en_XX&ids=1,2,3（ids を省略した場合はすべてのメニュー項目）
+    キャッシュにある翻訳はすぐに送り、キャッシュにないものは翻訳できたものから順に送る。
+    1件ごとに translation イベント（長いテキストは生成途中の partial イベントも）を送り、最後に done イベントを送る。
+    生成途中で送るには、ASGIサーバーで起動する必要がある（WSGIではまとめて送られる）
+    """
+    target_language = request.GET.get('lang', 'en_XX')
+    try:
+        ids = [int(value) for value in request.GET.get('ids', '').split(',') if value]
+    except ValueError:
+        return JsonResponse({'error': 'リクエストの形式が正しくありません'}, status=400)
+    
+    if target_language not in get_supported_languages():
+        return JsonResponse({'error': 'サポートされていない言語コードです'}, status=400)
+    if len(ids) * len(TRANSLATABLE_FIELDS) > MAX_BATCH_TRANSLATION_PAIRS:
+        return JsonResponse({'error': f'一度に翻訳できるのは{MAX_BATCH_TRANSLATION_PAIRS}件までです'}, status=400)
+    
+    menu_items = MenuItem.objects.only('id', *TRANSLATABLE_FIELDS)
+    if ids:
+        menu_items = menu_items.filter(id__in=ids)
+    texts = {}
+    async for menu_item in menu_items:
+        for field_name in TRANSLATABLE_FIELDS:
+            text = getattr(menu_item, field_name)
+            if text:
+                texts[(menu_item.id, field_name)] = text
+    # ids を省略した場合も、メニュー全体を一度に翻訳しないよう件数を制限する
+    if len(texts) > MAX_BATCH_TRANSLATION_PAIRS:
+        return JsonResponse({'error': f'一度に翻訳できるのは{MAX_BATCH_TRANSLATION_PAIRS}件までです'}, status=400)
+    
+    response = StreamingHttpResponse(
+        iter_translation_events(texts, target_language), content_type='text/event-stream; charset=utf-8'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx などのプロキシでバッファリングしない
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@require_http_methods(["GET"])
+def translation_job_status(request, job_id):
+    """翻訳ジョブの状態確認APIエンドポイント"""
+    job = get_object_or_404(TranslationJob, pk=job_id)
+    
+    response_data = {
+        'status': job.status,
+        'job_id': job.id,
+        'original': job.source_text,
+        'language': job.target_language
+    }
+    if job.status == TranslationJob.STATUS_DONE:
+        response_data['translated'] = job.translated_text
+    elif job.status == TranslationJob.STATUS_FAILED:
+        response_data['error'] = job.error
     return JsonResponse(response_data)
 
+@staff_member_required
+@require_http_methods(["GET"])
+def translation_cache_stats(request):
+    """プロセス内の翻訳キャッシュの統計情報APIエンドポイント（スタッフのみ）"""
+    return JsonResponse(get_translation_cache_stats())
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def slow_requests_view(request):
+    """処理に時間がかかったリクエストの一覧（管理画面、スタッフのみ）"""
+    log = get_slow_request_log()
+    if request.method == 'POST':
+        log.clear()
+    context = admin.site.each_context(request)
+    context.update({
+        'title': '処理に時間がかかったリクエスト',
+        'slow_requests': log.slowest(),
+        'threshold_ms': get_request_profiling_settings()['SLOW_REQUEST_THRESHOLD_MS'],
+    })
+    return render(request, 'app/slow_requests.html', context)
+
+@require_http_methods(["GET"])
+def readiness_check(request):
+    """
+    ロードバランサー向けの準備状態確認エンドポイント
+    
+    翻訳モデルのウォームアップを有効にしている場合は、推論を実行できる状態になるまで503を返す
+    """
+    state = get_model_state()
+    if getattr(settings, 'TRANSLATION_MODEL_WARMUP', False):
+        ready = state['status'] == MODEL_READY
+    else:
+        # ウォームアップしない場合は、最初の翻訳リクエストでモデルをロードする
+        ready = state['status'] != MODEL_FAILED
+    return JsonResponse({'ready': ready, 'model': state}, status=200 if ready else 503)
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """処理時間・キャッシュの参照結果などのメトリクス（Prometheus のテキスト形式）"""
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 def render_to_pdf(template_src, context_dict={}):
-    """HTMLテンプレートをPDFに変換するヘルパー関数"""
-    template = get_template(template_src)
-    html = template.render(context_dict)
-    pdf = pisa.pisaDocument(io.BytesIO(html.encode("UTF-8")), dest=io.BytesIO())
-    if pdf.err:
+    """
+    HTMLテンプレートをPDFに変換するヘルパー関数
+    
+    PDFは一時ファイル（PDF_RENDER_MAX_MEMORY を超えた分はディスク）に書き込み、コピーせずにそのまま返す
+    """
+    pdf = open_pdf_spool()
+    if render_pdf(template_src, context_dict, pdf) is not None:
+        pdf.close()
         return HttpResponse('Error Rendering PDF', status=400)
-    return HttpResponse(pdf.dest.getvalue(), content_type='application/pdf')
+    pdf.seek(0)
+    return FileResponse(pdf, content_type='application/pdf')
+
+@require_http_methods(["POST"])
+def pdf_export_all_view(request):
+    """
+    複数の言語のPDFをまとめてZIPで出力するビュー
+    
+    言語（lang）を指定しない場合はすべての言語を出力する。
+    キャッシュされていない言語のPDFはプロセスプールで並列に生成し、言語ごとの処理時間を timings.json としてZIPに含める
+    """
+    supported_languages = get_supported_languages()
+    languages = list(dict.fromkeys(request.POST.getlist('lang'))) or list(supported_languages)
+    if any(code not in supported_languages for code in languages):
+        return HttpResponse('サポートされていない言語コードです', status=400)
+    
+    try:
+        paths, timings = export_menu_pdfs(languages)
+    except TranslationFailed:
+        return HttpResponse('メニューの翻訳に失敗したため、PDFを出力できませんでした', status=503)
+    logger.info(
+        "メニューPDFをまとめて出力します: %d言語, workers=%s, %s秒",
+        len(paths), timings['workers'], timings['total_seconds'],
+    )
+    
+    response = StreamingHttpResponse(
+        iter_menu_pdf_zip(open_menu_pdfs(paths), timings), content_type='application/zip'
+    )
+    response['Content-Disposition'] = 'attachment; filename="menu_pdfs.zip"'
+    return response
 
 def pdf_export_view(request):
     """PDF出力用のビュー"""
     if request.method == 'POST':
         target_language = request.POST.get('lang', 'ja_XX')
+        if target_language not in get_supported_languages():
+            return HttpResponse('サポートされていない言語コードです', status=400)
         
-        # 全メニュー項目を取得
-        # カテゴリごとに整理するために、カテゴリも取得
-        categories = MenuCategory.objects.all().order_by('display_order')
-        
-        # カテゴリごとにメニュー項目をまとめる構造を作る
-        menu_data = []
-        for category in categories:
-            items = MenuItem.objects.filter(
-                categories__category=category, 
-                is_available=True
-            ).order_by('name')
-            
-            translated_items = []
-            for item in items:
-                # 名前と説明を翻訳
-                # 日本語の場合は翻訳しない（元のテキストを使用）
-                if target_language == 'ja_XX':
-                    translated_name = item.name
-                    translated_description = item.description
-                else:
-                    translated_name = translate_text_with_cache(
-                        item.name, 'menu_item', item.id, 'name', target_language
-                    )
-                    translated_description = translate_text_with_cache(
-                        item.description, 'menu_item', item.id, 'description', target_language
-                    )
-                
-                # アレルギー情報の英語マッピング
-                allergen_map = {
-                    'egg': 'Egg', 'milk': 'Milk', 'wheat': 'Wheat', 'shrimp': 'Shrimp',
-                    'crab': 'Crab', 'peanut': 'Peanut', 'soba': 'Buckwheat', 'fish': 'Fish',
-                    'nuts': 'Nuts', 'soy': 'Soy', 'fruit': 'Fruit', 'sesame': 'Sesame'
-                }
-                allergens_en = [allergen_map.get(a, a) for a in item.allergens]
-
-                # 翻訳されたデータを持つ辞書を作成
-                item_data = {
-                    'original': item,
-                    'name': translated_name,
-                    'description': translated_description,
-                    'price': item.price,
-                    'image': item.image,
-                    'allergens': allergens_en,
-                    'is_vegan': item.is_vegan,
-                    'contains_pork': item.contains_pork,
-                }
-                translated_items.append(item_data)
-            
-            if translated_items:
-                # 2列レイアウト用にアイテムをペアにする
-                item_rows = []
-                for i in range(0, len(translated_items), 2):
-                    item_rows.append(translated_items[i:i+2])
-                
-                menu_data.append({
-                    'category': category,
-                    'item_rows': item_rows
-                })
-            
-        context = {
-            'menu_data': menu_data,
-            'target_language': target_language,
-        }
-        
-        template_path = 'app/menu_pdf.html'
-        template = get_template(template_path)
-        html = template.render(context)
-        
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="menu_{target_language}.pdf"'
-        
-        # 日本語フォント対応のための設定が必要だが、まずはデフォルトで試す
-        pisa_status = pisa.CreatePDF(
-            html, dest=response
-        )
-        
-        if pisa_status.err:
-            return HttpResponse('We had some errors <pre>' + html + '</pre>')
-        return response
+        # メニューと翻訳が変更されていなければ、キャッシュされたPDFをそのまま返す
+        try:
+            path = get_menu_pdf(target_language)
+        except MenuPdfTranslationError as e:
+            # 翻訳に失敗したテキストがある場合は、元のテキストのまま描画したPDFをキャッシュせずに返す
+            try:
+                pdf = open_uncached_menu_pdf(e.context)
+            except MenuPdfError as e:
+                return HttpResponse('We had some errors <pre>' + e.html + '</pre>')
+            return FileResponse(
+                pdf, as_attachment=True, filename=f'menu_{target_language}.pdf', content_type='application/pdf'
+            )
+        except MenuPdfError as e:
+            return HttpResponse('We had some errors <pre>' + e.html + '</pre>')
+        return menu_pdf_response(path, target_language)
     
     else:
         # 言語選択フォームを表示
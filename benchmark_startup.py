@@ -0,0 +1,81 @@
+"""
+Djangoの起動時間のベンチマーク
+
+manage.py のコマンドとWebアプリの読み込み（django.setup() とURL設定の読み込み）を
+別プロセスで繰り返し実行し、かかった時間と最大メモリ使用量を計測する。
+起動時に翻訳モデルとPDFのライブラリ（torch・transformers・optimum・openvino・xhtml2pdf）が読み込まれていた場合は
+終了コード1で終了する。
+
+使い方:
+    python benchmark_startup.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 起動時に読み込まれてはならないモジュール
+HEAVY_MODULES = ('torch', 'transformers', 'optimum', 'openvino', 'xhtml2pdf')
+
+# Webアプリとして起動した場合と同じモジュールを読み込み、読み込まれたモジュールとメモリ使用量を出力する
+WEB_STARTUP_SCRIPT = f'''
+import json, resource, sys
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({{
+    "heavy_modules": [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+'''
+
+COMMANDS = {
+    'web (django.setup + urls)': [sys.executable, '-c', WEB_STARTUP_SCRIPT],
+    'manage.py check': [sys.executable, 'manage.py', 'check'],
+}
+
+
+def run(command, env):
+    """コマンドを実行して、かかった秒数と標準出力を返す"""
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=BASE_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"コマンドの実行に失敗しました: {' '.join(command)}\n{result.stderr}")
+    return elapsed, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Djangoの起動時間を計測します')
+    parser.add_argument('--repeat', type=int, default=5, help='各コマンドを実行する回数（デフォルト: 5）')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'itadaku.settings')
+
+    heavy_modules = []
+    for name, command in COMMANDS.items():
+        timings = []
+        for _ in range(args.repeat):
+            elapsed, output = run(command, env)
+            timings.append(elapsed)
+        print(f'{name:<28} 中央値: {statistics.median(timings):.3f}秒  最小: {min(timings):.3f}秒')
+        if command[1] == '-c':
+            startup = json.loads(output.strip().splitlines()[-1])
+            heavy_modules = startup['heavy_modules']
+            print(f'{"":<28} 最大メモリ使用量: {startup["max_rss_kb"] / 1024:.1f}MB')
+
+    if heavy_modules:
+        print(f'起動時に読み込みに時間がかかるライブラリが読み込まれています: {", ".join(heavy_modules)}')
+        sys.exit(1)
+    print('起動時に読み込みに時間がかかるライブラリは読み込まれていません')
+
+
+if __name__ == '__main__':
+    main()
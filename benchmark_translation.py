@@ -0,0 +1,189 @@
+"""
+翻訳の推論性能のベンチマーク
+
+menu_corpus.py のメニューのテキストを次の方法で翻訳し、レイテンシ（p50/p95/p99）、
+1秒あたりの文数・トークン数、最大メモリ使用量をJSONで出力する。
+
+- single:  translate_text で1文ずつ翻訳
+- batch:   translate_batch で --batch-size の文数ずつまとめて翻訳（バッチ内で重複した文は数えない）
+- fan-out: translate_to_languages で1文を --lang-count の言語数にまとめて翻訳
+
+デバイス（--device）とスレッド数（--threads）の組み合わせごとにモデルをロードし直す必要があるため、
+組み合わせごとに別プロセスで実行する。
+
+使い方:
+    python benchmark_translation.py --batch-size 1 --batch-size 8 --batch-size 16 \\
+        --lang-count 1 --lang-count 4 --threads 4 --threads 8 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from menu_corpus import CORPUS_VERSION, MENU_CORPUS
+
+# fan-out で使う翻訳先の言語（先頭から --lang-count の数だけ使う）
+FAN_OUT_LANGUAGES = [
+    "en_XX", "zh_CN", "ko_KR", "fr_XX", "de_DE", "es_XX", "it_IT", "pt_XX",
+    "ru_RU", "vi_VN", "th_TH", "id_ID", "ar_AR", "hi_IN", "tr_TR", "nl_XX",
+]
+
+
+def percentile(values, q):
+    """q パーセンタイル（0〜100、線形補間）"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = q / 100 * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies, sentences, tokens, elapsed):
+    """1回の呼び出しごとのレイテンシ（秒）と、翻訳した文数・トークン数から結果をまとめる"""
+    latencies_ms = [latency * 1000 for latency in latencies]
+    return {
+        "calls": len(latencies),
+        "sentences": sentences,
+        "mean_ms": round(statistics.mean(latencies_ms), 2),
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "sentences_per_second": round(sentences / elapsed, 2),
+        "tokens_per_second": round(tokens / elapsed, 2),
+    }
+
+
+def run_worker(options):
+    """このプロセスでモデルをロードし、各シナリオを実行して結果をJSONで出力する"""
+    from translate_ja_to_mm import (
+        get_model_and_tokenizer, get_model_state, get_openvino_config,
+        translate_batch, translate_text, translate_to_languages, warm_up_model,
+    )
+
+    warm_up_model()
+    _, tokenizer = get_model_and_tokenizer()
+
+    def count_tokens(texts):
+        # 生成されたトークン数（特殊トークンを除く）
+        return sum(len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"])
+
+    corpus = MENU_CORPUS * options["repeat"]
+    results = []
+
+    def measure(scenario, calls, **params):
+        """calls の各処理を実行し、(翻訳結果のリスト) からレイテンシとスループットを計測する"""
+        latencies = []
+        outputs = []
+        started = time.perf_counter()
+        for call in calls:
+            call_started = time.perf_counter()
+            outputs.extend(call())
+            latencies.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+        result = {"scenario": scenario, **params}
+        result.update(summarize(latencies, len(outputs), count_tokens(outputs), elapsed))
+        results.append(result)
+        print(f"  {scenario} {params}: p50 {result['p50_ms']}ms, {result['sentences_per_second']}文/秒", file=sys.stderr)
+
+    measure("single", [lambda text=text: [translate_text(text, "en_XX")] for text in corpus])
+
+    for batch_size in options["batch_sizes"]:
+        # translate_batch は同じテキストを一度だけ翻訳するため、スループットは実際に翻訳した
+        # 重複を除いたテキストの数で計算する（重複を除いても処理の内容は変わらない）
+        chunks = [list(dict.fromkeys(corpus[i:i + batch_size])) for i in range(0, len(corpus), batch_size)]
+        measure(
+            "batch",
+            [lambda chunk=chunk: translate_batch(chunk, "en_XX", batch_size=batch_size) for chunk in chunks],
+            batch_size=batch_size,
+        )
+
+    for lang_count in options["lang_counts"]:
+        langs = FAN_OUT_LANGUAGES[:lang_count]
+        measure(
+            "fan-out",
+            [lambda text=text: list(translate_to_languages(text, langs).values()) for text in corpus],
+            languages=lang_count,
+        )
+
+    state = get_model_state()
+    print(json.dumps({
+        "openvino": get_openvino_config(),
+        "load_seconds": state["load_seconds"],
+        "warmup_seconds": state["warmup_seconds"],
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }, ensure_ascii=False))
+
+
+def run_in_subprocess(device, threads, options):
+    """デバイスとスレッド数を環境変数で指定して、別プロセスでベンチマークを実行する"""
+    env = dict(os.environ)
+    if device:
+        env["TRANSLATION_OV_DEVICE"] = device
+    if threads:
+        env["TRANSLATION_OV_INFERENCE_NUM_THREADS"] = str(threads)
+    command = [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(options)]
+    result = subprocess.run(command, env=env, stdout=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ベンチマークに失敗しました: device={device}, threads={threads}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="翻訳の推論性能を計測します")
+    parser.add_argument("--batch-size", type=int, action="append", dest="batch_sizes", help="batch のバッチサイズ（複数指定可能。デフォルト: 1, 8, 16）")
+    parser.add_argument("--lang-count", type=int, action="append", dest="lang_counts", help="fan-out の言語数（複数指定可能。デフォルト: 1, 4, 16）")
+    parser.add_argument("--device", action="append", dest="devices", help="推論デバイス（複数指定可能。デフォルト: 設定のデバイス）")
+    parser.add_argument("--threads", type=int, action="append", dest="threads", help="推論スレッド数（複数指定可能。デフォルト: 設定のスレッド数）")
+    parser.add_argument("--repeat", type=int, default=1, help="コーパスを繰り返す回数（デフォルト: 1）")
+    parser.add_argument("--output", help="結果を保存するJSONファイル（省略した場合は標準出力）")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(json.loads(args.worker))
+        return
+
+    options = {
+        "batch_sizes": args.batch_sizes or [1, 8, 16],
+        "lang_counts": [n for n in (args.lang_counts or [1, 4, 16]) if 0 < n <= len(FAN_OUT_LANGUAGES)],
+        "repeat": args.repeat,
+    }
+    runs = []
+    for device in args.devices or [None]:
+        for threads in args.threads or [None]:
+            print(f"device={device or '設定値'}, threads={threads or '設定値'} で計測しています...", file=sys.stderr)
+            run = run_in_subprocess(device, threads, options)
+            run.update(device=run["openvino"]["DEVICE"], threads=threads)
+            runs.append(run)
+
+    report = {
+        "corpus_version": CORPUS_VERSION,
+        "sentences": len(MENU_CORPUS) * args.repeat,
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "options": options,
+        "runs": runs,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"結果を保存しました: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+重み圧縮したモデルと元のモデルの翻訳の品質・速度を比較するスクリプト
+
+menu_corpus.py のメニューのテキストをそれぞれのモデルで翻訳し、元のモデル（FP32）の翻訳を参照訳とした
+BLEU・chrF と、1文あたりの翻訳時間・メモリ使用量・モデルのサイズを表示する。
+BLEU・chrF の計算には sacrebleu が必要（pip install sacrebleu）。
+BLEU のトークナイザーは翻訳先の言語ごとに選ぶ（中国語は zh、日本語は ja-mecab（pip install "sacrebleu[ja]" がない場合は char）、
+タイ語などの単語を空白で区切らない言語は char、それ以外は標準の 13a）。
+
+使い方:
+    python convert_to_openvino.py --weight-format int8
+    python compare_quantization.py --candidate ./assets/ov_mbart_int8 --lang en_XX --lang zh_CN
+
+各モデルは別プロセスで実行するため、メモリ使用量もモデルごとに計測される
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmark_translation import percentile
+from menu_corpus import CORPUS_VERSION, MENU_CORPUS
+
+
+def run_worker(model_dir, languages):
+    """このプロセスで指定したモデルを使ってコーパスを翻訳し、結果をJSONで出力する"""
+    os.environ["TRANSLATION_OV_MODEL_DIR"] = model_dir
+    from translate_ja_to_mm import get_model_state, translate_text, warm_up_model
+
+    warm_up_model()
+    translations = {}
+    latencies = []
+    for lang in languages:
+        translations[lang] = []
+        for text in MENU_CORPUS:
+            started = time.perf_counter()
+            translations[lang].append(translate_text(text, lang))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    state = get_model_state()
+    print(json.dumps({
+        "load_seconds": state["load_seconds"],
+        "warmup_seconds": state["warmup_seconds"],
+        "translations": translations,
+        "latencies_ms": latencies,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }, ensure_ascii=False))
+
+
+def translate_in_subprocess(model_dir, languages):
+    """別プロセスでモデルを実行し、その結果を返す"""
+    command = [sys.executable, os.path.abspath(__file__), "--worker", model_dir]
+    for lang in languages:
+        command += ["--lang", lang]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"翻訳に失敗しました: {model_dir}\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def directory_size_mb(path):
+    """ディレクトリ内のファイルの合計サイズ（MB）"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 1024 / 1024
+
+
+def latency_summary(latencies):
+    return {
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+    }
+
+
+# 単語を空白で区切らない言語の BLEU のトークナイザー（それ以外の言語は sacrebleu の標準の 13a）
+BLEU_TOKENIZERS = {
+    "zh_CN": "zh",
+    "ja_XX": "ja-mecab",
+    "th_TH": "char",
+    "my_MM": "char",
+    "km_KH": "char",
+}
+
+
+def bleu_tokenizer(lang):
+    """翻訳先の言語の BLEU のトークナイザー（ja-mecab に必要なライブラリがない場合は char）"""
+    tokenizer = BLEU_TOKENIZERS.get(lang, "13a")
+    if tokenizer == "ja-mecab":
+        try:
+            import MeCab  # noqa: F401
+            import ipadic  # noqa: F401
+        except ImportError:
+            tokenizer = "char"
+    return tokenizer
+
+
+def quality_scores(references, candidates, lang):
+    """参照訳に対する BLEU・chrF（sacrebleu がない場合はNone）"""
+    try:
+        import sacrebleu
+    except ImportError:
+        return None
+    tokenizer = bleu_tokenizer(lang)
+    bleu = sacrebleu.corpus_bleu(candidates, [references], tokenize=tokenizer)
+    chrf = sacrebleu.corpus_chrf(candidates, [references])
+    return {"bleu": round(bleu.score, 2), "chrf": round(chrf.score, 2), "bleu_tokenizer": tokenizer}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重み圧縮したモデルと元のモデルの翻訳の品質・速度を比較します")
+    parser.add_argument("--reference", default="./assets/ov_mbart", help="元のモデル（デフォルト: ./assets/ov_mbart）")
+    parser.add_argument("--candidate", default="./assets/ov_mbart_int8", help="比較するモデル（デフォルト: ./assets/ov_mbart_int8）")
+    parser.add_argument("--lang", action="append", dest="languages", metavar="LANG", help="翻訳先の言語コード（複数指定可能。デフォルト: en_XX）")
+    parser.add_argument("--json", help="結果をJSONで保存するファイル")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    languages = args.languages or ["en_XX"]
+
+    if args.worker:
+        run_worker(args.worker, languages)
+        return
+
+    results = {}
+    for name, model_dir in (("reference", args.reference), ("candidate", args.candidate)):
+        print(f"{model_dir} で翻訳しています...")
+        output = translate_in_subprocess(model_dir, languages)
+        results[name] = {
+            "model_dir": model_dir,
+            "size_mb": round(directory_size_mb(model_dir), 1),
+            "load_seconds": output["load_seconds"],
+            "max_rss_mb": round(output["max_rss_mb"], 1),
+            "latency": latency_summary(output["latencies_ms"]),
+            "translations": output["translations"],
+        }
+
+    report = {
+        "corpus_version": CORPUS_VERSION,
+        "sentences": len(MENU_CORPUS),
+        "languages": languages,
+        "models": {name: {k: v for k, v in result.items() if k != "translations"} for name, result in results.items()},
+        "quality": {},
+        "differences": {},
+    }
+    for lang in languages:
+        references = results["reference"]["translations"][lang]
+        candidates = results["candidate"]["translations"][lang]
+        report["quality"][lang] = quality_scores(references, candidates, lang)
+        report["differences"][lang] = [
+            {"source": source, "reference": reference, "candidate": candidate}
+            for source, reference, candidate in zip(MENU_CORPUS, references, candidates)
+            if reference != candidate
+        ]
+
+    # 結果の表示
+    for name, model in report["models"].items():
+        latency = model["latency"]
+        print(
+            f"{name:<10} {model['model_dir']}: サイズ {model['size_mb']}MB, 最大メモリ {model['max_rss_mb']}MB, "
+            f"ロード {model['load_seconds']}秒, 1文あたり 平均 {latency['mean_ms']}ms / "
+            f"p50 {latency['p50_ms']}ms / p95 {latency['p95_ms']}ms"
+        )
+    for lang in languages:
+        scores = report["quality"][lang]
+        changed = len(report["differences"][lang])
+        if scores is None:
+            print(f"{lang}: 翻訳が異なる文 {changed}/{len(MENU_CORPUS)}（BLEU・chrF の計算には sacrebleu が必要です）")
+        else:
+            print(f"{lang}: BLEU {scores['bleu']}（{scores['bleu_tokenizer']}）, chrF {scores['chrf']}, 翻訳が異なる文 {changed}/{len(MENU_CORPUS)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"結果を保存しました: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,61 @@
-from optimum.intel.openvino import OVModelForSeq2SeqLM
+"""
+mBART-50をOpenVINOの形式にエクスポートするスクリプト
+
+使い方:
+    python convert_to_openvino.py                        # FP32（./assets/ov_mbart）
+    python convert_to_openvino.py --weight-format int8   # 8ビットの重み圧縮（./assets/ov_mbart_int8）
+    python convert_to_openvino.py --weight-format int4   # 4ビットの重み圧縮（./assets/ov_mbart_int4）
+
+重み圧縮には nncf が必要（requirements.txt に含まれている）
+
+重み圧縮したモデルを使う場合は、TRANSLATION_OPENVINO の MODEL_DIR（または環境変数
+TRANSLATION_OV_MODEL_DIR）に出力先を指定し、TRANSLATION_MODEL_VERSION も変更する
+"""
+import argparse
+
+from optimum.intel.openvino import OVModelForSeq2SeqLM, OVWeightQuantizationConfig
 from transformers import MBart50TokenizerFast
 
 model_id = "facebook/mbart-large-50-many-to-many-mmt"
 
+# 重み圧縮の形式ごとの出力先
+DEFAULT_OUTPUT_DIRS = {
+    "fp32": "./assets/ov_mbart",
+    "int8": "./assets/ov_mbart_int8",
+    "int4": "./assets/ov_mbart_int4",
+}
+
+parser = argparse.ArgumentParser(description="mBART-50をOpenVINOの形式にエクスポートします")
+parser.add_argument(
+    "--weight-format", choices=DEFAULT_OUTPUT_DIRS.keys(), default="fp32",
+    help="重みの形式（int8 / int4 はNNCFで重みを圧縮します。デフォルト: fp32）",
+)
+parser.add_argument("--output", help="出力先のディレクトリ（省略した場合は形式ごとのデフォルト）")
+parser.add_argument(
+    "--group-size", type=int, default=128,
+    help="int4 の場合に、同じスケールを共有する重みの数（デフォルト: 128）",
+)
+parser.add_argument(
+    "--ratio", type=float, default=1.0,
+    help="int4 の場合に、4ビットにする層の割合（残りは8ビット。デフォルト: 1.0）",
+)
+args = parser.parse_args()
+output_dir = args.output or DEFAULT_OUTPUT_DIRS[args.weight_format]
+
+# 重み圧縮の設定（重みだけを圧縮し、活性化は元の精度のまま計算する）
+quantization_config = None
+if args.weight_format == "int8":
+    quantization_config = OVWeightQuantizationConfig(bits=8)
+elif args.weight_format == "int4":
+    quantization_config = OVWeightQuantizationConfig(
+        bits=4, sym=False, group_size=args.group_size, ratio=args.ratio
+    )
+
 # OpenVINO用にエクスポート
-model = OVModelForSeq2SeqLM.from_pretrained(model_id, export=True)
-model.save_pretrained('./assets/ov_mbart')
+model = OVModelForSeq2SeqLM.from_pretrained(
+    model_id, export=True, quantization_config=quantization_config
+)
+model.save_pretrained(output_dir)
 tokenizer = MBart50TokenizerFast.from_pretrained(model_id)
-tokenizer.save_pretrained('./assets/ov_mbart')
\ No newline at end of file
+tokenizer.save_pretrained(output_dir)
+print(f"{args.weight_format} のモデルを保存しました: {output_dir}")
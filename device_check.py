@@ -1,9 +1,53 @@
+"""
+OpenVINOのデバイスと翻訳モデルの設定を確認するスクリプト
+
+使い方:
+    python device_check.py             # 利用可能なデバイスと、設定したデバイスのプロパティを表示
+    python device_check.py --compile   # 設定でエンコーダーをコンパイルし、実際に適用された設定を表示
+    python device_check.py --device GPU
+
+Djangoの設定（itadaku.settings の TRANSLATION_OPENVINO）と環境変数（TRANSLATION_OV_<キー>）を反映する
+"""
+import argparse
+import os
+import time
+
+import django
 from openvino.runtime import Core
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "itadaku.settings")
+django.setup()
+
+from translate_ja_to_mm import build_ov_config, get_openvino_config  # noqa: E402
+
+# コンパイル後に表示するプロパティ
+COMPILED_PROPERTIES = (
+    "PERFORMANCE_HINT",
+    "NUM_STREAMS",
+    "INFERENCE_NUM_THREADS",
+    "OPTIMAL_NUMBER_OF_INFER_REQUESTS",
+    "EXECUTION_DEVICES",
+)
+
+parser = argparse.ArgumentParser(description="OpenVINOのデバイスと翻訳モデルの設定を確認します")
+parser.add_argument("--device", help="確認するデバイス（省略した場合は設定のデバイス）")
+parser.add_argument("--compile", action="store_true", help="エンコーダーをコンパイルして、適用された設定を表示します")
+args = parser.parse_args()
+
+config = get_openvino_config()
+if args.device:
+    config["DEVICE"] = args.device
+device = config["DEVICE"]
+ov_config = build_ov_config(config)
+
+print("翻訳モデルの設定:")
+for key, value in config.items():
+    print(f"  {key:<22}: {value}")
+print(f"  {'ov_config':<22}: {ov_config}\n")
+
 core = Core()
 print(core.available_devices)
 
-device = "GPU"
-
 print(core.get_property(device, "FULL_DEVICE_NAME"))
 
 print(f"{device} SUPPORTED_PROPERTIES:\n")
@@ -16,4 +60,17 @@ for property_key in supported_properties:
             property_val = core.get_property(device, property_key)
         except TypeError:
             property_val = 'UNSUPPORTED TYPE'
-        print(f"{property_key:<{indent}}: {property_val}")
\ No newline at end of file
+        print(f"{property_key:<{indent}}: {property_val}")
+
+if args.compile:
+    # キャッシュがあれば2回目以降のコンパイル時間は短くなる
+    encoder_path = os.path.join(config["MODEL_DIR"], "openvino_encoder_model.xml")
+    started = time.perf_counter()
+    compiled_model = core.compile_model(encoder_path, device, ov_config)
+    print(f"\nエンコーダーのコンパイル時間: {time.perf_counter() - started:.2f}秒")
+    for property_key in COMPILED_PROPERTIES:
+        try:
+            property_val = compiled_model.get_property(property_key)
+        except RuntimeError:
+            property_val = 'UNSUPPORTED'
+        print(f"{property_key:<{indent}}: {property_val}")
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'itadaku.settings')
 
 application = get_asgi_application()
+
+# 翻訳モデルをバックグラウンドでロードし、最初のリクエストの前に推論を実行しておく
+from app.inference import start_model_warmup_if_enabled  # noqa: E402
+
+start_model_warmup_if_enabled()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # request.user を参照するため、AuthenticationMiddleware より後に置く
+    'app.middleware.RequestProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -122,6 +125,141 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# 翻訳ワーカー（manage.py translation_worker）を利用するかどうか
+# Trueの場合、翻訳APIはキャッシュがなければジョブをキューに追加して待機中を返す
+TRANSLATION_WORKER_ENABLED = False
+
+# 起動時に翻訳モデルをバックグラウンドでロードし、ダミーの翻訳を実行してコンパイルしておくかどうか
+# Trueの場合、/healthz/ready はウォームアップが完了するまで503を返す
+# ウォームアップは itadaku/wsgi.py・asgi.py から起動したサーバーのプロセスでだけ開始する（管理コマンドなどでは開始しない）
+# （gunicorn の --preload を使う場合は、フォーク前にスレッドが起動しないよう無効にする）
+TRANSLATION_MODEL_WARMUP = False
+
+# 翻訳モデル（OpenVINO）の設定
+# 環境変数 TRANSLATION_OV_<キー>（例: TRANSLATION_OV_DEVICE=GPU）で上書きできる
+# MODEL_DIR: モデルのディレクトリ
+# DEVICE: 推論デバイス（CPU / GPU / AUTO など）
+# CACHE_DIR: コンパイル済みモデルのキャッシュ（2回目以降の起動でコンパイルを省略する。空文字の場合はキャッシュしない）
+# PERFORMANCE_HINT: LATENCY（1件ずつの応答速度を優先）/ THROUGHPUT（同時に処理する件数を優先）
+# INFERENCE_NUM_THREADS: 推論スレッド数（Noneの場合はOpenVINOのデフォルト）
+# NUM_STREAMS: ストリーム数（Noneの場合は PERFORMANCE_HINT に従う）
+TRANSLATION_OPENVINO = {
+    'MODEL_DIR': str(BASE_DIR / 'assets' / 'ov_mbart'),
+    'DEVICE': 'CPU',
+    'CACHE_DIR': str(BASE_DIR / 'assets' / 'ov_cache'),
+    'PERFORMANCE_HINT': 'LATENCY',
+    'INFERENCE_NUM_THREADS': None,
+    'NUM_STREAMS': None,
+}
+
+# 翻訳メモリのキーに使うモデルのバージョン
+# モデルを変更・再変換した場合は値を変えて、古い翻訳メモリを使わないようにする
+TRANSLATION_MODEL_VERSION = 'facebook/mbart-large-50-many-to-many-mmt'
+
+# 翻訳キャッシュの前段に置くプロセス内キャッシュの設定
+# MAX_ENTRIES: 保持する最大件数（超えた場合は最も古く使われたものから削除）
+# TTL: 有効期限（秒）
+# BACKEND: プロセス内にない場合に参照するDjangoのキャッシュのエイリアス（Noneの場合は参照しない）
+TRANSLATION_LOCAL_CACHE = {
+    'MAX_ENTRIES': 2048,
+    'TTL': 300,
+    'BACKEND': None,
+}
+
+# メニュー一覧ページの描画結果をキャッシュする秒数
+# キャッシュのキーにはメニューと翻訳のバージョンが含まれるため、変更時は自動的に作り直される
+MENU_PAGE_CACHE_TIMEOUT = 600
+
+# メニューPDFのキャッシュの設定
+# DIR: 生成したPDFを保存するディレクトリ（言語とメニュー・翻訳のバージョンごとに保存される）
+# REGENERATE_DELAY: メニューの変更後、キャッシュされているPDFをバックグラウンドで生成し直すまでの秒数
+#                   （Noneの場合は生成し直さず、次のリクエスト時に生成する）
+# SENDFILE_HEADER: PDFの送信をWebサーバーに任せる場合のヘッダー名（'X-Sendfile' / 'X-Accel-Redirect'）
+# SENDFILE_URL: X-Accel-Redirect の場合に DIR を公開している内部URL（例: '/protected/menu_pdfs/'）
+MENU_PDF_CACHE = {
+    'DIR': MEDIA_ROOT / 'menu_pdfs',
+    'REGENERATE_DELAY': 10,
+    'SENDFILE_HEADER': None,
+    'SENDFILE_URL': None,
+}
+
+# 複数の言語のPDFをまとめて出力する際に、並列に描画するワーカープロセスの最大数
+# Noneの場合は利用できるCPUコア数
+PDF_EXPORT_MAX_WORKERS = None
+
+# PDFの描画1回あたりにメモリに置くPDFの最大バイト数（超えた分は一時ファイルとしてディスクに書き出す）
+# 翻訳に失敗した場合のメニューPDF・render_to_pdf の描画に使う（キャッシュするメニューPDFはキャッシュのディレクトリに直接描画する）
+# 0の場合は常にディスクに書き込み、Noneの場合は制限なし
+PDF_RENDER_MAX_MEMORY = 5 * 1024 * 1024
+
+# メニュー項目の画像から作成する派生画像の設定
+# WIDTHS: Web表示用（srcset）のJPEG・WebPの幅
+# PRINT_SIZE: PDF用のJPEGの長辺のピクセル数
+# JPEG_QUALITY / WEBP_QUALITY / PRINT_QUALITY: それぞれの画質
+MENU_IMAGE_VARIANTS = {
+    'WIDTHS': [320, 640, 960],
+    'PRINT_SIZE': 1200,
+    'JPEG_QUALITY': 80,
+    'WEBP_QUALITY': 75,
+    'PRINT_QUALITY': 85,
+}
+
+# 非同期の翻訳APIで翻訳モデルの推論を実行するスレッドプールの設定（app.inference）
+# MAX_CONCURRENCY: 推論を実行するスレッドの数
+#   翻訳モデルの推論は translate_ja_to_mm のロックで一度に1つずつ実行されるため、2以上にしても推論は並列にならない
+#   （キャッシュ・翻訳メモリの確認と保存だけが並列になり、推論はスレッドの中で順番を待つ）
+# MAX_QUEUE: 実行を待つことができる推論の数（超えた場合は 429 を返す）
+# RETRY_AFTER: 429 の Retry-After ヘッダーの秒数
+TRANSLATION_INFERENCE = {
+    'MAX_CONCURRENCY': 1,
+    'MAX_QUEUE': 8,
+    'RETRY_AFTER': 5,
+}
+
+# リクエストのプロファイリングの設定（app.middleware.RequestProfilingMiddleware）
+# SERVER_TIMING: レスポンスに Server-Timing ヘッダー（処理時間・クエリ数・翻訳モデルの処理時間）を付ける
+# SLOW_REQUEST_THRESHOLD_MS: この時間（ミリ秒）以上かかったリクエストを管理画面の一覧に記録する
+# SLOW_REQUEST_LOG_SIZE: 記録するリクエストの最大数（古いものから削除する）
+REQUEST_PROFILING = {
+    'SERVER_TIMING': True,
+    'SLOW_REQUEST_THRESHOLD_MS': 500,
+    'SLOW_REQUEST_LOG_SIZE': 100,
+}
+
+# ログの設定
+# ログレベルは環境変数 ITADAKU_LOG_LEVEL で変更できる（デフォルトは DEBUG の場合 INFO、それ以外は WARNING）
+# 翻訳のテキストなどの詳細は DEBUG で出力する
+LOG_LEVEL = os.environ.get('ITADAKU_LOG_LEVEL', 'INFO' if DEBUG else 'WARNING').upper()
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '{asctime} {levelname} {name}: {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'app': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'translate_ja_to_mm': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -18,8 +18,11 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from app.views import slow_requests_view
 
 urlpatterns = [
+    # 管理画面のURLより前に置く（admin/ 以下の未定義のURLは管理画面が処理するため）
+    path('admin/slow_requests/', slow_requests_view, name='slow_requests'),
     path('admin/', admin.site.urls),
     path('', include('app.urls')),
 ]
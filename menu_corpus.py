@@ -0,0 +1,42 @@
+"""
+翻訳のベンチマーク・品質比較に使う日本語のメニューのテキスト
+
+結果を比較できるよう、内容と順序は変更しないこと（変更する場合は CORPUS_VERSION を上げる）
+"""
+CORPUS_VERSION = 1
+
+MENU_CORPUS = [
+    # 商品名
+    "牛ステーキ",
+    "豚の生姜焼き",
+    "ベジタブルカレー",
+    "フライドポテト",
+    "シーザーサラダ",
+    "チョコレートケーキ",
+    "フルーツパフェ",
+    "コーヒー",
+    "オレンジジュース",
+    "鶏の唐揚げ定食",
+    "海老の天ぷら",
+    "抹茶アイスクリーム",
+    # 商品詳細
+    "厳選された牛肉を使用した贅沢なステーキです。",
+    "国産豚肉を使用した定番の生姜焼きです。",
+    "季節の野菜をたっぷり使ったカレーです。",
+    "カリッと揚げたポテトフライです。",
+    "新鮮な野菜とシーザードレッシングのサラダです。",
+    "濃厚なチョコレートケーキです。",
+    "季節のフルーツを使ったパフェです。",
+    "香り高いコーヒーです。",
+    "搾りたてのオレンジジュースです。",
+    "ジューシーな鶏の唐揚げに、ご飯と味噌汁が付いた定食です。",
+    "大きな海老を軽い衣で揚げました。天つゆでお召し上がりください。",
+    "京都産の抹茶を使った、ほろ苦いアイスクリームです。",
+    # アレルギー・注意書き
+    "えび、かに、たまご",
+    "小麦、乳、大豆を含みます。",
+    "この商品には豚肉が含まれています。",
+    "ビーガンの方もお召し上がりいただけます。",
+    "辛さは調整できますので、スタッフにお声がけください。",
+    "数量限定のため、売り切れの場合はご容赦ください。",
+]
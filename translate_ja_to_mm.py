@@ -1,70 +1,160 @@
-from optimum.intel.openvino import OVModelForSeq2SeqLM
-from transformers import MBart50TokenizerFast
+import contextvars
+import functools
+import logging
 import os
-from typing import Dict, Optional, Tuple
-
-# 対応言語コードと言語名のマッピング
-SUPPORTED_LANGUAGES: Dict[str, str] = {
-    "ar_AR": "العربية",
-    "cs_CZ": "Čeština",
-    "de_DE": "Deutsch",
-    "en_XX": "English",
-    "es_XX": "Español",
-    "et_EE": "Eesti",
-    "fi_FI": "Suomi",
-    "fr_XX": "Français",
-    "gu_IN": "ગુજરાતી",
-    "hi_IN": "हिन्दी",
-    "it_IT": "Italiano",
-    "ja_XX": "日本語",
-    "kk_KZ": "Қазақша",
-    "ko_KR": "한국어",
-    "lt_LT": "Lietuvių",
-    "lv_LV": "Latviešu",
-    "my_MM": "မြန်မာဘာသာ",
-    "ne_NP": "नेपाली",
-    "nl_XX": "Nederlands",
-    "ro_RO": "Română",
-    "ru_RU": "Русский",
-    "si_LK": "සිංහල",
-    "tr_TR": "Türkçe",
-    "vi_VN": "Tiếng Việt",
-    "zh_CN": "中文",
-    "af_ZA": "Afrikaans",
-    "az_AZ": "Azərbaycanca",
-    "bn_IN": "বাংলা",
-    "fa_IR": "فارسی",
-    "he_IL": "עברית",
-    "hr_HR": "Hrvatski",
-    "id_ID": "Bahasa Indonesia",
-    "ka_GE": "ქართული",
-    "km_KH": "ភាសាខ្មែរ",
-    "mk_MK": "Македонски",
-    "ml_IN": "മലയാളം",
-    "mn_MN": "Монгол",
-    "mr_IN": "मराठी",
-    "pl_PL": "Polski",
-    "ps_AF": "پښتو",
-    "pt_XX": "Português",
-    "sv_SE": "Svenska",
-    "sw_KE": "Kiswahili",
-    "ta_IN": "தமிழ்",
-    "te_IN": "తెలుగు",
-    "th_TH": "ไทย",
-    "tl_XX": "Tagalog",
-    "uk_UA": "Українська",
-    "ur_PK": "اردو",
-    "xh_ZA": "isiXhosa",
-    "gl_ES": "Galego",
-    "sl_SI": "Slovenščina",
-}
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# 言語の一覧は軽量なモジュールに分けている（このモジュールからも利用できるように読み込む）
+from translate_languages import (  # noqa: F401
+    SUPPORTED_LANGUAGES,
+    get_supported_languages,
+    get_language_name,
+    validate_language as _validate_language,
+)
+
+# optimum・transformers は読み込みに数秒かかるため、最初の推論時まで読み込まない
+# （Djangoの起動や manage.py migrate などの管理コマンドで読み込まないようにする）
+if TYPE_CHECKING:
+    from optimum.intel.openvino import OVModelForSeq2SeqLM
+    from transformers import MBart50TokenizerFast
+
+logger = logging.getLogger(__name__)
 
 # モデルとトークナイザーのキャッシュ
 _model = None
 _tokenizer = None
+# 複数のスレッドから同時に呼び出された場合も、モデルのロードは一度だけ行う
+_model_lock = threading.Lock()
+# OpenVINOの推論リクエストとトークナイザー（src_lang の設定）はスレッドセーフではないため、
+# トークン化・生成・デコードは一度に1つのスレッドだけが実行する（同時に呼び出した場合は順に実行される）
+_inference_lock = threading.RLock()
+
+# モデルの状態
+MODEL_NOT_LOADED = "not_loaded"  # 未ロード
+MODEL_LOADING = "loading"        # ロード中
+MODEL_LOADED = "loaded"          # ロード済み（推論は未実行）
+MODEL_READY = "ready"            # 推論を実行済み（コンパイル済み）
+MODEL_FAILED = "failed"          # ロード・ウォームアップに失敗
+
+_model_state: Dict[str, Any] = {
+    "status": MODEL_NOT_LOADED,
+    "error": None,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "device": None,
+    "ov_config": None,
+}
+_warmup_thread: Optional[threading.Thread] = None
+
+# ウォームアップで翻訳するテキスト
+WARMUP_TEXT = "こんにちは"
+
+# OpenVINOの設定のデフォルト値
+# Djangoの設定（settings.TRANSLATION_OPENVINO）で上書きでき、さらに環境変数
+# （TRANSLATION_OV_<キー>、例: TRANSLATION_OV_DEVICE=GPU）で上書きできる
+OPENVINO_DEFAULTS: Dict[str, Any] = {
+    "MODEL_DIR": "./assets/ov_mbart",   # モデルのディレクトリ
+    "DEVICE": "CPU",                    # 推論デバイス（CPU / GPU / AUTO など）
+    "CACHE_DIR": "./assets/ov_cache",   # コンパイル済みモデルのキャッシュ（空文字の場合はキャッシュしない）
+    "PERFORMANCE_HINT": "LATENCY",      # LATENCY / THROUGHPUT / CUMULATIVE_THROUGHPUT
+    "INFERENCE_NUM_THREADS": None,      # 推論スレッド数（Noneの場合はOpenVINOのデフォルト）
+    "NUM_STREAMS": None,                # ストリーム数（Noneの場合は PERFORMANCE_HINT に従う）
+}
+
+# コンパイル時にOpenVINOに渡す設定のキー
+OV_CONFIG_KEYS = ("PERFORMANCE_HINT", "CACHE_DIR", "INFERENCE_NUM_THREADS", "NUM_STREAMS")
 
+# 1回の推論でまとめて翻訳するテキスト数
+DEFAULT_BATCH_SIZE = 16
+# 生成する最大トークン数
+MAX_NEW_TOKENS = 50
 
-def get_model_and_tokenizer() -> Tuple[OVModelForSeq2SeqLM, MBart50TokenizerFast]:
+# 処理時間の通知先（処理の名前と秒数を受け取る関数）
+# このモジュールはDjangoに依存しないため、メトリクスへの記録は呼び出し側で登録する
+_timing_observers: List[Callable[[str, float], None]] = []
+
+
+def add_timing_observer(observer: Callable[[str, float], None]) -> None:
+    """
+    推論の各処理（encode / tokenize / generate / decode）の処理時間の通知先を登録する関数
+
+    同じ関数を複数回登録した場合も、通知は一度だけ行う
+
+    Args:
+        observer: 処理の名前と処理時間（秒）を受け取る関数
+    """
+    if observer not in _timing_observers:
+        _timing_observers.append(observer)
+
+
+@contextmanager
+def _timed(name: str) -> Iterator[None]:
+    """with ブロックの処理時間を登録された通知先に送る"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        for observer in _timing_observers:
+            observer(name, elapsed)
+
+
+def _serialized(func: Callable[..., Any]) -> Callable[..., Any]:
+    """関数全体を _inference_lock を取得してから実行するデコレータ"""
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with _inference_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def get_openvino_config() -> Dict[str, Any]:
+    """
+    OpenVINOの設定を取得する関数
+
+    デフォルト値、Djangoの設定（settings.TRANSLATION_OPENVINO）、環境変数（TRANSLATION_OV_<キー>）の順に上書きする
+
+    Returns:
+        Dict[str, Any]: OPENVINO_DEFAULTS と同じキーの設定
+    """
+    config = dict(OPENVINO_DEFAULTS)
+
+    # Djangoから利用する場合のみ、Djangoの設定を参照する
+    try:
+        from django.conf import settings
+        if settings.configured:
+            config.update(getattr(settings, "TRANSLATION_OPENVINO", {}))
+    except ImportError:
+        pass
+
+    for key in OPENVINO_DEFAULTS:
+        value = os.environ.get(f"TRANSLATION_OV_{key}")
+        if value is not None:
+            config[key] = value
+    return config
+
+
+def build_ov_config(config: Dict[str, Any]) -> Dict[str, str]:
+    """
+    コンパイル時にOpenVINOに渡す設定（ov_config）を作成する関数
+
+    Args:
+        config (Dict[str, Any]): get_openvino_config で取得した設定
+
+    Returns:
+        Dict[str, str]: 値が指定されている設定だけを文字列にした辞書
+    """
+    return {
+        key: str(config[key])
+        for key in OV_CONFIG_KEYS
+        if config.get(key) not in (None, "")
+    }
+
+
+def get_model_and_tokenizer() -> Tuple["OVModelForSeq2SeqLM", "MBart50TokenizerFast"]:
     """
     モデルとトークナイザーをロードし、キャッシュする関数
 
@@ -74,83 +164,335 @@ def get_model_and_tokenizer() -> Tuple[OVModelForSeq2SeqLM, MBart50TokenizerFast
     global _model, _tokenizer
 
     if _model is None or _tokenizer is None:
-        model_dir = "./assets/ov_mbart"
+        with _model_lock:
+            if _model is None or _tokenizer is None:
+                config = get_openvino_config()
+                model_dir = config["MODEL_DIR"]
+                ov_config = build_ov_config(config)
+                _set_model_state(MODEL_LOADING, device=config["DEVICE"], ov_config=ov_config)
+                started = time.perf_counter()
+
+                try:
+                    if not os.path.exists(model_dir):
+                        raise FileNotFoundError(f"モデルディレクトリが見つかりません: {model_dir}")
+
+                    from optimum.intel.openvino import OVModelForSeq2SeqLM
+                    from transformers import MBart50TokenizerFast
+
+                    tokenizer = MBart50TokenizerFast.from_pretrained(model_dir)
+                    # CACHE_DIR を指定すると、2回目以降の起動ではコンパイル済みのモデルを読み込む
+                    _model = OVModelForSeq2SeqLM.from_pretrained(
+                        model_dir, device=config["DEVICE"], ov_config=ov_config
+                    )
+                    _tokenizer = tokenizer
+                except Exception as e:
+                    _set_model_state(MODEL_FAILED, error=str(e))
+                    raise
+                _set_model_state(MODEL_LOADED, load_seconds=round(time.perf_counter() - started, 3))
 
-        if not os.path.exists(model_dir):
-            raise FileNotFoundError(f"モデルディレクトリが見つかりません: {model_dir}")
+    return _model, _tokenizer
 
-        _model = OVModelForSeq2SeqLM.from_pretrained(model_dir)
-        _tokenizer = MBart50TokenizerFast.from_pretrained(model_dir)
 
-    return _model, _tokenizer
+def _set_model_state(status: str, **values: Any) -> None:
+    """モデルの状態を更新する関数"""
+    _model_state.update({"status": status, "error": None, **values})
 
 
-def get_supported_languages() -> Dict[str, str]:
+def _mark_model_ready() -> None:
+    """推論を実行できた場合に、モデルの状態を推論可能にする関数"""
+    if _model_state["status"] == MODEL_LOADED:
+        _set_model_state(MODEL_READY)
+
+
+def get_model_state() -> Dict[str, Any]:
     """
-    サポートされている言語コードと言語名のマッピングを取得する関数
+    モデルの状態を取得する関数
 
     Returns:
-        Dict[str, str]: 言語コードと言語名のマッピング
+        Dict[str, Any]: 状態（status）、エラー（error）、ロードとウォームアップにかかった秒数
     """
-    return SUPPORTED_LANGUAGES.copy()
+    return dict(_model_state)
 
 
-def translate_text(japanese_text: str, target_lang: str = "en_XX") -> str:
+def warm_up_model() -> None:
     """
-    日本語テキストを指定された言語に翻訳する関数
+    モデルをロードし、ダミーの翻訳を実行してコンパイルを済ませる関数
+
+    失敗した場合は状態を MODEL_FAILED にして例外を送出する
+    """
+    get_model_and_tokenizer()
+    started = time.perf_counter()
+    try:
+        translate_batch([WARMUP_TEXT], "en_XX")
+    except Exception as e:
+        _set_model_state(MODEL_FAILED, error=str(e))
+        raise
+    _set_model_state(MODEL_READY, warmup_seconds=round(time.perf_counter() - started, 3))
+
+
+def start_model_warmup() -> threading.Thread:
+    """
+    バックグラウンドのスレッドでモデルのウォームアップを開始する関数
+
+    すでに開始している場合は、そのスレッドを返す
+
+    Returns:
+        threading.Thread: ウォームアップを実行するスレッド
+    """
+    global _warmup_thread
+
+    def run() -> None:
+        try:
+            warm_up_model()
+            logger.info("翻訳モデルのウォームアップが完了しました: %s", get_model_state())
+        except Exception:
+            logger.exception("翻訳モデルのウォームアップに失敗しました")
+
+    with _model_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=run, name="translation-model-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+@_serialized
+def translate_batch(
+    texts: List[str], target_lang: str = "en_XX", batch_size: int = DEFAULT_BATCH_SIZE
+) -> List[str]:
+    """
+    複数の日本語テキストをまとめて指定された言語に翻訳する関数
+
+    テキストをトークン長でソートして長さの近いもの同士でバッチを作り、
+    バッチごとにパディングした1つのテンソルで model.generate を実行する。
+    同じテキストが複数含まれる場合は一度だけ翻訳する。
 
     Args:
-        japanese_text (str): 翻訳したい日本語テキスト
+        texts (List[str]): 翻訳したい日本語テキストのリスト
         target_lang (str): 翻訳先の言語コード（デフォルト: en_XX）
-                          例: en_XX（英語）, zh_CN（中国語）, ko_KR（韓国語）など
+        batch_size (int): 1回の推論でまとめるテキスト数（デフォルト: 16）
 
     Returns:
-        str: 翻訳されたテキスト
+        List[str]: 入力と同じ順序の翻訳されたテキストのリスト
 
     Raises:
         ValueError: サポートされていない言語コードが指定された場合
     """
-    # 言語コードの検証
-    if target_lang not in SUPPORTED_LANGUAGES:
-        supported_codes = ", ".join(SUPPORTED_LANGUAGES.keys())
-        raise ValueError(
-            f"サポートされていない言語コードです: {target_lang}\nサポートされている言語コード: {supported_codes}"
-        )
+    _validate_language(target_lang)
+
+    if not texts:
+        return []
+
+    # 重複を除いたテキスト（順序は保持）
+    unique_texts = list(dict.fromkeys(texts))
+
+    # モデルとトークナイザーの取得
+    model, tokenizer = get_model_and_tokenizer()
+
+    # パディングなしでトークン化し、各テキストのトークン長を求める
+    tokenizer.src_lang = "ja_XX"  # 入力は日本語
+    with _timed("tokenize"):
+        encoded = tokenizer(unique_texts)
+    order = sorted(
+        range(len(unique_texts)), key=lambda i: len(encoded["input_ids"][i])
+    )
+
+    forced_bos_token_id = tokenizer.lang_code_to_id[target_lang]
+    translations: Dict[str, str] = {}
+
+    # 長さの近いテキストごとにバッチを作成して翻訳
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        with _timed("tokenize"):
+            inputs = tokenizer.pad(
+                {
+                    "input_ids": [encoded["input_ids"][i] for i in bucket],
+                    "attention_mask": [encoded["attention_mask"][i] for i in bucket],
+                },
+                return_tensors="pt",
+            )
+
+        with _timed("generate"):
+            generated_tokens = model.generate(
+                input_ids=inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                forced_bos_token_id=forced_bos_token_id,
+                max_new_tokens=MAX_NEW_TOKENS,
+            )
+
+        with _timed("decode"):
+            decoded = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)
+        for index, translated_text in zip(bucket, decoded):
+            translations[unique_texts[index]] = translated_text
+
+    _mark_model_ready()
+    return [translations[text] for text in texts]
+
+
+@_serialized
+def translate_to_languages(
+    japanese_text: str, target_langs: List[str], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, str]:
+    """
+    1つの日本語テキストを複数の言語にまとめて翻訳する関数
+
+    エンコーダーの出力は翻訳先の言語に依存しないため、エンコードは一度だけ行い、
+    その出力を翻訳先の数だけ複製してデコーダーでまとめて生成する。
+    各行のデコーダー入力の先頭に翻訳先の言語コードを置くことで、
+    行ごとに異なる forced_bos_token_id を指定したのと同じ結果になる。
+
+    Args:
+        japanese_text (str): 翻訳したい日本語テキスト
+        target_langs (List[str]): 翻訳先の言語コードのリスト
+        batch_size (int): 1回の推論でまとめる言語数（デフォルト: 16）
+
+    Returns:
+        Dict[str, str]: 言語コードと翻訳されたテキストのマッピング
+
+    Raises:
+        ValueError: サポートされていない言語コードが指定された場合
+    """
+    for target_lang in target_langs:
+        _validate_language(target_lang)
+
+    # 重複を除いた言語コード（順序は保持）
+    unique_langs = list(dict.fromkeys(target_langs))
+    if not unique_langs:
+        return {}
+
+    import torch
+    from transformers.modeling_outputs import BaseModelOutput
 
     # モデルとトークナイザーの取得
     model, tokenizer = get_model_and_tokenizer()
 
     # 入力テキストの準備
     tokenizer.src_lang = "ja_XX"  # 入力は日本語
-    inputs = tokenizer(japanese_text, return_tensors="pt")
-
-    # 翻訳の実行
-    generated_tokens = model.generate(
-        input_ids=inputs["input_ids"],
-        attention_mask=inputs["attention_mask"],
-        forced_bos_token_id=tokenizer.lang_code_to_id[target_lang],
-        max_new_tokens=50,
+    with _timed("tokenize"):
+        inputs = tokenizer(japanese_text, return_tensors="pt")
+
+    # エンコードは一度だけ実行
+    with _timed("encode"):
+        encoder_outputs = model.get_encoder()(
+            input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]
+        )
+    hidden_state = encoder_outputs.last_hidden_state
+
+    decoder_start_token_id = model.config.decoder_start_token_id
+    translations: Dict[str, str] = {}
+
+    for start in range(0, len(unique_langs), batch_size):
+        langs = unique_langs[start:start + batch_size]
+        count = len(langs)
+
+        # デコーダーの入力: [開始トークン, 翻訳先の言語コード]
+        decoder_input_ids = torch.tensor(
+            [[decoder_start_token_id, tokenizer.lang_code_to_id[lang]] for lang in langs]
+        )
+
+        with _timed("generate"):
+            generated_tokens = model.generate(
+                encoder_outputs=BaseModelOutput(
+                    last_hidden_state=hidden_state.repeat(count, 1, 1)
+                ),
+                attention_mask=inputs["attention_mask"].repeat(count, 1),
+                decoder_input_ids=decoder_input_ids,
+                max_new_tokens=MAX_NEW_TOKENS,
+            )
+
+        with _timed("decode"):
+            decoded = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)
+        translations.update(zip(langs, decoded))
+
+    _mark_model_ready()
+    return {lang: translations[lang] for lang in target_langs}
+
+
+def translate_text_stream(japanese_text: str, target_lang: str = "en_XX") -> Iterator[str]:
+    """
+    日本語テキストを翻訳し、生成途中の翻訳をトークンが生成されるたびに返すジェネレータ
+
+    model.generate は別のスレッドで実行し、TextIteratorStreamer で生成されたトークンを受け取る。
+    長いテキストの翻訳を、生成が終わる前から表示するために使う
+
+    Args:
+        japanese_text (str): 翻訳したい日本語テキスト
+        target_lang (str): 翻訳先の言語コード（デフォルト: en_XX）
+
+    Yields:
+        str: それまでに生成された部分の翻訳（最後は translate_text と同じ完成した翻訳）
+
+    Raises:
+        ValueError: サポートされていない言語コードが指定された場合
+    """
+    _validate_language(target_lang)
+
+    from transformers import TextIteratorStreamer
+
+    # モデルとトークナイザーの取得
+    model, tokenizer = get_model_and_tokenizer()
+
+    # 生成途中の翻訳を受け取る間はロックを保持しないよう、トークン化・生成・デコードごとにロックを取得する
+    with _inference_lock:
+        tokenizer.src_lang = "ja_XX"  # 入力は日本語
+        with _timed("tokenize"):
+            inputs = tokenizer(japanese_text, return_tensors="pt")
+
+    streamer = TextIteratorStreamer(tokenizer, skip_special_tokens=True)
+    result: Dict[str, Any] = {}
+
+    def generate() -> None:
+        try:
+            with _inference_lock, _timed("generate"):
+                result["tokens"] = model.generate(
+                    input_ids=inputs["input_ids"],
+                    attention_mask=inputs["attention_mask"],
+                    forced_bos_token_id=tokenizer.lang_code_to_id[target_lang],
+                    max_new_tokens=MAX_NEW_TOKENS,
+                    streamer=streamer,
+                )
+        except BaseException as e:
+            result["error"] = e
+            # 受け取り側の待機を終わらせる
+            streamer.end()
+
+    # 処理時間の通知先が呼び出し元のコンテキスト（処理中のリクエストなど）を参照できるように引き継ぐ
+    thread = threading.Thread(
+        target=contextvars.copy_context().run, args=(generate,), name="translation-stream", daemon=True
     )
+    thread.start()
 
-    # 翻訳結果のデコード
-    translated_text = tokenizer.batch_decode(
-        generated_tokens, skip_special_tokens=True
-    )[0]
+    partial = ""
+    for chunk in streamer:
+        if chunk:
+            partial += chunk
+            yield partial
+    thread.join()
 
-    return translated_text
+    if "error" in result:
+        raise result["error"]
 
+    with _inference_lock, _timed("decode"):
+        translated_text = tokenizer.batch_decode(result["tokens"], skip_special_tokens=True)[0]
+    _mark_model_ready()
+    yield translated_text
 
-def get_language_name(lang_code: str) -> Optional[str]:
+
+def translate_text(japanese_text: str, target_lang: str = "en_XX") -> str:
     """
-    言語コードから言語名を取得する関数
+    日本語テキストを指定された言語に翻訳する関数
 
     Args:
-        lang_code (str): 言語コード
+        japanese_text (str): 翻訳したい日本語テキスト
+        target_lang (str): 翻訳先の言語コード（デフォルト: en_XX）
+                          例: en_XX（英語）, zh_CN（中国語）, ko_KR（韓国語）など
 
     Returns:
-        Optional[str]: 言語名（サポートされていない言語コードの場合はNone）
+        str: 翻訳されたテキスト
+
+    Raises:
+        ValueError: サポートされていない言語コードが指定された場合
     """
-    return SUPPORTED_LANGUAGES.get(lang_code)
+    return translate_batch([japanese_text], target_lang)[0]
 
 
 # 使用例
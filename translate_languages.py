@@ -0,0 +1,102 @@
+"""
+翻訳で対応している言語の一覧
+
+翻訳モデル（optimum・transformers）を読み込まずに利用できるよう、translate_ja_to_mm から分けている
+"""
+from typing import Dict, Optional
+
+# 対応言語コードと言語名のマッピング
+SUPPORTED_LANGUAGES: Dict[str, str] = {
+    "ar_AR": "العربية",
+    "cs_CZ": "Čeština",
+    "de_DE": "Deutsch",
+    "en_XX": "English",
+    "es_XX": "Español",
+    "et_EE": "Eesti",
+    "fi_FI": "Suomi",
+    "fr_XX": "Français",
+    "gu_IN": "ગુજરાતી",
+    "hi_IN": "हिन्दी",
+    "it_IT": "Italiano",
+    "ja_XX": "日本語",
+    "kk_KZ": "Қазақша",
+    "ko_KR": "한국어",
+    "lt_LT": "Lietuvių",
+    "lv_LV": "Latviešu",
+    "my_MM": "မြန်မာဘာသာ",
+    "ne_NP": "नेपाली",
+    "nl_XX": "Nederlands",
+    "ro_RO": "Română",
+    "ru_RU": "Русский",
+    "si_LK": "සිංහල",
+    "tr_TR": "Türkçe",
+    "vi_VN": "Tiếng Việt",
+    "zh_CN": "中文",
+    "af_ZA": "Afrikaans",
+    "az_AZ": "Azərbaycanca",
+    "bn_IN": "বাংলা",
+    "fa_IR": "فارسی",
+    "he_IL": "עברית",
+    "hr_HR": "Hrvatski",
+    "id_ID": "Bahasa Indonesia",
+    "ka_GE": "ქართული",
+    "km_KH": "ភាសាខ្មែរ",
+    "mk_MK": "Македонски",
+    "ml_IN": "മലയാളം",
+    "mn_MN": "Монгол",
+    "mr_IN": "मराठी",
+    "pl_PL": "Polski",
+    "ps_AF": "پښتو",
+    "pt_XX": "Português",
+    "sv_SE": "Svenska",
+    "sw_KE": "Kiswahili",
+    "ta_IN": "தமிழ்",
+    "te_IN": "తెలుగు",
+    "th_TH": "ไทย",
+    "tl_XX": "Tagalog",
+    "uk_UA": "Українська",
+    "ur_PK": "اردو",
+    "xh_ZA": "isiXhosa",
+    "gl_ES": "Galego",
+    "sl_SI": "Slovenščina",
+}
+
+
+def get_supported_languages() -> Dict[str, str]:
+    """
+    サポートされている言語コードと言語名のマッピングを取得する関数
+
+    Returns:
+        Dict[str, str]: 言語コードと言語名のマッピング
+    """
+    return SUPPORTED_LANGUAGES.copy()
+
+
+def get_language_name(lang_code: str) -> Optional[str]:
+    """
+    言語コードから言語名を取得する関数
+
+    Args:
+        lang_code (str): 言語コード
+
+    Returns:
+        Optional[str]: 言語名（サポートされていない言語コードの場合はNone）
+    """
+    return SUPPORTED_LANGUAGES.get(lang_code)
+
+
+def validate_language(target_lang: str) -> None:
+    """
+    言語コードを検証する関数
+
+    Args:
+        target_lang (str): 翻訳先の言語コード
+
+    Raises:
+        ValueError: サポートされていない言語コードが指定された場合
+    """
+    if target_lang not in SUPPORTED_LANGUAGES:
+        supported_codes = ", ".join(SUPPORTED_LANGUAGES.keys())
+        raise ValueError(
+            f"サポートされていない言語コードです: {target_lang}\nサポートされている言語コード: {supported_codes}"
+        )